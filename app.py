@@ -3,38 +3,118 @@
 Application ITIL Management System - Version Flask
 """
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash
+from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash, Response, stream_with_context, g, send_file, make_response, get_template_attribute
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
-from flask_migrate import Migrate
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
 import os
+import re
+import json
+import click
+import time
+import base64
+import hashlib
+import socket
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta, timezone
 from datetime import datetime
 import enum
-from sqlalchemy import func
+from functools import wraps
+from collections import Counter
+from sqlalchemy import func, event, text, update, inspect as sa_inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, selectinload, joinedload, make_transient_to_detached
+from utils.search_index import SearchIndex, fold
+from utils.similarity import MinHashIndex
+from utils.autocomplete import TOP_SIZE, Coalescer, PrefixIndex
+from utils.cache import LRUCache
+from utils.blob_storage import BlobStore
+from utils.reports import REPORT_FORMATS, RENDERER_VERSION, ReportStore, render_report
+from utils.jobs import JobRegistry, JobRunner, backoff_delay, PRIORITY_HIGH, PRIORITY_LOW
+from utils.fast_json import FastJSONProvider
+from utils.compression import COMPRESSIBLE_TYPES, negotiate, compress, compress_stream
+from utils.fragments import FragmentCache
+from utils.exports import EXPORT_FORMATS, export_chunks
+from utils.live import EventBroker
+from utils.rca import WHY_COUNT, classify_analysis, last_why, split_solutions
+from utils.metrics import Registry, COUNT_BUCKETS, SIZE_BUCKETS
+from utils.query_budget import QueryCounter, QueryBudgetExceeded
+from utils.streaming import FORMATS, detect_format, iter_records
 
-# Configuration Flask
+# Application Flask (les routes s'y rattachent ; la configuration est faite par create_app)
 app = Flask(__name__)
-app.config['SECRET_KEY'] = os.getenv("SECRET_KEY", "supersecretkey123")
-app.config['SQLALCHEMY_DATABASE_URI'] = (
-    f"mysql+pymysql://{os.getenv('MYSQL_USER', 'root')}:{os.getenv('MYSQL_PASSWORD', '')}"
-    f"@{os.getenv('MYSQL_HOST', 'localhost')}:{os.getenv('MYSQL_PORT', '3306')}"
-    f"/{os.getenv('MYSQL_DATABASE', 'itil_app')}"
-)
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# jsonify et request.get_json passent par orjson (dates et Enum gérés nativement)
+app.json = FastJSONProvider(app)
 
 # Configuration de l'upload
 UPLOAD_FOLDER = 'static/uploads'
 ALLOWED_EXTENSIONS = {'txt', 'pdf', 'png', 'jpg', 'jpeg', 'gif'}
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+# Contenus des pièces jointes, rangés par empreinte SHA-256
+blob_store = BlobStore(os.path.join(UPLOAD_FOLDER, 'blobs'))
+BLOB_ORPHAN_MIN_AGE = 3600  # secondes avant qu'un fichier sans ligne Blob soit supprimé
+BLOB_SWEEP_BATCH = 500
 
-# Initialisation des extensions
-db = SQLAlchemy(app)
+# Extensions, liées à l'application par create_app
+db = SQLAlchemy()
 login_manager = LoginManager()
-login_manager.init_app(app)
 login_manager.login_view = 'login'
-migrate = Migrate(app, db)
+
+def default_config():
+    """Configuration lue dans l'environnement"""
+    config = {
+        'SECRET_KEY': os.getenv("SECRET_KEY", "supersecretkey123"),
+        # DATABASE_URL permet de pointer vers une autre base (SQLite pour les benchmarks...)
+        'SQLALCHEMY_DATABASE_URI': os.getenv('DATABASE_URL') or (
+            f"mysql+pymysql://{os.getenv('MYSQL_USER', 'root')}:{os.getenv('MYSQL_PASSWORD', '')}"
+            f"@{os.getenv('MYSQL_HOST', 'localhost')}:{os.getenv('MYSQL_PORT', '3306')}"
+            f"/{os.getenv('MYSQL_DATABASE', 'itil_app')}"
+        ),
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+        'UPLOAD_FOLDER': UPLOAD_FOLDER,
+        # Rattacher automatiquement un nouvel incident au problème de ses incidents similaires
+        'INCIDENT_AUTO_LINK': os.getenv('INCIDENT_AUTO_LINK', '').lower() in ('1', 'true', 'yes'),
+        # Threads d'exécution des tâches d'arrière-plan par processus (0 : pas d'exécution ici)
+        'JOB_WORKERS': int(os.getenv('JOB_WORKERS', '2')),
+        # Compression gzip/brotli des réponses (à désactiver si un proxy s'en charge déjà)
+        'COMPRESSION': os.getenv('HTTP_COMPRESSION', '1').lower() in ('1', 'true', 'yes'),
+        'COMPRESSION_MIN_SIZE': int(os.getenv('HTTP_COMPRESSION_MIN_SIZE', '1024')),
+        # Flux /api/live ouverts en même temps par processus (chacun occupe un thread)
+        'LIVE_MAX_STREAMS': int(os.getenv('LIVE_MAX_STREAMS', '100')),
+    }
+    # Pool de connexions : à dimensionner sur le nombre de threads d'un worker
+    config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '5')),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '10')),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '3600')),
+        'pool_pre_ping': True,
+    }
+    return config
+
+def create_app(config=None):
+    """Fabrique de l'application : configuration puis initialisation des extensions
+
+    Les extensions ne sont liées qu'une fois : les appels suivants retournent
+    l'application déjà configurée.
+    """
+    if 'sqlalchemy' in app.extensions:
+        return app
+    app.config.update(default_config())
+    if config:
+        app.config.update(config)
+    if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        # SQLite n'utilise pas de pool dimensionnable
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {}
+    db.init_app(app)
+    login_manager.init_app(app)
+    if app.config.get('MIGRATIONS_CLI', True):
+        # Flask-Migrate charge Alembic (~150 ms) : inutile pour servir des requêtes
+        from flask_migrate import Migrate
+        Migrate(app, db)
+    return app
 
 # Enums
 class Priority(enum.Enum):
@@ -85,9 +165,20 @@ class Attachment(db.Model):
     file_path = db.Column(db.String(512), nullable=False)
     article_id = db.Column(db.Integer, db.ForeignKey("knowledge_articles.id"))
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Empreinte du contenu dans le stockage dédupliqué (NULL pour les anciens fichiers)
+    sha256 = db.Column(db.String(64), index=True)
+    size = db.Column(db.BigInteger)
     
     article = db.relationship("KnowledgeArticle", back_populates="attachments")
 
+class Blob(db.Model):
+    __tablename__ = "blobs"
+    
+    sha256 = db.Column(db.String(64), primary_key=True)
+    size = db.Column(db.BigInteger, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
 # Tables de liaison
 article_tags = db.Table('article_tags',
     db.Column('article_id', db.Integer, db.ForeignKey('knowledge_articles.id')),
@@ -121,14 +212,20 @@ class User(UserMixin, db.Model):
 
 class Incident(db.Model):
     __tablename__ = "incidents"
+    # Filtres des listes (statut, priorité, problème) suivis du tri par date de création
+    __table_args__ = (
+        db.Index('ix_incidents_status_created_at', 'status', 'created_at'),
+        db.Index('ix_incidents_priority_created_at', 'priority', 'created_at'),
+        db.Index('ix_incidents_problem_id_created_at', 'problem_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True, index=True)
     title = db.Column(db.String(255), index=True)
     description = db.Column(db.Text)
     priority = db.Column(db.Enum(Priority))
     status = db.Column(db.Enum(Status), default=Status.OPEN)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # Champs du post-mortem
     owner = db.Column(db.String(255))
@@ -159,46 +256,1589 @@ class Incident(db.Model):
     lessons_learned = db.Column(db.Text)
     
     # Relations
-    assigned_to_id = db.Column(db.Integer, db.ForeignKey("users.id"))
+    assigned_to_id = db.Column(db.Integer, db.ForeignKey("users.id"), index=True)
     assigned_to = db.relationship("User", back_populates="incidents")
     problem_id = db.Column(db.Integer, db.ForeignKey("problems.id"), nullable=True)
     problem = db.relationship("Problem", back_populates="incidents")
     knowledge_articles = db.relationship("KnowledgeArticle", secondary="article_incidents", back_populates="related_incidents")
+    # Analyse normalisée, tenue à jour à partir de why1..why5 (voir _sync_incident_analyses)
+    analysis = db.relationship("RootCauseAnalysis", back_populates="incident", uselist=False, cascade="all, delete-orphan")
 
 class Problem(db.Model):
     __tablename__ = "problems"
+    __table_args__ = (db.Index('ix_problems_status_created_at', 'status', 'created_at'),)
     
     id = db.Column(db.Integer, primary_key=True, index=True)
     title = db.Column(db.String(255), index=True)
     description = db.Column(db.Text)
     root_cause = db.Column(db.Text)
     status = db.Column(db.Enum(Status), default=Status.OPEN)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    assigned_to_id = db.Column(db.Integer, db.ForeignKey("users.id"))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    assigned_to_id = db.Column(db.Integer, db.ForeignKey("users.id"), index=True)
+    # Référence dans l'outil d'origine ("source:id") : un import rejoué ne crée pas de doublon
+    external_ref = db.Column(db.String(191), unique=True, index=True)
     assigned_to = db.relationship("User", back_populates="problems")
     incidents = db.relationship("Incident", back_populates="problem")
     knowledge_articles = db.relationship("KnowledgeArticle", secondary="article_problems", back_populates="related_problems")
+    analysis = db.relationship("RootCauseAnalysis", back_populates="problem", uselist=False, cascade="all, delete-orphan")
+
+# Analyse des causes racines (5 pourquoi et solutions), commune aux problèmes et aux incidents
+class RootCauseAnalysis(db.Model):
+    __tablename__ = "root_cause_analyses"
+    __table_args__ = (db.Index('ix_root_cause_analyses_domain_severity', 'domain', 'severity'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    problem_id = db.Column(db.Integer, db.ForeignKey("problems.id"), unique=True)
+    incident_id = db.Column(db.Integer, db.ForeignKey("incidents.id"), unique=True)
+    root_cause = db.Column(db.Text)
+    # Déduits du texte par ProblemAnalyzer.classify
+    domain = db.Column(db.String(50))
+    severity = db.Column(db.String(20), index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    problem = db.relationship("Problem", back_populates="analysis")
+    incident = db.relationship("Incident", back_populates="analysis")
+    whys = db.relationship("RcaWhy", order_by="RcaWhy.position", cascade="all, delete-orphan")
+    solutions = db.relationship("RcaSolution", order_by="RcaSolution.position", cascade="all, delete-orphan")
+
+class RcaWhy(db.Model):
+    __tablename__ = "rca_whys"
+    __table_args__ = (db.UniqueConstraint('analysis_id', 'position', name='uq_rca_whys_position'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    analysis_id = db.Column(db.Integer, db.ForeignKey("root_cause_analyses.id"), nullable=False)
+    position = db.Column(db.SmallInteger, nullable=False)  # 1 à 5
+    text = db.Column(db.Text, nullable=False)
+
+class RcaSolution(db.Model):
+    __tablename__ = "rca_solutions"
+    __table_args__ = (db.UniqueConstraint('analysis_id', 'position', name='uq_rca_solutions_position'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    analysis_id = db.Column(db.Integer, db.ForeignKey("root_cause_analyses.id"), nullable=False)
+    position = db.Column(db.SmallInteger, nullable=False)
+    text = db.Column(db.Text, nullable=False)
+
+# Tables de compteurs du tableau de bord, maintenues à chaque écriture
+class StatusRollup(db.Model):
+    __tablename__ = "status_rollups"
+
+    entity = db.Column(db.String(20), primary_key=True)  # 'incident' ou 'problem'
+    status = db.Column(db.String(20), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+class MonthlyRollup(db.Model):
+    __tablename__ = "monthly_rollups"
+
+    entity = db.Column(db.String(20), primary_key=True)
+    month = db.Column(db.String(7), primary_key=True)  # 'YYYY-MM'
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+# File des tâches d'arrière-plan
+class Job(db.Model):
+    __tablename__ = "jobs"
+    __table_args__ = (db.Index('ix_jobs_claim', 'status', 'priority', 'run_at'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.Text)  # arguments, en JSON
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, succeeded, failed
+    priority = db.Column(db.Integer, nullable=False, default=100)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    dedupe_key = db.Column(db.String(255), index=True)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = db.Column(db.String(100))
+    locked_at = db.Column(db.DateTime)
+    result = db.Column(db.Text)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+# Points de reprise des imports en masse : enregistrements déjà traités par source
+class ImportCheckpoint(db.Model):
+    __tablename__ = "import_checkpoints"
+
+    source = db.Column(db.String(100), primary_key=True)
+    records = db.Column(db.Integer, nullable=False, default=0)  # enregistrements lus (insérés, déjà présents ou rejetés)
+    inserted = db.Column(db.Integer, nullable=False, default=0)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+# Profils de chargement des vues : les relations affichées sont chargées en une requête
+# au lieu d'un aller-retour MySQL par ligne (N+1)
+KNOWLEDGE_LIST_LOADING = (joinedload(KnowledgeArticle.author), selectinload(KnowledgeArticle.tags))
+KNOWLEDGE_DETAIL_LOADING = (
+    joinedload(KnowledgeArticle.author),
+    selectinload(KnowledgeArticle.tags),
+    selectinload(KnowledgeArticle.attachments),
+    selectinload(KnowledgeArticle.related_incidents),
+    selectinload(KnowledgeArticle.related_problems),
+)
+
+# Métriques de performance exportées sur /metrics (une série par processus)
+metrics = Registry()
+http_requests = metrics.counter(
+    'itil_http_requests_total', 'Requêtes HTTP traitées', ('endpoint', 'method', 'status'))
+http_latency = metrics.histogram(
+    'itil_http_request_duration_seconds', 'Durée de traitement des requêtes HTTP', ('endpoint', 'method'))
+http_response_size = metrics.histogram(
+    'itil_http_response_size_bytes', 'Taille des réponses HTTP', ('endpoint',), buckets=SIZE_BUCKETS)
+sql_queries = metrics.histogram(
+    'itil_sql_queries_per_request', 'Nombre de requêtes SQL par requête HTTP', ('endpoint',), buckets=COUNT_BUCKETS)
+sql_duration = metrics.histogram(
+    'itil_sql_duration_seconds_per_request', 'Temps passé en SQL par requête HTTP', ('endpoint',))
+db_pool_wait = metrics.histogram(
+    'itil_db_pool_wait_seconds', "Attente d'une connexion du pool SQLAlchemy",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0))
+
+def _pool_gauge(method):
+    def collect():
+        value = getattr(db.engine.pool, method, None)
+        return [((), value())] if callable(value) else []
+    return collect
+
+metrics.gauge('itil_db_pool_size', 'Taille nominale du pool de connexions', collect=_pool_gauge('size'))
+metrics.gauge('itil_db_pool_checked_out', 'Connexions actuellement empruntées', collect=_pool_gauge('checkedout'))
+metrics.gauge('itil_db_pool_checked_in', 'Connexions disponibles dans le pool', collect=_pool_gauge('checkedin'))
+metrics.gauge('itil_db_pool_overflow', 'Connexions ouvertes au-delà de la taille du pool', collect=_pool_gauge('overflow'))
+
+def _cache_stat(key):
+    return lambda: [((name,), cache.stats()[key]) for name, cache in (('users', user_cache), ('tags', tag_cache), ('fragments', fragment_cache))]
+
+metrics.gauge('itil_cache_hits_total', 'Succès des caches en mémoire', ('cache',), collect=_cache_stat('hits'), kind='counter')
+metrics.gauge('itil_cache_misses_total', 'Échecs des caches en mémoire', ('cache',), collect=_cache_stat('misses'), kind='counter')
+metrics.gauge('itil_cache_size', 'Entrées présentes dans les caches en mémoire', ('cache',), collect=_cache_stat('size'))
+
+def _instrument_pool(pool):
+    """Chronomètre l'obtention d'une connexion : SQLAlchemy n'a pas d'événement avant l'attente"""
+    if getattr(pool, '_itil_wait_instrumented', False):
+        return
+    connect = pool.connect
+
+    def timed_connect():
+        started = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            db_pool_wait.observe(time.perf_counter() - started)
+
+    pool.connect = timed_connect
+    pool._itil_wait_instrumented = True
+
+# Comptage des requêtes SQL par requête HTTP
+@app.before_request
+def _start_query_counter():
+    g.request_started = time.perf_counter()
+    _instrument_pool(db.engine.pool)
+    g.query_counter = QueryCounter(record=app.debug or app.testing).start()
+
+@app.after_request
+def _report_query_count(response):
+    counter = g.get('query_counter')
+    if counter is not None and (app.debug or app.testing):
+        response.headers['X-SQL-Queries'] = str(counter.count)
+    endpoint = request.endpoint or 'inconnu'
+    if endpoint != 'metrics_endpoint' and 'request_started' in g:
+        http_requests.inc(endpoint, request.method, str(response.status_code))
+        http_latency.observe(time.perf_counter() - g.request_started, endpoint, request.method)
+        if not response.is_streamed and response.content_length is not None:
+            http_response_size.observe(response.content_length, endpoint)
+        if counter is not None:
+            sql_queries.observe(counter.count, endpoint)
+            sql_duration.observe(counter.duration, endpoint)
+    return response
+
+# Compression négociée (Accept-Encoding) ; enregistrée après le comptage pour que
+# les métriques voient la taille réellement envoyée
+@app.after_request
+def _compress_response(response):
+    if not app.config.get('COMPRESSION', True) or request.method == 'HEAD' \
+            or response.status_code < 200 or response.status_code in (204, 206, 304) \
+            or response.direct_passthrough or 'Content-Encoding' in response.headers \
+            or response.mimetype not in COMPRESSIBLE_TYPES:
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate(request.accept_encodings)
+    if encoding is None:
+        return response
+    if response.is_streamed:
+        response.response = compress_stream(response.iter_encoded(), encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < app.config.get('COMPRESSION_MIN_SIZE', 1024):
+            return response
+        response.set_data(compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    # Le contenu envoyé diffère selon l'encodage : l'ETag devient faible
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+@app.teardown_request
+def _stop_query_counter(exc):
+    counter = g.pop('query_counter', None)
+    if counter is not None:
+        counter.stop()
+
+def query_budget(max_queries, methods=None):
+    """Fixe le nombre maximal de requêtes SQL d'une vue
+
+    En test (ou avec QUERY_BUDGET_STRICT) un dépassement lève QueryBudgetExceeded,
+    sinon il est seulement journalisé. `methods` limite le budget à certaines
+    méthodes HTTP (par exemple la lecture d'une vue qui traite aussi des formulaires).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if methods is not None and request.method not in methods:
+                return view(*args, **kwargs)
+            result = view(*args, **kwargs)
+            counter = g.get('query_counter')
+            if counter is not None and counter.count > max_queries:
+                error = QueryBudgetExceeded(request.endpoint, counter.count, max_queries, counter.statements)
+                if app.config.get('QUERY_BUDGET_STRICT', app.testing):
+                    raise error
+                app.logger.warning(str(error))
+            return result
+        wrapper.query_budget = max_queries
+        return wrapper
+    return decorator
+
+# Requêtes conditionnelles : un client qui a déjà la bonne version reçoit 304
+def conditional(version, per_row=True):
+    """Répond 304 Not Modified sans exécuter la vue quand la ressource n'a pas changé
+
+    `version(**kwargs)` lit en une requête légère la date de dernière
+    modification et ce qui identifie l'état de la ressource, et retourne
+    (last_modified, éléments) ou None (la vue répond alors elle-même, en 404 le
+    plus souvent). L'ETag combine ces éléments avec l'URL, l'en-tête Accept et
+    l'utilisateur connecté, dont dépendent les pages HTML. If-Modified-Since
+    seul n'est pris en compte que pour une ligne (`per_row`) : sur une liste, la
+    date la plus récente ne reflète pas les suppressions.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Un message flash en attente doit être affiché : la page est regénérée
+            if request.method not in ('GET', 'HEAD') or session.get('_flashes'):
+                return view(*args, **kwargs)
+            current = version(*args, **kwargs)
+            if current is None:
+                return view(*args, **kwargs)
+            last_modified, parts = current
+            key = repr((parts, request.full_path, request.headers.get('Accept', ''), current_user.get_id()))
+            etag = hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]
+            if request.if_none_match:
+                unmodified = request.if_none_match.contains_weak(etag)
+            else:
+                since = request.if_modified_since
+                unmodified = bool(per_row and since and last_modified and
+                                  last_modified.replace(microsecond=0, tzinfo=timezone.utc) <= since)
+            if unmodified:
+                response = app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            if last_modified:
+                response.last_modified = last_modified.replace(tzinfo=timezone.utc)
+            # Le navigateur garde la page mais la revalide à chaque affichage
+            response.headers['Cache-Control'] = 'private, no-cache'
+            response.vary.update(('Accept', 'Cookie'))
+            return response
+        return wrapper
+    return decorator
+
+def table_version(model, entity):
+    """Version d'une liste : dernière modification et nombre de lignes (compteurs du tableau de bord)"""
+    def version(*args, **kwargs):
+        count = db.select(func.coalesce(func.sum(StatusRollup.count), 0)) \
+            .where(StatusRollup.entity == entity).scalar_subquery()
+        last_modified, rows = db.session.query(func.max(model.updated_at), count).one()
+        return last_modified, (entity, last_modified, rows)
+    return version
+
+def row_version(model):
+    """Version d'une ligne : sa date de mise à jour, lue par clé primaire"""
+    def version(id):
+        row = db.session.query(model.updated_at).filter(model.id == id).first()
+        if row is None:
+            return None
+        return row[0], (model.__tablename__, id, row[0])
+    return version
+
+# Listes paginées : seules les lignes de la page sont lues, et chaque ligne
+# n'est rendue qu'une fois par version (id, updated_at)
+fragment_cache = FragmentCache(maxsize=5000)
+INCIDENT_PER_PAGE = (25, 50, 100)
+INCIDENT_SORTS = {
+    'recent': ('Plus récents', (Incident.created_at.desc(), Incident.id.desc())),
+    'oldest': ('Plus anciens', (Incident.created_at.asc(), Incident.id.asc())),
+    'updated': ('Dernière modification', (Incident.updated_at.desc(), Incident.id.desc())),
+    'priority': ('Priorité', (Incident.priority.asc(), Incident.created_at.desc(), Incident.id.desc())),
+    'status': ('Statut', (Incident.status.asc(), Incident.created_at.desc(), Incident.id.desc())),
+    'title': ('Titre', (Incident.title.asc(), Incident.id.asc())),
+}
+KNOWLEDGE_PER_PAGE = (24, 48, 96)
+KNOWLEDGE_SORTS = {
+    'relevance': ('Pertinence', None),  # ordre du moteur de recherche, avec q uniquement
+    'recent': ('Plus récents', (KnowledgeArticle.created_at.desc(), KnowledgeArticle.id.desc())),
+    'updated': ('Dernière modification', (KnowledgeArticle.updated_at.desc(), KnowledgeArticle.id.desc())),
+    'title': ('Titre', (KnowledgeArticle.title.asc(), KnowledgeArticle.id.asc())),
+}
+KNOWLEDGE_CATEGORIES = ('Infrastructure', 'Applications', 'Sécurité', 'Procédures', 'FAQ')
+KNOWLEDGE_SEARCH_LIMIT = 200  # résultats du moteur de recherche paginables
+
+def list_arguments(sorts, default_sort, per_page_choices, **choices):
+    """Lit la page, la taille de page, le tri, la recherche q et les filtres de la requête
+
+    `choices` donne, pour chaque filtre, les valeurs acceptées (None : toutes).
+    Retourne (page, filtres) ; filtres['links'] ne garde que ce qui s'écarte
+    des valeurs par défaut, pour construire les liens de pagination.
+    """
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = request.args.get('per_page', per_page_choices[0], type=int)
+    if per_page not in per_page_choices:
+        per_page = per_page_choices[0]
+    sort = request.args.get('sort', default_sort)
+    if sort not in sorts:
+        sort = default_sort
+    filters = {'q': request.args.get('q', '').strip()}
+    for name, accepted in choices.items():
+        value = request.args.get(name, '').strip()
+        filters[name] = value if accepted is None or value in accepted else ''
+    links = {name: value for name, value in filters.items() if value}
+    if sort != default_sort:
+        links['sort'] = sort
+    if per_page != per_page_choices[0]:
+        links['per_page'] = per_page
+    filters.update(sort=sort, per_page=per_page, links=links)
+    return page, filters
+
+def render_incident_fragments(incident):
+    return (get_template_attribute('_incident_fragments.html', 'row')(incident),
+            get_template_attribute('_incident_fragments.html', 'edit_modal')(incident))
+
+def render_article_fragment(article):
+    return get_template_attribute('_knowledge_fragments.html', 'card')(article)
+
+# Moteur de recherche plein texte des articles de connaissance
+search_index = SearchIndex()
+SEARCH_SYNC_INTERVAL = 5  # secondes entre deux vérifications de fraîcheur de l'index
+SEARCH_MAX_RESULTS = 50
+_search_state = {'synced_at': 0.0, 'watermark': None, 'count': 0}
+
+def _article_tag_names(article_ids=None):
+    """Retourne un dictionnaire article_id -> noms des tags, en une seule requête"""
+    query = db.session.query(article_tags.c.article_id, Tag.name).join(Tag, Tag.id == article_tags.c.tag_id)
+    if article_ids is not None:
+        query = query.filter(article_tags.c.article_id.in_(article_ids))
+    tags = {}
+    for article_id, name in query:
+        tags.setdefault(article_id, []).append(name)
+    return tags
+
+def _index_article_rows(rows, tags):
+    for article_id, title, content in rows:
+        search_index.add(article_id, title or '', content or '', tags.get(article_id, []))
+
+def _search_index_stamp():
+    return db.session.query(func.count(KnowledgeArticle.id), func.max(KnowledgeArticle.updated_at)).one()
+
+def build_search_index():
+    """Construit l'index complet à partir de la base de données"""
+    search_index.clear()
+    count, watermark = _search_index_stamp()
+    tags = _article_tag_names()
+    rows = db.session.query(
+        KnowledgeArticle.id, KnowledgeArticle.title, KnowledgeArticle.content
+    ).execution_options(yield_per=1000)
+    _index_article_rows(rows, tags)
+    search_index.ready = True
+    _search_state.update(synced_at=time.monotonic(), watermark=watermark, count=count)
+
+def ensure_search_index():
+    """Construit l'index au premier usage puis rattrape les modifications faites par d'autres processus"""
+    if not search_index.ready:
+        build_search_index()
+        return
+    if time.monotonic() - _search_state['synced_at'] < SEARCH_SYNC_INTERVAL:
+        return
+    count, watermark = _search_index_stamp()
+    if watermark != _search_state['watermark'] and watermark is not None:
+        query = db.session.query(KnowledgeArticle.id, KnowledgeArticle.title, KnowledgeArticle.content)
+        if _search_state['watermark'] is not None:
+            query = query.filter(KnowledgeArticle.updated_at >= _search_state['watermark'])
+        rows = query.all()
+        _index_article_rows(rows, _article_tag_names([row[0] for row in rows]))
+    if count != len(search_index):
+        # Des articles ont été supprimés ailleurs : on repart de zéro
+        build_search_index()
+        return
+    _search_state.update(synced_at=time.monotonic(), watermark=watermark, count=count)
+
+@event.listens_for(Session, 'after_flush')
+def _collect_article_changes(session, flush_context):
+    pending = session.info.setdefault('search_pending', {})
+    for obj in session.new | session.dirty:
+        if isinstance(obj, KnowledgeArticle):
+            pending[obj.id] = (obj.title or '', obj.content or '', [tag.name for tag in obj.tags])
+    for obj in session.deleted:
+        if isinstance(obj, KnowledgeArticle):
+            pending[obj.id] = None
+
+@event.listens_for(Session, 'after_commit')
+def _apply_article_changes(session):
+    pending = session.info.pop('search_pending', None)
+    if not pending or not search_index.ready:
+        return
+    for article_id, doc in pending.items():
+        if doc is None:
+            search_index.remove(article_id)
+        else:
+            search_index.add(article_id, *doc)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_article_changes(session):
+    session.info.pop('search_pending', None)
+
+def search_articles(query, limit=SEARCH_MAX_RESULTS, prefix=False):
+    """Recherche les articles via l'index et les renvoie dans l'ordre de pertinence"""
+    ensure_search_index()
+    ids = [article_id for article_id, _ in search_index.search(query, limit=limit, prefix=prefix)]
+    if not ids:
+        return []
+    articles = KnowledgeArticle.query.options(*KNOWLEDGE_LIST_LOADING).filter(KnowledgeArticle.id.in_(ids)).all()
+    by_id = {article.id: article for article in articles}
+    return [by_id[article_id] for article_id in ids if article_id in by_id]
+
+# Saisie semi-automatique des titres (articles et incidents) : arbre de préfixes en mémoire
+TITLE_SUGGEST_LIMIT = 5
+TITLE_SYNC_INTERVAL = 5  # secondes entre deux vérifications de fraîcheur des index
+TITLE_EXCERPT_LENGTH = 120
+# Avance donnée au classement, en jours d'ancienneté : un article critique d'il y a deux
+# mois passe devant un article ordinaire d'hier
+ARTICLE_IMPORTANCE_DAYS = {'LOW': 0, 'MEDIUM': 7, 'HIGH': 30, 'CRITICAL': 90}
+INCIDENT_PRIORITY_DAYS = {Priority.P1: 30, Priority.P2: 7, Priority.P3: 0}
+title_indexes = {'article': PrefixIndex(), 'incident': PrefixIndex()}
+_title_state = {kind: {'synced_at': 0.0, 'watermark': None} for kind in title_indexes}
+suggest_calls = Coalescer()
+
+def _suggest_score(updated_at, bonus_days):
+    return (updated_at or datetime(1970, 1, 1)).replace(tzinfo=timezone.utc).timestamp() + bonus_days * 86400
+
+def _article_suggestion(article_id, title, content, importance, updated_at):
+    content = content or ''
+    return (title or '', _suggest_score(updated_at, ARTICLE_IMPORTANCE_DAYS.get(importance, 0)), {
+        'id': article_id,
+        'title': title,
+        'content': content[:TITLE_EXCERPT_LENGTH] + ('...' if len(content) > TITLE_EXCERPT_LENGTH else ''),
+    })
+
+def _incident_suggestion(incident_id, title, priority, status, updated_at):
+    return (title or '', _suggest_score(updated_at, INCIDENT_PRIORITY_DAYS.get(priority, 0)), {
+        'id': incident_id,
+        'title': title,
+        'priority': priority.value if priority else None,
+        'status': status.value if status else None,
+    })
+
+# Par index : modèle, colonnes lues et construction de la suggestion
+TITLE_SOURCES = {
+    'article': (KnowledgeArticle, (KnowledgeArticle.id, KnowledgeArticle.title,
+                                   func.substr(KnowledgeArticle.content, 1, TITLE_EXCERPT_LENGTH + 1),
+                                   KnowledgeArticle.importance, KnowledgeArticle.updated_at), _article_suggestion),
+    'incident': (Incident, (Incident.id, Incident.title, Incident.priority, Incident.status, Incident.updated_at),
+                 _incident_suggestion),
+}
+
+def build_title_index(kind):
+    """Construit l'index des titres d'un type de document à partir de la base"""
+    model, columns, suggestion = TITLE_SOURCES[kind]
+    index = title_indexes[kind]
+    index.clear()
+    count, watermark = db.session.query(func.count(model.id), func.max(model.updated_at)).one()
+    for row in db.session.query(*columns).execution_options(yield_per=2000):
+        index.add(row[0], *suggestion(*row))
+    index.ready = True
+    _title_state[kind].update(synced_at=time.monotonic(), watermark=watermark)
+
+def ensure_title_index(kind):
+    """Construit l'index au premier usage puis rattrape les modifications faites par d'autres processus"""
+    index = title_indexes[kind]
+    if not index.ready:
+        build_title_index(kind)
+        return
+    state = _title_state[kind]
+    if time.monotonic() - state['synced_at'] < TITLE_SYNC_INTERVAL:
+        return
+    model, columns, suggestion = TITLE_SOURCES[kind]
+    count, watermark = db.session.query(func.count(model.id), func.max(model.updated_at)).one()
+    if watermark != state['watermark'] and watermark is not None:
+        query = db.session.query(*columns)
+        if state['watermark'] is not None:
+            query = query.filter(model.updated_at >= state['watermark'])
+        for row in query:
+            index.add(row[0], *suggestion(*row))
+    if count != len(index):
+        # Des lignes ont été supprimées ailleurs : on repart de zéro
+        build_title_index(kind)
+        return
+    state.update(synced_at=time.monotonic(), watermark=watermark)
+
+@event.listens_for(Session, 'after_flush')
+def _collect_title_changes(session, flush_context):
+    pending = session.info.setdefault('titles_pending', {})
+    for obj in session.new | session.dirty:
+        if isinstance(obj, KnowledgeArticle):
+            pending[('article', obj.id)] = _article_suggestion(obj.id, obj.title, obj.content, obj.importance,
+                                                               obj.updated_at)
+        elif isinstance(obj, Incident):
+            pending[('incident', obj.id)] = _incident_suggestion(obj.id, obj.title, obj.priority, obj.status,
+                                                                 obj.updated_at)
+    for obj in session.deleted:
+        if isinstance(obj, KnowledgeArticle):
+            pending[('article', obj.id)] = None
+        elif isinstance(obj, Incident):
+            pending[('incident', obj.id)] = None
+
+@event.listens_for(Session, 'after_commit')
+def _apply_title_changes(session):
+    pending = session.info.pop('titles_pending', None)
+    for (kind, doc_id), suggestion in (pending or {}).items():
+        index = title_indexes[kind]
+        if not index.ready:
+            continue
+        if suggestion is None:
+            index.remove(doc_id)
+        else:
+            index.add(doc_id, *suggestion)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_title_changes(session):
+    session.info.pop('titles_pending', None)
+
+def suggest_limit():
+    return max(1, min(request.args.get('limit', TITLE_SUGGEST_LIMIT, type=int), TOP_SIZE))
+
+def title_suggestions(kind, query, limit=TITLE_SUGGEST_LIMIT):
+    """Réponse JSON des suggestions de titres
+
+    Les saisies identiques en cours de traitement (même préfixe normalisé)
+    partagent un seul calcul et une seule sérialisation.
+    """
+    ensure_title_index(kind)
+    key = (kind, PrefixIndex.terms(query), limit)
+    return suggest_calls.run(key, lambda: app.json.dumps(title_indexes[kind].suggest(query, limit)))
+
+# Détection des incidents similaires (titre, description et 5 pourquoi)
+incident_index = MinHashIndex()
+SIMILARITY_SYNC_INTERVAL = 5
+SIMILARITY_MIN_SCORE = 0.3  # similarité estimée minimale pour qu'un incident soit proposé
+PROBLEM_LINK_MIN_CONFIDENCE = 0.6  # part du poids des voisins rattachés désignant le problème
+PROBLEM_LINK_MIN_SUPPORT = 2  # incidents similaires déjà rattachés à ce problème
+PROBLEM_LINK_MIN_SIMILARITY = 0.6  # similarité du plus proche de ces incidents
+PROBLEM_LINK_NEIGHBORS = 5  # nombre de plus proches voisins qui votent
+INCIDENT_TEXT_FIELDS = ('title', 'description', 'why1', 'why2', 'why3', 'why4', 'why5')
+_similarity_state = {'synced_at': 0.0, 'watermark': None}
+
+def incident_text(values):
+    """Texte d'un incident comparé par le moteur de similarité"""
+    return ' '.join(value for value in values if value)
+
+def _incident_text_query():
+    return db.session.query(Incident.id, *[getattr(Incident, field) for field in INCIDENT_TEXT_FIELDS])
+
+def _incident_similarity_stamp():
+    return db.session.query(func.count(Incident.id), func.max(Incident.updated_at)).one()
+
+def build_similarity_index():
+    """Calcule les signatures de tous les incidents"""
+    incident_index.clear()
+    count, watermark = _incident_similarity_stamp()
+    rows = _incident_text_query().execution_options(yield_per=2000)
+    incident_index.add_many((row[0], incident_text(row[1:])) for row in rows)
+    incident_index.ready = True
+    _similarity_state.update(synced_at=time.monotonic(), watermark=watermark)
+
+def ensure_similarity_index():
+    """Construit l'index au premier usage puis rattrape les modifications faites par d'autres processus"""
+    if not incident_index.ready:
+        build_similarity_index()
+        return
+    if time.monotonic() - _similarity_state['synced_at'] < SIMILARITY_SYNC_INTERVAL:
+        return
+    count, watermark = _incident_similarity_stamp()
+    if watermark != _similarity_state['watermark'] and watermark is not None:
+        query = _incident_text_query()
+        if _similarity_state['watermark'] is not None:
+            query = query.filter(Incident.updated_at >= _similarity_state['watermark'])
+        incident_index.add_many((row[0], incident_text(row[1:])) for row in query)
+    if count != len(incident_index):
+        # Des incidents ont été supprimés ailleurs : on repart de zéro
+        build_similarity_index()
+        return
+    _similarity_state.update(synced_at=time.monotonic(), watermark=watermark)
+
+@event.listens_for(Session, 'after_flush')
+def _collect_incident_changes(session, flush_context):
+    pending = session.info.setdefault('similarity_pending', {})
+    for obj in session.new | session.dirty:
+        if isinstance(obj, Incident):
+            pending[obj.id] = incident_text(getattr(obj, field) for field in INCIDENT_TEXT_FIELDS)
+    for obj in session.deleted:
+        if isinstance(obj, Incident):
+            pending[obj.id] = None
+
+@event.listens_for(Session, 'after_commit')
+def _apply_incident_changes(session):
+    pending = session.info.pop('similarity_pending', None)
+    if not pending or not incident_index.ready:
+        return
+    for incident_id, text in pending.items():
+        if text is None:
+            incident_index.remove(incident_id)
+    incident_index.add_many((incident_id, text) for incident_id, text in pending.items() if text is not None)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_incident_changes(session):
+    session.info.pop('similarity_pending', None)
+
+def suggest_problem(votes):
+    """Problème le plus représenté parmi des incidents similaires : votes = [(problem_id, similarité)]
+
+    Seuls les incidents déjà rattachés votent, chacun avec le carré de sa
+    similarité : quelques quasi-doublons l'emportent sur de nombreux incidents
+    vaguement proches.
+    """
+    weights, support, best_score = {}, {}, {}
+    for problem_id, score in votes:
+        if problem_id is not None:
+            weights[problem_id] = weights.get(problem_id, 0) + score * score
+            support[problem_id] = support.get(problem_id, 0) + 1
+            best_score[problem_id] = max(best_score.get(problem_id, 0), score)
+    if not weights:
+        return None
+    best = max(weights, key=weights.get)
+    return {
+        'problem_id': best,
+        'confidence': round(weights[best] / sum(weights.values()), 3),
+        'support': support[best],
+        'similarity': best_score[best],
+    }
+
+def problem_link_is_confident(suggestion, min_confidence=None):
+    """Vrai si la suggestion est assez sûre pour rattacher l'incident sans validation"""
+    if min_confidence is None:
+        min_confidence = PROBLEM_LINK_MIN_CONFIDENCE
+    return (suggestion is not None and suggestion['confidence'] >= min_confidence
+            and suggestion['support'] >= PROBLEM_LINK_MIN_SUPPORT
+            and suggestion['similarity'] >= PROBLEM_LINK_MIN_SIMILARITY)
+
+def similar_incidents(text, k=10, exclude=()):
+    """Incidents les plus proches d'un texte : ([(incident, similarité)], problème suggéré)"""
+    ensure_similarity_index()
+    matches = incident_index.similar(text, k=k, threshold=SIMILARITY_MIN_SCORE, exclude=exclude)
+    if not matches:
+        return [], None
+    by_id = {incident.id: incident for incident in Incident.query.filter(Incident.id.in_([m[0] for m in matches]))}
+    matches = [(by_id[incident_id], score) for incident_id, score in matches if incident_id in by_id]
+    votes = [(incident.problem_id, score) for incident, score in matches[:PROBLEM_LINK_NEIGHBORS]]
+    return matches, suggest_problem(votes)
+
+# Compteurs agrégés du tableau de bord
+ROLLUP_ENTITIES = {Incident: 'incident', Problem: 'problem'}
+
+def _status_key(value):
+    if isinstance(value, enum.Enum):
+        return value.name
+    return value or None
+
+def _month_key(value):
+    return value.strftime('%Y-%m') if value else None
+
+def _upsert_rollup(connection, table, keys, delta):
+    """Ajoute delta au compteur identifié par keys, en créant la ligne si besoin"""
+    dialect = connection.dialect.name
+    if dialect == 'mysql':
+        stmt = mysql_insert(table).values(count=delta, **keys)
+        stmt = stmt.on_duplicate_key_update(count=table.c.count + delta)
+    elif dialect == 'sqlite':
+        stmt = sqlite_insert(table).values(count=delta, **keys)
+        stmt = stmt.on_conflict_do_update(index_elements=list(keys), set_={'count': table.c.count + delta})
+    else:
+        where = db.and_(*(table.c[k] == v for k, v in keys.items()))
+        if connection.execute(table.update().where(where).values(count=table.c.count + delta)).rowcount:
+            return
+        stmt = table.insert().values(count=delta, **keys)
+    connection.execute(stmt)
+
+def apply_rollup_deltas(connection, status_deltas, month_deltas, session=None):
+    """Applique des variations de compteurs {(entité, clé): delta} dans la transaction courante
+
+    Avec `session`, les variations sont aussi diffusées en direct après le commit.
+    """
+    if session is not None:
+        pending = session.info.setdefault('live_counters', (Counter(), Counter()))
+        pending[0].update(status_deltas)
+        pending[1].update(month_deltas)
+    for (entity, status), delta in status_deltas.items():
+        if delta:
+            _upsert_rollup(connection, StatusRollup.__table__, {'entity': entity, 'status': status}, delta)
+    for (entity, month), delta in month_deltas.items():
+        if delta:
+            _upsert_rollup(connection, MonthlyRollup.__table__, {'entity': entity, 'month': month}, delta)
+
+def _keep_previous_status(target, value, oldvalue, initiator):
+    return value
+
+for _model in ROLLUP_ENTITIES:
+    # Charge l'ancien statut au moment de l'affectation pour que l'historique soit complet
+    event.listen(_model.status, 'set', _keep_previous_status, active_history=True, retval=True)
+
+@event.listens_for(Session, 'before_flush')
+def _update_rollups(session, flush_context, instances):
+    status_deltas, month_deltas = Counter(), Counter()
+    for obj in session.new:
+        entity = ROLLUP_ENTITIES.get(type(obj))
+        if entity:
+            # Valeurs par défaut appliquées dès maintenant pour compter la bonne case
+            if obj.status is None:
+                obj.status = Status.OPEN
+            if obj.created_at is None:
+                obj.created_at = datetime.utcnow()
+            status_deltas[(entity, _status_key(obj.status))] += 1
+            month_deltas[(entity, _month_key(obj.created_at))] += 1
+    for obj in session.dirty:
+        entity = ROLLUP_ENTITIES.get(type(obj))
+        if not entity or obj in session.deleted:
+            continue
+        history = sa_inspect(obj).attrs.status.history
+        if history.has_changes():
+            for old in history.deleted:
+                status_deltas[(entity, _status_key(old))] -= 1
+            for new in history.added:
+                status_deltas[(entity, _status_key(new))] += 1
+    for obj in session.deleted:
+        entity = ROLLUP_ENTITIES.get(type(obj))
+        if entity:
+            history = sa_inspect(obj).attrs.status.history
+            old_status = (history.deleted or history.unchanged or [obj.status])[0]
+            status_deltas[(entity, _status_key(old_status))] -= 1
+            month_deltas[(entity, _month_key(obj.created_at))] -= 1
+    status_deltas = {k: v for k, v in status_deltas.items() if k[1] is not None}
+    month_deltas = {k: v for k, v in month_deltas.items() if k[1] is not None}
+    if status_deltas or month_deltas:
+        apply_rollup_deltas(session.connection(), status_deltas, month_deltas, session)
+
+def rebuild_rollups():
+    """Recalcule entièrement les compteurs à partir des tables incidents et problèmes"""
+    StatusRollup.query.delete()
+    MonthlyRollup.query.delete()
+    for model, entity in ROLLUP_ENTITIES.items():
+        for status, count in db.session.query(model.status, func.count()).group_by(model.status):
+            if status is not None:
+                db.session.add(StatusRollup(entity=entity, status=_status_key(status), count=count))
+        year, month = func.extract('year', model.created_at), func.extract('month', model.created_at)
+        for y, m, count in db.session.query(year, month, func.count()).filter(model.created_at.isnot(None)).group_by(year, month):
+            db.session.add(MonthlyRollup(entity=entity, month=f"{int(y):04d}-{int(m):02d}", count=count))
+    db.session.commit()
+
+def rollup_status_counts(entity):
+    return {row.status: row.count for row in StatusRollup.query.filter_by(entity=entity) if row.count}
+
+def rollup_monthly_counts(entity, months=6):
+    rows = MonthlyRollup.query.filter(MonthlyRollup.entity == entity, MonthlyRollup.count > 0) \
+        .order_by(MonthlyRollup.month.desc()).limit(months).all()
+    return [{'date': row.month, 'count': row.count} for row in reversed(rows)]
+
+@app.cli.command('rebuild-rollups')
+def rebuild_rollups_command():
+    """Recalcule les compteurs du tableau de bord (backfill)"""
+    rebuild_rollups()
+    print("✅ Compteurs du tableau de bord recalculés")
+
+# Diffusion en direct (SSE) des changements d'incidents, de problèmes et des compteurs :
+# un événement par commit, partagé par tous les clients connectés au processus
+live_events = EventBroker(history=1000)
+LIVE_RETRY_MS = 3000  # délai de reconnexion indiqué au navigateur
+LIVE_KEEPALIVE = 15  # secondes sans événement avant un commentaire de maintien
+LIVE_STREAM_SECONDS = 300  # durée d'un flux : le navigateur se reconnecte ensuite avec Last-Event-ID
+LIVE_POLL_TIMEOUT = 25  # attente maximale d'un long-polling
+LIVE_MAX_STREAMS = 100  # au-delà (par processus), les clients passent au polling simple
+LIVE_SYNC_INTERVAL = 2  # secondes entre deux lectures des changements faits par les autres processus
+LIVE_SYNC_LIMIT = 200  # au-delà, les clients sont invités à recharger la liste
+_live_state = {'synced_at': 0.0, 'counters': None, 'watermarks': {}}
+_live_seen = LRUCache(maxsize=10000)  # (entité, id) -> updated_at déjà diffusé
+_live_sync_lock = threading.Lock()
+
+def _live_stamp(value):
+    # MySQL arrondit DATETIME à la seconde : même précision des deux côtés
+    return value.replace(microsecond=0) if value else None
+
+def live_row(entity, obj):
+    """Données diffusées pour un incident ou un problème : de quoi mettre sa ligne à jour"""
+    row = {
+        'id': obj.id,
+        'title': obj.title,
+        'status': _status_key(obj.status),
+        'updated_at': api_datetime(obj.updated_at),
+    }
+    if entity == 'incident':
+        row['priority'] = _status_key(obj.priority)
+    return row
+
+def note_live_bulk(session, entity, count):
+    """Signale des lignes insérées sans l'ORM (import en masse) : un seul événement par commit"""
+    if count:
+        session.info.setdefault('live_bulk', Counter())[entity] += count
+
+def _apply_live_counters(counters, status_deltas):
+    for (entity, status), delta in status_deltas.items():
+        by_status = counters.setdefault(entity, {})
+        by_status[status] = by_status.get(status, 0) + delta
+        if not by_status[status]:
+            del by_status[status]
+
+@event.listens_for(Session, 'after_flush')
+def _collect_live_changes(session, flush_context):
+    pending = session.info.setdefault('live_pending', {})
+    for objects, op in ((session.new, 'created'), (session.dirty, 'updated'), (session.deleted, 'deleted')):
+        for obj in objects:
+            entity = ROLLUP_ENTITIES.get(type(obj))
+            if entity is None or (op == 'updated' and (obj in session.deleted or not session.is_modified(obj))):
+                continue
+            key = (entity, obj.id)
+            previous = pending.get(key)
+            if op == 'deleted':
+                if previous and previous['op'] == 'created':
+                    del pending[key]  # créé puis supprimé dans la même transaction
+                else:
+                    pending[key] = {'op': 'deleted', 'id': obj.id}
+            else:
+                pending[key] = dict(live_row(entity, obj), op='created' if previous and previous['op'] == 'created' else op)
+                pending[key]['_stamp'] = _live_stamp(obj.updated_at)
+
+@event.listens_for(Session, 'after_commit')
+def _publish_live_changes(session):
+    rows = session.info.pop('live_pending', None)
+    bulk = session.info.pop('live_bulk', None)
+    counters = session.info.pop('live_counters', None)
+    for (entity, row_id), data in (rows or {}).items():
+        stamp = data.pop('_stamp', None)
+        if stamp is not None:
+            _live_seen.set((entity, row_id), stamp)
+        live_events.publish(entity, app.json.dumps(data))
+    for entity, count in (bulk or {}).items():
+        live_events.publish(entity, app.json.dumps({'op': 'bulk', 'count': count}))
+    if counters:
+        status_deltas = {key: delta for key, delta in counters[0].items() if delta}
+        month_deltas = {key: delta for key, delta in counters[1].items() if delta}
+        if status_deltas or month_deltas:
+            status, monthly = {}, {}
+            for (entity, key), delta in status_deltas.items():
+                status.setdefault(entity, {})[key] = delta
+            for (entity, key), delta in month_deltas.items():
+                monthly.setdefault(entity, {})[key] = delta
+            if _live_state['counters'] is not None:
+                _apply_live_counters(_live_state['counters'], status_deltas)
+            live_events.publish('counters', app.json.dumps({'status': status, 'monthly': monthly}))
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_live_changes(session):
+    for key in ('live_pending', 'live_bulk', 'live_counters'):
+        session.info.pop(key, None)
+
+def sync_live_events():
+    """Diffuse les changements faits par les autres processus (workers, commandes flask)
+
+    Au plus une lecture par LIVE_SYNC_INTERVAL et par processus, quel que soit le
+    nombre de clients : compteurs, puis lignes modifiées depuis la dernière lecture.
+    Les lignes déjà diffusées par ce processus sont reconnues par leur updated_at.
+    Les suppressions faites ailleurs ne se voient que dans les compteurs.
+    """
+    if time.monotonic() - _live_state['synced_at'] < LIVE_SYNC_INTERVAL \
+            or not _live_sync_lock.acquire(blocking=False):
+        return
+    try:
+        _live_state['synced_at'] = time.monotonic()
+        counters = {}
+        for entity, status, count in db.session.query(StatusRollup.entity, StatusRollup.status, StatusRollup.count):
+            if count:
+                counters.setdefault(entity, {})[status] = count
+        if _live_state['counters'] is not None and counters != _live_state['counters']:
+            live_events.publish('counters', app.json.dumps({'status': counters, 'absolute': True}))
+        _live_state['counters'] = counters
+
+        for model, entity in ROLLUP_ENTITIES.items():
+            watermark = _live_state['watermarks'].get(entity)
+            if watermark is None:
+                # Première lecture : rien à diffuser, les lignes les plus récentes sont déjà connues
+                latest = db.session.query(model.id, model.updated_at).order_by(model.updated_at.desc()) \
+                    .limit(LIVE_SYNC_LIMIT).all()
+                for row in latest:
+                    _live_seen.set((entity, row.id), _live_stamp(row.updated_at))
+                _live_state['watermarks'][entity] = latest[0].updated_at if latest else datetime(1970, 1, 1)
+                continue
+            columns = [model.id, model.title, model.status, model.created_at, model.updated_at]
+            if model is Incident:
+                columns.append(Incident.priority)
+            rows = db.session.query(*columns).filter(model.updated_at >= watermark) \
+                .order_by(model.updated_at, model.id).limit(LIVE_SYNC_LIMIT + 1).all()
+            if not rows:
+                continue
+            _live_state['watermarks'][entity] = rows[-1].updated_at
+            if len(rows) > LIVE_SYNC_LIMIT:
+                live_events.publish(entity, app.json.dumps({'op': 'reload'}))
+                continue
+            for row in rows:
+                stamp = _live_stamp(row.updated_at)
+                if _live_seen.get((entity, row.id)) == stamp:
+                    continue
+                _live_seen.set((entity, row.id), stamp)
+                op = 'created' if row.created_at and row.created_at >= watermark else 'updated'
+                live_events.publish(entity, app.json.dumps(dict(live_row(entity, row), op=op)))
+    finally:
+        # Pas de transaction gardée ouverte entre deux lectures (instantané figé sous MySQL)
+        db.session.remove()
+        _live_sync_lock.release()
+
+def _live_frame(kind, data, seq):
+    return f"id: {live_events.event_id(seq)}\nevent: {kind}\ndata: {app.json.dumps(data)}\n\n".encode('utf-8')
+
+def _live_start(last_event_id):
+    """Numéro à partir duquel servir un client, et trames à lui envoyer d'abord
+
+    Un identifiant d'un autre processus (ou aucun) repart du présent, avec
+    l'état connu des compteurs, sans requête.
+    """
+    start = live_events.parse_id(last_event_id)
+    if start is not None:
+        return start, []
+    start = live_events.last_seq
+    if _live_state['counters'] is None:
+        return start, []
+    return start, [('counters', {'status': _live_state['counters'], 'absolute': True})]
+
+@app.route('/api/live')
+@login_required
+def live_stream():
+    """Flux SSE des créations, modifications et suppressions, et des compteurs du tableau de bord"""
+    if live_events.subscribers >= app.config.get('LIVE_MAX_STREAMS', LIVE_MAX_STREAMS):
+        response = jsonify({'message': 'Trop de flux ouverts, utilisez /api/live/poll', 'poll': url_for('live_poll')})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(LIVE_POLL_TIMEOUT)
+        return response
+    start, initial = _live_start(request.headers.get('Last-Event-ID') or request.args.get('last_event_id'))
+    # La connexion est rendue au pool : le flux dure plusieurs minutes
+    db.session.remove()
+
+    def generate():
+        nonlocal start
+        with live_events.subscription():
+            yield f"retry: {LIVE_RETRY_MS}\n\n".encode('utf-8')
+            for kind, data in initial:
+                yield _live_frame(kind, data, start)
+            deadline = time.monotonic() + app.config.get('LIVE_STREAM_SECONDS', LIVE_STREAM_SECONDS)
+            last_sent = time.monotonic()
+            while time.monotonic() < deadline:
+                sync_live_events()
+                events = live_events.wait(start, timeout=LIVE_SYNC_INTERVAL)
+                if events is None:
+                    # Client trop en retard : il doit recharger ses données
+                    start = live_events.last_seq
+                    yield _live_frame('reset', {}, start)
+                elif events:
+                    start = events[-1][0]
+                    yield b''.join(frame for _, _, _, frame in events)
+                elif time.monotonic() - last_sent >= LIVE_KEEPALIVE:
+                    yield b': ping\n\n'
+                else:
+                    continue
+                last_sent = time.monotonic()
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/live/poll')
+@login_required
+def live_poll():
+    """Long-polling de secours : mêmes événements, en JSON
+
+    Attend au plus LIVE_POLL_TIMEOUT secondes ; si trop de clients attendent
+    déjà, répond tout de suite et indique au client quand revenir (`retry`).
+    """
+    start, initial = _live_start(request.args.get('last_event_id'))
+    db.session.remove()
+    busy = live_events.subscribers >= app.config.get('LIVE_MAX_STREAMS', LIVE_MAX_STREAMS)
+    reset = False
+    events = []
+    with live_events.subscription():
+        deadline = time.monotonic() + (0 if busy or initial else app.config.get('LIVE_POLL_TIMEOUT', LIVE_POLL_TIMEOUT))
+        while True:
+            sync_live_events()
+            events = live_events.wait(start, timeout=max(0, min(LIVE_SYNC_INTERVAL, deadline - time.monotonic())))
+            if events is None:
+                reset, events = True, []
+                start = live_events.last_seq
+                break
+            if events or time.monotonic() >= deadline:
+                break
+    items = [f'{{"id":"{live_events.event_id(start)}","event":"{kind}","data":{app.json.dumps(data)}}}'
+             for kind, data in initial]
+    items += [f'{{"id":"{live_events.event_id(seq)}","event":"{kind}","data":{data}}}' for seq, kind, data, _ in events]
+    last_seq = events[-1][0] if events else start
+    body = (f'{{"last_event_id":"{live_events.event_id(last_seq)}","reset":{"true" if reset else "false"},'
+            f'"retry":{LIVE_POLL_TIMEOUT if busy else 0},"events":[{",".join(items)}]}}')
+    return Response(body, mimetype='application/json', headers={'Cache-Control': 'no-cache'})
+
+# Analyses des causes racines : pourquoi et solutions en lignes ordonnées
+INCIDENT_WHY_FIELDS = tuple(f'why{n}' for n in range(1, WHY_COUNT + 1))
+
+def _set_steps(steps, model, texts):
+    """Met à jour une liste ordonnée (pourquoi ou solutions) ; les lignes gardent leur position"""
+    wanted = {position: text.strip() for position, text in enumerate(texts, 1) if text and text.strip()}
+    for step in list(steps):
+        if step.position in wanted:
+            step.text = wanted.pop(step.position)
+        else:
+            steps.remove(step)
+    for position, text in sorted(wanted.items()):
+        steps.append(model(position=position, text=text))
+
+def apply_analysis(analysis, whys, solutions=None, root_cause=None, context=None):
+    """Remplit une analyse ; sans cause racine explicite, c'est le dernier pourquoi renseigné"""
+    root_cause = (root_cause or '').strip() or last_why(whys)
+    analysis.root_cause = root_cause
+    analysis.domain, analysis.severity = classify_analysis(whys, root_cause, context)
+    _set_steps(analysis.whys, RcaWhy, whys)
+    if solutions is not None:
+        _set_steps(analysis.solutions, RcaSolution, solutions)
+    return analysis
+
+def _incident_context(title, description):
+    return ' '.join(part for part in (title, description) if part)
+
+@event.listens_for(Session, 'before_flush')
+def _sync_incident_analyses(session, flush_context, instances):
+    """Reporte why1..why5 des incidents créés ou modifiés dans leur analyse"""
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Incident) or obj in session.deleted:
+            continue
+        if obj not in session.new:
+            state = sa_inspect(obj)
+            if not any(state.attrs[field].history.has_changes() for field in INCIDENT_WHY_FIELDS):
+                continue
+        whys = [getattr(obj, field) for field in INCIDENT_WHY_FIELDS]
+        if obj.analysis is None:
+            if last_why(whys) is None:
+                continue
+            obj.analysis = RootCauseAnalysis()
+        apply_analysis(obj.analysis, whys, context=_incident_context(obj.title, obj.description))
+
+def insert_analyses(owner, items):
+    """Insère des analyses et leurs étapes en trois executemany (imports en masse)
+
+    owner : 'problem_id' ou 'incident_id' ; items : [(id, pourquoi, solutions, cause racine, contexte)].
+    """
+    if not items:
+        return 0
+    now = datetime.utcnow()
+    rows = []
+    for owner_id, whys, _, root_cause, context in items:
+        root_cause = (root_cause or '').strip() or last_why(whys)
+        domain, severity = classify_analysis(whys, root_cause, context)
+        rows.append({owner: owner_id, 'root_cause': root_cause, 'domain': domain, 'severity': severity,
+                     'created_at': now, 'updated_at': now})
+    db.session.execute(RootCauseAnalysis.__table__.insert(), rows)
+    column = getattr(RootCauseAnalysis, owner)
+    ids = dict(db.session.query(column, RootCauseAnalysis.id).filter(column.in_([item[0] for item in items])))
+    steps = {RcaWhy: [], RcaSolution: []}
+    for owner_id, whys, solutions, _, _ in items:
+        for model, texts in ((RcaWhy, whys), (RcaSolution, solutions)):
+            steps[model] += [{'analysis_id': ids[owner_id], 'position': position, 'text': text.strip()}
+                             for position, text in enumerate(texts, 1) if text and text.strip()]
+    for model, step_rows in steps.items():
+        if step_rows:
+            db.session.execute(model.__table__.insert(), step_rows)
+    return len(items)
+
+def analysis_data(analysis):
+    if analysis is None:
+        return None
+    return {
+        'root_cause': analysis.root_cause,
+        'domain': analysis.domain,
+        'severity': analysis.severity,
+        'whys': [{'position': why.position, 'text': why.text} for why in analysis.whys],
+        'solutions': [solution.text for solution in analysis.solutions],
+    }
+
+# Résolution des tags : un cache nom -> id évite une requête par tag
+TAG_CACHE_SIZE = 5000
+TAG_CACHE_TTL = 600  # secondes, filet de sécurité si un tag est supprimé par un autre processus
+TAG_NAME_MAX_LENGTH = 50
+tag_cache = LRUCache(maxsize=TAG_CACHE_SIZE, ttl=TAG_CACHE_TTL)
+
+def parse_tag_names(tags_str):
+    """Découpe une liste de tags séparés par des virgules, sans doublons"""
+    names = {}
+    for name in (tags_str or '').split(','):
+        name = name.strip()[:TAG_NAME_MAX_LENGTH]
+        # Même clé que la collation MySQL (insensible à la casse et aux accents)
+        if name and fold(name) not in names:
+            names[fold(name)] = name
+    return list(names.values())
+
+def _insert_missing_tags(connection, names):
+    table = Tag.__table__
+    rows = [{'name': name} for name in names]
+    dialect = connection.dialect.name
+    if dialect == 'mysql':
+        stmt = mysql_insert(table).on_duplicate_key_update(name=table.c.name)
+    elif dialect == 'sqlite':
+        stmt = sqlite_insert(table).on_conflict_do_nothing(index_elements=['name'])
+    else:
+        for row in rows:
+            with connection.begin_nested():
+                try:
+                    connection.execute(table.insert(), row)
+                except IntegrityError:
+                    pass
+        return
+    connection.execute(stmt, rows)
+
+def _select_tags(connection, names):
+    table = Tag.__table__
+    rows = connection.execute(db.select(table.c.id, table.c.name).where(table.c.name.in_(names)))
+    return {fold(name): (tag_id, name) for tag_id, name in rows}
+
+def resolve_tags(names):
+    """Retourne les objets Tag correspondant aux noms, en créant ceux qui manquent
+
+    Au plus une requête IN, un upsert groupé et une relecture, quel que soit le
+    nombre de tags. L'upsert est validé dans sa propre transaction : deux éditeurs
+    qui créent le même tag ne se gênent pas, et le cache ne contient que des tags
+    existants en base.
+    """
+    keys = {fold(name): name for name in names}
+    if not keys:
+        return []
+    resolved = tag_cache.get_many(keys)
+    missing = [key for key in keys if key not in resolved]
+    if missing:
+        with db.engine.begin() as connection:
+            found = _select_tags(connection, [keys[key] for key in missing])
+            to_create = [keys[key] for key in missing if key not in found]
+            if to_create:
+                _insert_missing_tags(connection, to_create)
+                found.update(_select_tags(connection, to_create))
+        tag_cache.set_many(found)
+        resolved.update(found)
+    tags = []
+    for key in keys:
+        tag_id, name = resolved[key]
+        tag = Tag(id=tag_id, name=name)
+        make_transient_to_detached(tag)
+        # Rattache le tag à la session sans SELECT
+        tags.append(db.session.merge(tag, load=False))
+    return tags
+
+@event.listens_for(Tag, 'after_update')
+@event.listens_for(Tag, 'after_delete')
+def _invalidate_tag_cache(mapper, connection, target):
+    tag_cache.clear()
+
+# Stockage des pièces jointes : un contenu identique n'est écrit qu'une fois
+def _add_blob_ref(connection, sha256, size):
+    table = Blob.__table__
+    values = {'sha256': sha256, 'size': size, 'ref_count': 1, 'created_at': datetime.utcnow()}
+    dialect = connection.dialect.name
+    if dialect == 'mysql':
+        stmt = mysql_insert(table).values(**values).on_duplicate_key_update(ref_count=table.c.ref_count + 1)
+    elif dialect == 'sqlite':
+        stmt = sqlite_insert(table).values(**values).on_conflict_do_update(
+            index_elements=['sha256'], set_={'ref_count': table.c.ref_count + 1})
+    else:
+        if connection.execute(table.update().where(table.c.sha256 == sha256)
+                              .values(ref_count=table.c.ref_count + 1)).rowcount:
+            return
+        stmt = table.insert().values(**values)
+    connection.execute(stmt)
+
+def store_attachment(file, **owner):
+    """Enregistre un fichier envoyé et retourne l'Attachment correspondant (non ajouté à la session)
+
+    Le fichier est lu par morceaux pendant le calcul de l'empreinte ; la
+    référence est comptée dans la transaction courante avant que le contenu
+    soit mis en place, ce qui le protège du ramasse-miettes.
+    """
+    sha256, size, tmp_path = blob_store.write_temp(file.stream)
+    try:
+        _add_blob_ref(db.session.connection(), sha256, size)
+        file_path = blob_store.commit(sha256, tmp_path)
+    except Exception:
+        blob_store.discard(tmp_path)
+        raise
+    return Attachment(
+        filename=secure_filename(file.filename),
+        file_path=file_path,
+        sha256=sha256,
+        size=size,
+        **owner
+    )
+
+def release_attachment(attachment):
+    """Supprime une pièce jointe ; retourne l'empreinte à passer au ramasse-miettes après commit"""
+    if attachment.sha256:
+        table = Blob.__table__
+        db.session.execute(table.update().where(table.c.sha256 == attachment.sha256)
+                           .values(ref_count=table.c.ref_count - 1))
+    else:
+        # Ancien fichier stocké directement sous static/uploads
+        try:
+            os.remove(attachment.file_path)
+        except OSError:
+            pass  # Ignorer les erreurs si le fichier n'existe pas
+    db.session.delete(attachment)
+    return attachment.sha256
+
+def collect_orphan_blobs(hashes=None):
+    """Supprime les contenus qui ne sont plus référencés par aucune pièce jointe
+
+    Sans liste d'empreintes, balaie aussi les fichiers sans ligne Blob
+    (voir collect_unreferenced_files).
+    """
+    query = Blob.query.filter(Blob.ref_count <= 0)
+    if hashes is not None:
+        hashes = [h for h in hashes if h]
+        if not hashes:
+            return 0
+        query = query.filter(Blob.sha256.in_(hashes))
+    # Le verrou empêche un envoi simultané du même contenu de reprendre une référence entre-temps
+    orphans = query.with_for_update().all()
+    for blob in orphans:
+        blob_store.delete(blob.sha256)
+        db.session.delete(blob)
+    db.session.commit()
+    if hashes is None:
+        return len(orphans) + collect_unreferenced_files()
+    return len(orphans)
+
+def collect_unreferenced_files(min_age=BLOB_ORPHAN_MIN_AGE):
+    """Supprime les fichiers restés sans ligne Blob (envoi dont la transaction a été annulée)
+
+    Le fichier est écrit avant le commit : seuls ceux qui n'ont pas bougé depuis
+    `min_age` secondes sont supprimés, pour ne pas toucher aux envois en cours
+    (un nouvel envoi d'un contenu déjà présent rajeunit le fichier).
+    """
+    deleted = 0
+    batch = []
+
+    def sweep(hashes):
+        known = {sha256 for sha256, in db.session.query(Blob.sha256).filter(Blob.sha256.in_(hashes))}
+        for sha256 in hashes:
+            if sha256 not in known:
+                blob_store.delete(sha256)
+        return len(hashes) - len(known)
+
+    for sha256 in blob_store.stored(min_age):
+        batch.append(sha256)
+        if len(batch) >= BLOB_SWEEP_BATCH:
+            deleted += sweep(batch)
+            batch = []
+    if batch:
+        deleted += sweep(batch)
+    return deleted
+
+@app.cli.command('gc-attachments')
+def gc_attachments_command():
+    """Supprime les contenus de pièces jointes orphelins"""
+    print(f"🗑️ {collect_orphan_blobs()} contenus orphelins supprimés")
+
+# Tâches d'arrière-plan
+# La table jobs est la file : chaque processus web (ou `flask run-jobs`) y réserve
+# des tâches par un UPDATE conditionnel, ce qui permet à plusieurs processus de la
+# partager sans verrou. Une tâche en échec est relancée plus tard (délai
+# exponentiel) jusqu'à max_attempts ; une tâche restée 'running' au-delà de
+# JOB_LEASE_SECONDS (processus tué) est remise dans la file.
+jobs = JobRegistry()
+job_runner = None
+_job_runner_lock = threading.Lock()
+JOB_POLL_INTERVAL = 2  # secondes entre deux consultations de la file vide
+JOB_LEASE_SECONDS = 900
+JOB_CLAIM_BATCH = 10
+_job_state = {'worker': None, 'recovered_at': 0.0}
+
+jobs_processed = metrics.counter(
+    'itil_jobs_total', "Tâches d'arrière-plan exécutées, par statut", ('job', 'status'))
+job_duration = metrics.histogram(
+    'itil_job_duration_seconds', "Durée d'exécution des tâches d'arrière-plan", ('job',))
+
+def enqueue_job(name, *args, priority=None, dedupe_key=None, delay=0):
+    """Ajoute une tâche à la file et retourne son Job
+
+    Avec `dedupe_key`, une tâche identique encore en attente (ou en cours) est
+    retournée au lieu d'en créer une nouvelle. La session est validée.
+    """
+    spec = jobs.get(name)
+    if spec is None:
+        raise LookupError(f"Tâche inconnue : {name}")
+    if dedupe_key:
+        existing = Job.query.filter(Job.dedupe_key == dedupe_key, Job.status.in_(('queued', 'running'))).first()
+        if existing is not None:
+            return existing
+    job = Job(
+        name=name,
+        payload=json.dumps(args),
+        priority=spec.priority if priority is None else priority,
+        max_attempts=spec.max_attempts,
+        dedupe_key=dedupe_key,
+        run_at=datetime.utcnow() + timedelta(seconds=delay),
+    )
+    db.session.add(job)
+    db.session.commit()
+    if job_runner is not None:
+        job_runner.wake()
+    return job
+
+def _recover_stale_jobs(now):
+    """Remet dans la file les tâches dont le processus a disparu"""
+    expired = now - timedelta(seconds=JOB_LEASE_SECONDS)
+    stale = (Job.status == 'running', Job.locked_at < expired)
+    db.session.execute(update(Job).where(*stale, Job.attempts >= Job.max_attempts)
+                       .values(status='failed', error="Abandonnée : délai d'exécution dépassé", finished_at=now))
+    db.session.execute(update(Job).where(*stale).values(status='queued', run_at=now, locked_by=None))
+    db.session.commit()
+
+def claim_job():
+    """Réserve la prochaine tâche prête (priorité puis ancienneté) ; retourne son id ou None"""
+    with app.app_context():
+        now = datetime.utcnow()
+        if time.monotonic() - _job_state['recovered_at'] > JOB_LEASE_SECONDS / 10:
+            _job_state['recovered_at'] = time.monotonic()
+            _recover_stale_jobs(now)
+        candidates = db.session.query(Job.id).filter(Job.status == 'queued', Job.run_at <= now) \
+            .order_by(Job.priority, Job.run_at, Job.id).limit(JOB_CLAIM_BATCH).all()
+        for (job_id,) in candidates:
+            # Un autre processus a pu la réserver entre-temps : seule la première mise à jour compte
+            claimed = db.session.execute(
+                update(Job).where(Job.id == job_id, Job.status == 'queued')
+                .values(status='running', locked_by=_job_state['worker'], locked_at=now, attempts=Job.attempts + 1)
+            ).rowcount
+            db.session.commit()
+            if claimed:
+                return job_id
+        return None
+
+def run_job(job_id):
+    """Exécute une tâche réservée et enregistre son issue ; retourne son statut"""
+    with app.app_context():
+        job = db.session.get(Job, job_id)
+        name, payload = job.name, job.payload
+        spec = jobs.get(name)
+        started = time.perf_counter()
+        try:
+            if spec is None:
+                raise LookupError(f"Tâche inconnue : {name}")
+            result = spec.function(*json.loads(payload or '[]'))
+        except Exception as e:
+            db.session.rollback()
+            app.logger.exception("Échec de la tâche %s #%s", name, job_id)
+            job = db.session.get(Job, job_id)
+            job.error = f"{type(e).__name__}: {e}"
+            if spec is not None and job.attempts < job.max_attempts:
+                job.status = 'queued'
+                job.run_at = datetime.utcnow() + timedelta(seconds=backoff_delay(job.attempts))
+            else:
+                job.status = 'failed'
+                job.finished_at = datetime.utcnow()
+        else:
+            # La tâche a pu vider la session : on relit le Job
+            job = db.session.get(Job, job_id)
+            job.status = 'succeeded'
+            job.result = json.dumps(result)
+            job.error = None
+            job.finished_at = datetime.utcnow()
+        job.locked_by = None
+        status = job.status
+        db.session.commit()
+        jobs_processed.inc(name, status)
+        job_duration.observe(time.perf_counter() - started, name)
+        return status
+
+def start_job_runner(threads=None):
+    """Démarre l'exécution des tâches dans ce processus (une seule fois, après le fork)"""
+    global job_runner
+    threads = app.config.get('JOB_WORKERS', 2) if threads is None else threads
+    if job_runner is not None or threads <= 0:
+        return job_runner
+    with _job_runner_lock:
+        if job_runner is None:
+            _job_state['worker'] = f"{socket.gethostname()}:{os.getpid()}"
+            job_runner = JobRunner(claim_job, run_job, threads=threads, poll_interval=JOB_POLL_INTERVAL).start()
+    return job_runner
+
+def stop_job_runner(timeout=None):
+    global job_runner
+    runner, job_runner = job_runner, None
+    if runner is not None:
+        runner.stop(timeout)
+
+def wait_for_job(job, timeout):
+    """Attend la fin d'une tâche si ce processus l'exécute ; retourne son statut connu"""
+    if job_runner is not None and job.status in ('queued', 'running') and timeout > 0:
+        return job_runner.wait(job.id, timeout) or job.status
+    return job.status
+
+def job_response(job, code=202):
+    """Réponse « tâche en cours » : statut et adresse où le suivre"""
+    response = jsonify({'message': 'Tâche en cours', 'job_id': job.id, 'status': job.status,
+                        'url': url_for('get_job', id=job.id)})
+    response.headers['Location'] = url_for('get_job', id=job.id)
+    response.headers['Retry-After'] = str(JOB_POLL_INTERVAL)
+    return response, code
+
+@app.before_request
+def _ensure_job_runner():
+    if job_runner is None:
+        start_job_runner()
+
+@jobs.register('collect_orphan_blobs', priority=PRIORITY_LOW, max_attempts=5)
+def collect_orphan_blobs_job(hashes):
+    return {'deleted': collect_orphan_blobs(hashes)}
+
+def schedule_blob_collection(hashes):
+    """Confie le ramasse-miettes des contenus libérés à la file des tâches"""
+    hashes = [h for h in hashes if h]
+    if hashes:
+        enqueue_job('collect_orphan_blobs', hashes)
+
+@app.route('/api/jobs/<int:id>')
+@login_required
+@query_budget(2)
+def get_job(id):
+    job = db.session.get(Job, id)
+    if job is None:
+        return jsonify({'message': 'Tâche introuvable'}), 404
+    return jsonify({
+        'id': job.id,
+        'name': job.name,
+        'status': job.status,
+        'priority': job.priority,
+        'attempts': job.attempts,
+        'max_attempts': job.max_attempts,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'run_at': job.run_at.isoformat() if job.run_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'result': json.loads(job.result) if job.result else None,
+        'error': job.error,
+    })
+
+@app.cli.command('run-jobs')
+@click.option('--threads', default=2, show_default=True, help="Threads d'exécution")
+def run_jobs_command(threads):
+    """Exécute les tâches d'arrière-plan (processus dédié, à lancer avec JOB_WORKERS=0 côté web)"""
+    runner = start_job_runner(threads)
+    print(f"⚙️ Exécution des tâches avec {threads} threads (Ctrl+C pour arrêter)")
+    try:
+        while runner.running:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("⏹️ Arrêt après les tâches en cours…")
+        stop_job_runner()
 
 # Configuration Flask-Login
+# Cache des utilisateurs connectés : évite un SELECT users à chaque requête authentifiée
+USER_CACHE_SIZE = 10000
+USER_CACHE_TTL = 60  # secondes, borne le retard des autres processus après une modification
+user_cache = LRUCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+def _user_snapshot(user):
+    return {attr.key: getattr(user, attr.key) for attr in sa_inspect(User).column_attrs}
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    user_id = int(user_id)
+    snapshot = user_cache.get(user_id)
+    if snapshot is None:
+        user = db.session.get(User, user_id)
+        if user is not None:
+            user_cache.set(user_id, _user_snapshot(user))
+        return user
+    user = User(**snapshot)
+    make_transient_to_detached(user)
+    # Rattache l'utilisateur à la session sans requête ; les relations restent chargées à la demande
+    return db.session.merge(user, load=False)
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _invalidate_user_cache(mapper, connection, target):
+    user_cache.pop(target.id)
+    # Invalidé à nouveau après le commit : une lecture concurrente a pu remettre l'ancienne version
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault('stale_user_ids', set()).add(target.id)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed_users(session):
+    for user_id in session.info.pop('stale_user_ids', ()):
+        user_cache.pop(user_id)
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_stale_users(session):
+    session.info.pop('stale_user_ids', None)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Métriques au format texte de Prometheus (protégées par METRICS_TOKEN si défini)"""
+    token = os.getenv('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return Response('Unauthorized\n', status=401, mimetype='text/plain')
+    return Response(metrics.render(), content_type=Registry.CONTENT_TYPE)
+
+@app.route('/api/cache_stats')
+@login_required
+def cache_stats():
+    if current_user.role != 'admin':
+        return jsonify({'success': False, 'message': 'Permission denied'}), 403
+    return jsonify({
+        'users': user_cache.stats(),
+        'tags': tag_cache.stats()
+    })
 
 # Fonction pour créer l'admin par défaut
-def create_default_admin():
-    admin = User.query.filter_by(role="admin").first()
-    if not admin:
-        admin_user = User(
-            email="admin@admin.com",
-            password_hash=generate_password_hash("admin123"),
-            is_active=True,
-            team="admin",
-            role="admin"
-        )
-        db.session.add(admin_user)
-        db.session.commit()
-        print("Admin par défaut créé : admin@admin.com / admin123")
+def create_default_admin(email="admin@admin.com", password="admin123"):
+    """Crée un compte administrateur s'il n'existe pas ; retourne True si un compte a été créé"""
+    if User.query.filter_by(email=email).first():
+        return False
+    admin_user = User(
+        email=email,
+        password_hash=generate_password_hash(password),
+        is_active=True,
+        team="admin",
+        role="admin"
+    )
+    db.session.add(admin_user)
+    db.session.commit()
+    return True
+
+@app.cli.command('create-admin')
+@click.option('--email', default='admin@admin.com', show_default=True, help="Adresse du compte administrateur")
+@click.option('--password', prompt=True, hide_input=True, confirmation_prompt=True, help="Mot de passe")
+def create_admin_command(email, password):
+    """Crée le compte administrateur (à lancer une fois après l'installation)"""
+    if create_default_admin(email, password):
+        click.echo(f"✅ Administrateur créé : {email}")
+    else:
+        click.echo(f"ℹ️ Le compte {email} existe déjà")
 
 # Routes principales
 @app.route('/')
@@ -207,10 +1847,11 @@ def index():
 
 @app.route('/dashboard')
 @login_required
+@query_budget(5)
 def dashboard():
     # Statistiques
-    total_incidents = Incident.query.count()
-    total_problems = Problem.query.count()
+    total_incidents = sum(rollup_status_counts('incident').values())
+    total_problems = sum(rollup_status_counts('problem').values())
     total_articles = KnowledgeArticle.query.count()
     
     # Récupérer les 5 incidents les plus récents
@@ -279,6 +1920,7 @@ def logout():
 # Routes pour les incidents
 @app.route('/incidents', methods=['GET', 'POST'])
 @login_required
+@query_budget(4, methods=('GET', 'HEAD'))
 def incidents():
     if request.method == 'POST':
         action = request.form.get('action', '')
@@ -319,8 +1961,28 @@ def incidents():
                 flash('Incident supprimé avec succès', 'success')
         return redirect(url_for('incidents'))
 
-    incidents_list = Incident.query.all()
-    return render_template('incidents.html', incidents=incidents_list)
+    page, filters = list_arguments(INCIDENT_SORTS, 'recent', INCIDENT_PER_PAGE,
+                                   status=Status.__members__, priority=Priority.__members__)
+    query = db.session.query(Incident.id, Incident.updated_at)
+    if filters['q']:
+        query = query.filter(Incident.title.contains(filters['q']))
+    if filters['status']:
+        query = query.filter(Incident.status == Status[filters['status']])
+    if filters['priority']:
+        query = query.filter(Incident.priority == Priority[filters['priority']])
+    # Sans recherche ni priorité, le total vient des compteurs par statut plutôt que d'un COUNT
+    exact_count = bool(filters['q'] or filters['priority'])
+    pagination = query.order_by(*INCIDENT_SORTS[filters['sort']][1]) \
+        .paginate(page=page, per_page=filters['per_page'], error_out=False, count=exact_count)
+    if not exact_count:
+        counts = rollup_status_counts('incident')
+        pagination.total = counts.get(filters['status'], 0) if filters['status'] else sum(counts.values())
+    rows = fragment_cache.render(
+        'incident', pagination.items,
+        load=lambda ids: {incident.id: incident for incident in Incident.query.filter(Incident.id.in_(ids))},
+        render=render_incident_fragments)
+    sorts = [(key, label) for key, (label, _) in INCIDENT_SORTS.items()]
+    return render_template('incidents.html', rows=rows, pagination=pagination, filters=filters, sorts=sorts)
 
 @app.route('/incidents/new', methods=['GET'])
 @login_required
@@ -329,6 +1991,8 @@ def new_incident():
 
 @app.route('/incidents/<int:id>', methods=['GET'])
 @login_required
+@query_budget(3)
+@conditional(row_version(Incident))
 def view_incident(id):
     incident = Incident.query.get_or_404(id)
     return render_template('incidents.html', incident=incident, mode='view')
@@ -367,6 +2031,186 @@ def edit_incident(incident_id):
         'assigned_to': incident.owner
     })
 
+# Champs d'un incident reçus par l'API : clé du formulaire -> colonne
+INCIDENT_PAYLOAD_FIELDS = {
+    'incident_title': 'title',
+    'summary': 'description',
+    'owner': 'owner',
+    'related_incidents': 'related_incidents',
+    'affected_services': 'affected_services',
+    'incident_duration': 'incident_duration',
+    'response_teams': 'response_teams',
+    'incident_stakeholders': 'stakeholders',
+    'origin': 'origin',
+    'malfunction': 'malfunction',
+    'impact': 'impact',
+    'detection': 'detection',
+    'response': 'response',
+    'recovery': 'recovery',
+    'why1': 'why1',
+    'why2': 'why2',
+    'why3': 'why3',
+    'why4': 'why4',
+    'why5': 'why5',
+    'associated_records': 'associated_records',
+    'lessons_learned': 'lessons_learned',
+}
+INCIDENT_MAX_LENGTHS = {'title': 255, 'owner': 255, 'incident_duration': 100}
+INCIDENT_DATE_FORMATS = ('%Y-%m-%dT%H:%M', '%Y-%m-%d %H:%M', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d')
+INGEST_BATCH_SIZE = 1000
+
+class IncidentValidationError(ValueError):
+    """Incident reçu par l'API invalide"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__('; '.join(errors))
+
+def _parse_incident_date(value):
+    if isinstance(value, datetime):
+        return value
+    for fmt in INCIDENT_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return datetime.fromisoformat(value)
+
+def parse_incident_payload(data):
+    """Valide un incident reçu par l'API et retourne les valeurs de ses colonnes
+
+    Les clés du formulaire post-mortem (incident_title, summary...) sont
+    acceptées, ainsi que les noms de colonnes (title, description...).
+    """
+    errors = []
+    values = {}
+    for key, column in INCIDENT_PAYLOAD_FIELDS.items():
+        value = data.get(key)
+        if value is None and column != key:
+            value = data.get(column)
+        if value is not None and not isinstance(value, str):
+            value = str(value)
+        if value is not None and column in INCIDENT_MAX_LENGTHS and len(value) > INCIDENT_MAX_LENGTHS[column]:
+            errors.append(f"{key} dépasse {INCIDENT_MAX_LENGTHS[column]} caractères")
+        values[column] = value
+    if not (values['title'] or '').strip():
+        errors.append("incident_title est obligatoire")
+
+    priority = data.get('priority')
+    try:
+        values['priority'] = Priority[priority] if priority else None
+    except (KeyError, TypeError):  # TypeError : liste ou objet JSON
+        errors.append(f"priority invalide : {priority}")
+    status = data.get('status')
+    try:
+        values['status'] = Status[status] if status else Status.OPEN
+    except (KeyError, TypeError):  # TypeError : liste ou objet JSON
+        errors.append(f"status invalide : {status}")
+
+    incident_date = data.get('incident_date')
+    try:
+        values['incident_date'] = _parse_incident_date(incident_date) if incident_date else None
+    except (TypeError, ValueError):
+        errors.append(f"incident_date invalide : {incident_date}")
+
+    problem_id = data.get('problem_id')
+    try:
+        values['problem_id'] = int(problem_id) if problem_id not in (None, '') else None
+    except (TypeError, ValueError):
+        errors.append(f"problem_id invalide : {problem_id}")
+
+    if errors:
+        raise IncidentValidationError(errors)
+    return values
+
+def ingest_incidents(records, user_id=None, batch_size=INGEST_BATCH_SIZE, details=False):
+    """Insère des incidents par lots (un executemany et un commit par lot)
+
+    Retourne un rapport avec les erreurs ligne par ligne. Si un lot est refusé
+    par la base (clé étrangère invalide...), ses lignes sont rejouées une par une
+    pour isoler les fautives.
+    """
+    report = {'received': 0, 'inserted': 0, 'failed': 0, 'errors': []}
+    if details:
+        report['results'] = []
+    table = Incident.__table__
+    batch = []
+
+    def fail(row, errors):
+        report['failed'] += 1
+        report['errors'].append({'row': row, 'errors': errors})
+        if details:
+            report['results'].append({'row': row, 'status': 'error'})
+
+    def insert_rows(rows):
+        status_deltas, month_deltas = Counter(), Counter()
+        for _, values in rows:
+            status_deltas[('incident', values['status'].name)] += 1
+            month_deltas[('incident', _month_key(values['created_at']))] += 1
+        analysed, others = [], []
+        for _, values in rows:
+            whys = [values[field] for field in INCIDENT_WHY_FIELDS]
+            (analysed if last_why(whys) is not None else others).append(values)
+        if others:
+            db.session.execute(table.insert(), others)
+        if analysed:
+            # Les analyses ont besoin de l'id de leur incident : RETURNING en executemany quand la
+            # base le permet, sinon (MySQL) ces incidents-là sont insérés un par un
+            if db.engine.dialect.insert_executemany_returning_sort_by_parameter_order:
+                ids = db.session.execute(table.insert().returning(table.c.id, sort_by_parameter_order=True),
+                                         analysed).scalars().all()
+            else:
+                ids = [db.session.execute(table.insert(), values).inserted_primary_key[0] for values in analysed]
+            insert_analyses('incident_id', [
+                (incident_id, [values[field] for field in INCIDENT_WHY_FIELDS], [], None,
+                 _incident_context(values['title'], values['description']))
+                for incident_id, values in zip(ids, analysed)])
+        apply_rollup_deltas(db.session.connection(), status_deltas, month_deltas, db.session())
+        note_live_bulk(db.session(), 'incident', len(rows))
+        db.session.commit()
+        report['inserted'] += len(rows)
+        if details:
+            report['results'].extend({'row': row, 'status': 'inserted'} for row, _ in rows)
+
+    def flush():
+        if not batch:
+            return
+        try:
+            insert_rows(batch)
+        except Exception:
+            db.session.rollback()
+            for item in batch:
+                try:
+                    insert_rows([item])
+                except Exception as e:
+                    db.session.rollback()
+                    fail(item[0], [str(getattr(e, 'orig', e))])
+        batch.clear()
+
+    try:
+        for row, record in enumerate(records, start=1):
+            report['received'] += 1
+            if not isinstance(record, dict):
+                fail(row, ["l'enregistrement doit être un objet"])
+                continue
+            try:
+                values = parse_incident_payload(record)
+            except IncidentValidationError as e:
+                fail(row, e.errors)
+                continue
+            now = datetime.utcnow()
+            values.update(created_at=now, updated_at=now, assigned_to_id=user_id)
+            batch.append((row, values))
+            if len(batch) >= batch_size:
+                flush()
+    except ValueError as e:
+        # Flux illisible : on garde ce qui a déjà été validé
+        report['aborted'] = str(e)
+    flush()
+    if details:
+        report['results'].sort(key=lambda result: result['row'])
+    return report
+
 @app.route('/api/incidents', methods=['POST'])
 @login_required
 def create_incident():
@@ -375,52 +2219,417 @@ def create_incident():
     else:
         data = request.form
 
-    # Création de l'incident avec les nouveaux champs
-    new_incident = Incident(
-        title=data.get('incident_title'),
-        description=data.get('summary'),
-        priority=data.get('priority'),
-        status=Status.OPEN,
-        assigned_to_id=current_user.id
-    )
-
-    # Ajout des champs supplémentaires dans la base de données
-    new_incident.owner = data.get('owner')
-    new_incident.related_incidents = data.get('related_incidents')
-    new_incident.affected_services = data.get('affected_services')
-    new_incident.incident_date = datetime.strptime(data.get('incident_date'), '%Y-%m-%dT%H:%M')
-    new_incident.incident_duration = data.get('incident_duration')
-    new_incident.response_teams = data.get('response_teams')
-    new_incident.stakeholders = data.get('incident_stakeholders')
-    
-    # Sauvegarde des détails du post-mortem
-    new_incident.origin = data.get('origin')
-    new_incident.malfunction = data.get('malfunction')
-    new_incident.impact = data.get('impact')
-    new_incident.detection = data.get('detection')
-    new_incident.response = data.get('response')
-    new_incident.recovery = data.get('recovery')
-    
-    # Sauvegarde des 5 pourquoi
-    new_incident.why1 = data.get('why1')
-    new_incident.why2 = data.get('why2')
-    new_incident.why3 = data.get('why3')
-    new_incident.why4 = data.get('why4')
-    new_incident.why5 = data.get('why5')
-    
-    # Sauvegarde des autres informations
-    new_incident.associated_records = data.get('associated_records')
-    new_incident.lessons_learned = data.get('lessons_learned')
+    try:
+        values = parse_incident_payload(data)
+    except IncidentValidationError as e:
+        if request.is_json:
+            return jsonify({"message": "Incident invalide", "errors": e.errors}), 400
+        flash(f"Incident invalide : {e}", 'error')
+        return redirect(url_for('incidents'))
 
+    new_incident = Incident(assigned_to_id=current_user.id, **values)
+    suggestion = None
+    if new_incident.problem_id is None:
+        _, suggestion = similar_incidents(incident_text(values.get(field) for field in INCIDENT_TEXT_FIELDS),
+                                          k=PROBLEM_LINK_NEIGHBORS)
+        if app.config.get('INCIDENT_AUTO_LINK') and problem_link_is_confident(suggestion):
+            new_incident.problem_id = suggestion['problem_id']
     db.session.add(new_incident)
     db.session.commit()
 
     if request.is_json:
-        return jsonify({"message": "Incident créé avec succès", "id": new_incident.id}), 201
+        return jsonify({
+            "message": "Incident créé avec succès",
+            "id": new_incident.id,
+            "problem_id": new_incident.problem_id,
+            "suggested_problem": suggestion
+        }), 201
     else:
         flash('Incident créé avec succès', 'success')
+        if suggestion and new_incident.problem_id == suggestion['problem_id']:
+            flash(f"Incident rattaché automatiquement au problème #{suggestion['problem_id']}", 'info')
+        elif suggestion:
+            flash(f"Des incidents similaires sont rattachés au problème #{suggestion['problem_id']}", 'info')
         return redirect(url_for('incidents'))
 
+@app.route('/api/incidents/bulk', methods=['POST'])
+@login_required
+def bulk_create_incidents():
+    """Import massif d'incidents : tableau JSON, NDJSON ou CSV lus en flux"""
+    upload = request.files.get('file')
+    if upload:
+        stream = upload.stream
+        fmt = request.args.get('format') or detect_format(upload.mimetype, upload.filename)
+    else:
+        stream = request.stream
+        fmt = request.args.get('format') or detect_format(request.content_type)
+    if fmt not in FORMATS:
+        return jsonify({"message": f"Format non supporté, attendu : {', '.join(FORMATS)}"}), 415
+
+    report = ingest_incidents(
+        iter_records(stream, fmt),
+        user_id=current_user.id,
+        batch_size=min(request.args.get('batch_size', INGEST_BATCH_SIZE, type=int), 10000),
+        details=request.args.get('details') == '1'
+    )
+    if not report['failed'] and 'aborted' not in report:
+        code = 201
+    elif report['inserted']:
+        code = 207
+    else:
+        code = 400
+    return jsonify(report), code
+
+@app.cli.command('import-incidents')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), help='Format du fichier (déduit de l\'extension sinon)')
+@click.option('--batch-size', default=INGEST_BATCH_SIZE, show_default=True, help='Nombre de lignes par transaction')
+@click.option('--user', 'user_email', help='Email du compte auquel assigner les incidents')
+def import_incidents_command(path, fmt, batch_size, user_email):
+    """Importe des incidents depuis un fichier JSON, NDJSON ou CSV"""
+    fmt = fmt or detect_format(filename=path)
+    if fmt not in FORMATS:
+        raise click.UsageError("Impossible de déduire le format, utilisez --format")
+    user_id = None
+    if user_email:
+        user = User.query.filter_by(email=user_email).first()
+        if not user:
+            raise click.UsageError(f"Utilisateur inconnu : {user_email}")
+        user_id = user.id
+    started = time.perf_counter()
+    with open(path, 'rb') as f:
+        report = ingest_incidents(iter_records(f, fmt), user_id=user_id, batch_size=batch_size)
+    elapsed = time.perf_counter() - started
+    rate = report['inserted'] / elapsed if elapsed else 0
+    print(f"✅ {report['inserted']} incidents importés en {elapsed:.2f}s ({rate:.0f}/s)")
+    if report['failed']:
+        print(f"⚠️ {report['failed']} lignes rejetées :")
+        for error in report['errors'][:20]:
+            print(f"   ligne {error['row']} : {'; '.join(error['errors'])}")
+    if 'aborted' in report:
+        print(f"❌ Lecture interrompue : {report['aborted']}")
+
+# Import des problèmes d'un autre outil (data/problems.json, exports JSON ou NDJSON)
+# Statuts libres de l'outil d'origine (minuscules, sans accents) -> Status
+LEGACY_PROBLEM_STATUSES = {
+    'new': Status.OPEN, 'open': Status.OPEN, 'opened': Status.OPEN, 'todo': Status.OPEN,
+    'nouveau': Status.OPEN, 'ouvert': Status.OPEN,
+    'in progress': Status.IN_PROGRESS, 'assigned': Status.IN_PROGRESS, 'investigating': Status.IN_PROGRESS,
+    'pending': Status.IN_PROGRESS, 'en cours': Status.IN_PROGRESS, 'en attente': Status.IN_PROGRESS,
+    'resolved': Status.RESOLVED, 'fixed': Status.RESOLVED, 'solved': Status.RESOLVED, 'resolu': Status.RESOLVED,
+    'closed': Status.CLOSED, 'done': Status.CLOSED, 'cancelled': Status.CLOSED, 'ferme': Status.CLOSED,
+    'clos': Status.CLOSED,
+}
+PROBLEM_IMPORT_MAX_ERRORS = 1000  # erreurs détaillées conservées dans le rapport
+
+class ProblemValidationError(ValueError):
+    """Problème importé invalide"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__('; '.join(errors))
+
+def legacy_problem_status(value):
+    if not value:
+        return Status.OPEN
+    key = fold(str(value)).replace('_', ' ').replace('-', ' ').strip()
+    if key.upper().replace(' ', '_') in Status.__members__:
+        return Status[key.upper().replace(' ', '_')]
+    return LEGACY_PROBLEM_STATUSES.get(key)
+
+def legacy_problem_ref(source, record):
+    """Clé d'idempotence : identifiant d'origine, ou empreinte du contenu s'il n'y en a pas"""
+    key = record.get('id')
+    if key in (None, '') or len(str(key)) > 64:
+        key = hashlib.sha1(json.dumps(record, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')).hexdigest()
+    return f"{source}:{key}"
+
+def _text_list(value):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return split_solutions(value)
+    return [str(item) for item in value if item is not None]
+
+def parse_legacy_problem(record, source):
+    """Valeurs d'un problème exporté : (colonnes, pourquoi, solutions)
+
+    Accepte le format de data/problems.json (why_analysis, reporter, solution,
+    problem_text) et les champs de l'API (why1..why5, suggested_solutions).
+    """
+    errors = []
+    title = (record.get('title') or '').strip()
+    if not title:
+        errors.append("title est obligatoire")
+    elif len(title) > 255:
+        errors.append("title dépasse 255 caractères")
+    status = legacy_problem_status(record.get('status'))
+    if status is None:
+        errors.append(f"status inconnu : {record.get('status')}")
+    created_at = record.get('created_at')
+    try:
+        created_at = _parse_incident_date(created_at) if created_at else datetime.utcnow()
+    except (TypeError, ValueError):
+        errors.append(f"created_at invalide : {created_at}")
+    whys = record.get('why_analysis')
+    if whys is None:
+        whys = [record.get(field) for field in INCIDENT_WHY_FIELDS]
+    elif isinstance(whys, str):
+        whys = whys.splitlines()
+    whys = [str(why) if why is not None else None for why in whys]
+    if len(whys) > WHY_COUNT:
+        errors.append(f"why_analysis : {WHY_COUNT} pourquoi au plus")
+    if errors:
+        raise ProblemValidationError(errors)
+
+    solutions = _text_list(record.get('solution') or record.get('solutions') or record.get('suggested_solutions'))
+    values = {
+        'title': title,
+        'description': record.get('description') or record.get('problem_text'),
+        'root_cause': record.get('root_cause'),
+        'status': status,
+        'created_at': created_at,
+        'updated_at': datetime.utcnow(),
+        'external_ref': legacy_problem_ref(source, record),
+        'assigned_to_id': None,
+    }
+    return values, whys, solutions
+
+def ingest_problems(records, source, batch_size=INGEST_BATCH_SIZE, restart=False, progress=None):
+    """Importe des problèmes par lots, avec point de reprise et sans doublon
+
+    Chaque problème porte la référence "source:id" (external_ref) : un enregistrement
+    déjà importé est ignoré, l'import peut donc être rejoué. Après chaque lot, le
+    nombre d'enregistrements lus est noté dans import_checkpoints ; une reprise saute
+    ces enregistrements sans interroger la base. Les analyses (pourquoi, solutions)
+    sont insérées avec leurs problèmes, dans la même transaction.
+    """
+    report = {'received': 0, 'resumed_from': 0, 'inserted': 0, 'existing': 0, 'failed': 0, 'errors': []}
+    checkpoint = db.session.get(ImportCheckpoint, source)
+    if checkpoint is None:
+        checkpoint = ImportCheckpoint(source=source)
+        db.session.add(checkpoint)
+    elif restart:
+        checkpoint.records = checkpoint.inserted = 0
+        checkpoint.started_at, checkpoint.finished_at = datetime.utcnow(), None
+    else:
+        report['resumed_from'] = checkpoint.records
+    db.session.commit()
+    start = report['resumed_from']
+    reporters = {}
+    batch = []
+
+    def fail(row, errors):
+        report['failed'] += 1
+        if len(report['errors']) < PROBLEM_IMPORT_MAX_ERRORS:
+            report['errors'].append({'row': row, 'errors': errors})
+
+    def reporter_id(name):
+        # L'outil d'origine n'a qu'un nom de compte : email exact ou partie avant @
+        if name not in reporters:
+            reporters[name] = db.session.query(User.id).filter(
+                db.or_(User.email == name, User.email.like(f"{name}@%"))).order_by(User.id).limit(1).scalar()
+        return reporters[name]
+
+    def insert_rows(rows):
+        refs = {values['external_ref']: (values, whys, solutions) for _, values, whys, solutions in rows}
+        existing = set(db.session.scalars(db.select(Problem.external_ref).where(Problem.external_ref.in_(list(refs)))))
+        new = [refs[ref] for ref in refs if ref not in existing]
+        if new:
+            db.session.execute(Problem.__table__.insert(), [values for values, _, _ in new])
+            ids = dict(db.session.query(Problem.external_ref, Problem.id)
+                       .filter(Problem.external_ref.in_([values['external_ref'] for values, _, _ in new])))
+            insert_analyses('problem_id', [
+                (ids[values['external_ref']], whys, solutions, values['root_cause'],
+                 f"{values['title']} {values['description'] or ''}")
+                for values, whys, solutions in new if last_why(whys) or solutions])
+            status_deltas = Counter(('problem', values['status'].name) for values, _, _ in new)
+            month_deltas = Counter(('problem', _month_key(values['created_at'])) for values, _, _ in new)
+            apply_rollup_deltas(db.session.connection(), status_deltas, month_deltas, db.session())
+            note_live_bulk(db.session(), 'problem', len(new))
+        db.session.commit()
+        report['inserted'] += len(new)
+        report['existing'] += len(rows) - len(new)
+
+    def flush():
+        if not batch:
+            return
+        try:
+            insert_rows(batch)
+        except Exception:
+            db.session.rollback()
+            for item in batch:
+                try:
+                    insert_rows([item])
+                except Exception as e:
+                    db.session.rollback()
+                    fail(item[0], [str(getattr(e, 'orig', e))])
+        batch.clear()
+
+    def save_checkpoint(records, finished=False):
+        # Noté après le commit du lot : au pire un lot est relu, et ignoré grâce à external_ref
+        checkpoint.records = records
+        checkpoint.inserted = inserted_before + report['inserted']
+        if finished:
+            checkpoint.finished_at = datetime.utcnow()
+        db.session.commit()
+        if progress:
+            progress(report)
+
+    inserted_before = checkpoint.inserted
+    row = 0
+    try:
+        for row, record in enumerate(records, start=1):
+            if row <= start:
+                continue
+            report['received'] += 1
+            if not isinstance(record, dict):
+                fail(row, ["l'enregistrement doit être un objet"])
+                continue
+            try:
+                values, whys, solutions = parse_legacy_problem(record, source)
+            except ProblemValidationError as e:
+                fail(row, e.errors)
+                continue
+            if record.get('reporter'):
+                values['assigned_to_id'] = reporter_id(str(record['reporter']))
+            batch.append((row, values, whys, solutions))
+            if len(batch) >= batch_size:
+                flush()
+                save_checkpoint(row)
+    except ValueError as e:
+        # Flux illisible : ce qui a été validé est gardé, la reprise repartira d'ici
+        report['aborted'] = str(e)
+        flush()
+        save_checkpoint(max(row, start))
+        return report
+    if row < start:
+        report['aborted'] = f"le fichier compte {row} enregistrements, le point de reprise en indique {start}"
+        return report
+    flush()
+    save_checkpoint(row, finished=True)
+    return report
+
+@app.cli.command('import-problems')
+@click.argument('path', default=os.path.join('data', 'problems.json'), type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), help='Format du fichier (déduit de l\'extension sinon)')
+@click.option('--source', help="Nom de la source, préfixe des références et clé du point de reprise (nom du fichier par défaut)")
+@click.option('--batch-size', default=INGEST_BATCH_SIZE, show_default=True, help='Nombre de lignes par transaction')
+@click.option('--restart', is_flag=True, help='Ignorer le point de reprise et relire le fichier depuis le début')
+def import_problems_command(path, fmt, source, batch_size, restart):
+    """Importe des problèmes depuis un export JSON ou NDJSON (data/problems.json par défaut)"""
+    fmt = fmt or detect_format(filename=path)
+    if fmt not in FORMATS:
+        raise click.UsageError("Impossible de déduire le format, utilisez --format")
+    source = source or os.path.splitext(os.path.basename(path))[0]
+    if len(source) > 100:
+        raise click.UsageError("--source dépasse 100 caractères")
+    checkpoint = db.session.get(ImportCheckpoint, source)
+    if checkpoint and checkpoint.finished_at and not restart:
+        print(f"✅ Import « {source} » déjà terminé le {checkpoint.finished_at:%d/%m/%Y %H:%M} "
+              f"({checkpoint.inserted} problèmes) ; --restart pour le rejouer")
+        return
+
+    def progress(report):
+        print(f"   … {report['resumed_from'] + report['received']} enregistrements lus, {report['inserted']} importés")
+
+    started = time.perf_counter()
+    with open(path, 'rb') as f:
+        report = ingest_problems(iter_records(f, fmt), source, batch_size=batch_size, restart=restart, progress=progress)
+    elapsed = time.perf_counter() - started
+    rate = report['received'] / elapsed if elapsed else 0
+    if report['resumed_from']:
+        print(f"⏩ Reprise après {report['resumed_from']} enregistrements")
+    print(f"✅ {report['inserted']} problèmes importés en {elapsed:.2f}s ({rate:.0f} enregistrements/s)")
+    if report['existing']:
+        print(f"ℹ️ {report['existing']} déjà présents, ignorés")
+    if report['failed']:
+        print(f"⚠️ {report['failed']} lignes rejetées :")
+        for error in report['errors'][:20]:
+            print(f"   ligne {error['row']} : {'; '.join(error['errors'])}")
+    if 'aborted' in report:
+        print(f"❌ Lecture interrompue : {report['aborted']}")
+
+def _similar_incidents_response(matches, suggestion, **extra):
+    return jsonify(dict(extra, similar=[{
+        'id': incident.id,
+        'title': incident.title,
+        'status': incident.status.value if incident.status else None,
+        'priority': incident.priority.value if incident.priority else None,
+        'problem_id': incident.problem_id,
+        'score': score
+    } for incident, score in matches], suggested_problem=suggestion))
+
+@app.route('/api/incidents/suggest')
+@login_required
+@query_budget(5)
+def suggest_incidents():
+    """Saisie semi-automatique : titres d'incidents commençant par les mots tapés"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify([])
+    return Response(title_suggestions('incident', query, suggest_limit()), mimetype='application/json')
+
+@app.route('/api/incidents/<int:id>/similar')
+@login_required
+@query_budget(5)
+def get_similar_incidents(id):
+    """Incidents proches d'un incident existant, et problème auquel le rattacher"""
+    incident = Incident.query.get_or_404(id)
+    k = min(max(request.args.get('k', 10, type=int), 1), 100)
+    matches, suggestion = similar_incidents(
+        incident_text(getattr(incident, field) for field in INCIDENT_TEXT_FIELDS), k=k, exclude=[incident.id])
+    return _similar_incidents_response(matches, suggestion, incident_id=incident.id)
+
+@app.route('/api/incidents/similar', methods=['POST'])
+@login_required
+@query_budget(5)
+def find_similar_incidents():
+    """Incidents proches d'un incident en cours de saisie (titre, description, pourquoi)"""
+    data = request.get_json(silent=True) or {}
+    k = min(max(request.args.get('k', 10, type=int), 1), 100)
+    matches, suggestion = similar_incidents(incident_text(data.get(field) for field in INCIDENT_TEXT_FIELDS), k=k)
+    return _similar_incidents_response(matches, suggestion)
+
+@app.route('/api/incidents/<int:id>/problem', methods=['POST'])
+@login_required
+def link_incident_problem(id):
+    """Rattache un incident à un problème (problem_id null pour le détacher)"""
+    incident = Incident.query.get_or_404(id)
+    problem_id = (request.get_json(silent=True) or {}).get('problem_id')
+    if problem_id is not None:
+        if not isinstance(problem_id, int) or db.session.get(Problem, problem_id) is None:
+            return jsonify({'message': f"Problème introuvable : {problem_id}"}), 404
+    incident.problem_id = problem_id
+    db.session.commit()
+    return jsonify({'message': 'Incident mis à jour', 'id': incident.id, 'problem_id': incident.problem_id})
+
+@app.cli.command('link-similar-incidents')
+@click.option('--apply', 'apply_links', is_flag=True, help='Enregistrer les rattachements (sinon simple aperçu)')
+@click.option('--min-confidence', default=PROBLEM_LINK_MIN_CONFIDENCE, show_default=True,
+              help='Part minimale du poids des incidents rattachés désignant le problème')
+def link_similar_incidents_command(apply_links, min_confidence):
+    """Propose (ou applique) un problème pour les incidents qui n'en ont pas"""
+    started = time.perf_counter()
+    build_similarity_index()
+    problem_of = dict(db.session.query(Incident.id, Incident.problem_id).filter(Incident.problem_id.isnot(None)))
+    links = []
+    for row in _incident_text_query().filter(Incident.problem_id.is_(None)).execution_options(yield_per=2000):
+        matches = incident_index.similar(incident_text(row[1:]), k=PROBLEM_LINK_NEIGHBORS,
+                                         threshold=SIMILARITY_MIN_SCORE, exclude=[row[0]])
+        suggestion = suggest_problem([(problem_of.get(incident_id), score) for incident_id, score in matches])
+        if problem_link_is_confident(suggestion, min_confidence):
+            links.append({'id': row[0], 'problem_id': suggestion['problem_id'], 'updated_at': datetime.utcnow()})
+    elapsed = time.perf_counter() - started
+    print(f"🔗 {len(links)} incidents rattachables à un problème existant ({elapsed:.1f}s)")
+    for link in links[:20]:
+        print(f"   incident #{link['id']} → problème #{link['problem_id']}")
+    if apply_links and links:
+        for start in range(0, len(links), INGEST_BATCH_SIZE):
+            db.session.execute(update(Incident), links[start:start + INGEST_BATCH_SIZE])
+        db.session.commit()
+        print("✅ Rattachements enregistrés")
+
 # Routes pour les problèmes
 @app.route('/problems', methods=['GET', 'POST'])
 @login_required
@@ -437,15 +2646,15 @@ def problems():
         root_cause = request.form.get('root_cause', '')
         solutions = request.form.get('suggested_solutions', '')
 
-        # On concatène les 5 pourquoi et les solutions dans la description pour ne rien perdre
-        full_description = f"{desc}\n\nAnalyse des 5 Pourquoi:\n1. {why1}\n2. {why2}\n3. {why3}\n4. {why4}\n5. {why5}\n\nSolutions suggérées:\n{solutions}"
-
         new_problem = Problem(
             title=context,
-            description=full_description,
+            description=desc,
             root_cause=root_cause,
-            status=status
+            status=Status.__members__.get(status, Status.OPEN)
         )
+        # Les 5 pourquoi et les solutions vont dans l'analyse, une ligne par étape
+        new_problem.analysis = apply_analysis(RootCauseAnalysis(), [why1, why2, why3, why4, why5],
+                                              split_solutions(solutions), root_cause, f"{context} {desc}")
         db.session.add(new_problem)
         db.session.commit()
         flash('Problème enregistré avec succès !', 'success')
@@ -463,14 +2672,172 @@ def create_problem():
         root_cause=data.get('root_cause', ''),
         assigned_to_id=data.get('assigned_to_id')
     )
+    whys = data.get('whys') or [data.get(field) for field in INCIDENT_WHY_FIELDS]
+    solutions = data.get('suggested_solutions') or data.get('solutions')
+    if isinstance(solutions, str):
+        solutions = split_solutions(solutions)
+    if last_why(whys) or solutions:
+        new_problem.analysis = apply_analysis(RootCauseAnalysis(), whys, solutions or [], new_problem.root_cause,
+                                              f"{new_problem.title} {new_problem.description}")
     
     db.session.add(new_problem)
     db.session.commit()
     
     return jsonify({'message': 'Problème créé avec succès', 'id': new_problem.id}), 201
 
+# Rapports de problème (Word, PDF, HTML), générés en arrière-plan et mis en cache sur disque
+report_store = ReportStore(os.path.join(UPLOAD_FOLDER, 'problem_reports'))
+REPORT_WAIT_SECONDS = 3  # attente maximale d'un rapport avant de répondre 202
+REPORT_BATCH_SIZE = 200
+
+def problem_report_version(updated_at, incident_count, incidents_updated_at):
+    """Version d'un rapport : change dès que le problème ou l'un de ses incidents change"""
+    key = '|'.join(str(part) for part in (RENDERER_VERSION, updated_at, incident_count, incidents_updated_at))
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+def current_problem_report_version(problem_id):
+    """Version à jour du rapport d'un problème, en une requête (None si le problème n'existe pas)"""
+    row = db.session.query(Problem.updated_at, func.count(Incident.id), func.max(Incident.updated_at)) \
+        .outerjoin(Incident, Incident.problem_id == Problem.id) \
+        .filter(Problem.id == problem_id).group_by(Problem.id).first()
+    return problem_report_version(*row) if row else None
+
+def _format_report_date(value):
+    return value.strftime('%d/%m/%Y %H:%M') if value else ''
+
+def problem_report_data(problem):
+    """Données d'un rapport : dictionnaire simple, transmissible à un autre processus"""
+    return {
+        'id': problem.id,
+        'title': problem.title,
+        'status': problem.status.value if problem.status else None,
+        'description': problem.description,
+        'root_cause': problem.root_cause,
+        'analysis': analysis_data(problem.analysis),
+        'assigned_to': problem.assigned_to.email if problem.assigned_to else None,
+        'created_at': _format_report_date(problem.created_at),
+        'updated_at': _format_report_date(problem.updated_at),
+        'incidents': [{
+            'id': incident.id,
+            'title': incident.title,
+            'priority': incident.priority.value if incident.priority else None,
+            'status': incident.status.value if incident.status else None,
+            'created_at': _format_report_date(incident.created_at),
+            'description': incident.description,
+            **{f'why{n}': getattr(incident, f'why{n}') for n in range(1, 6)},
+        } for incident in sorted(problem.incidents, key=lambda incident: incident.id)],
+    }
+
+def build_problem_reports(problem_ids, formats=('docx',), force=False, processes=0):
+    """Génère les rapports manquants des problèmes donnés
+
+    Les problèmes sont chargés par lots (avec leurs incidents et leur analyse,
+    en cinq requêtes par lot) ; seuls les rapports dont la version n'est pas
+    déjà sur disque sont produits. Avec `processes` > 1 le rendu est réparti sur plusieurs processus.
+    Retourne ({(id, format): chemin}, nombre de rapports générés).
+    """
+    paths = {}
+    generated = 0
+    pool = ProcessPoolExecutor(max_workers=processes) if processes > 1 else None
+    try:
+        for start in range(0, len(problem_ids), REPORT_BATCH_SIZE):
+            problems = Problem.query.options(joinedload(Problem.assigned_to), selectinload(Problem.incidents),
+                                             selectinload(Problem.analysis).selectinload(RootCauseAnalysis.whys),
+                                             selectinload(Problem.analysis).selectinload(RootCauseAnalysis.solutions)) \
+                .filter(Problem.id.in_(problem_ids[start:start + REPORT_BATCH_SIZE])).all()
+            pending = []
+            for problem in problems:
+                stamps = [incident.updated_at for incident in problem.incidents if incident.updated_at]
+                version = problem_report_version(problem.updated_at, len(problem.incidents), max(stamps, default=None))
+                data = None
+                for fmt in formats:
+                    path = None if force else report_store.get(problem.id, version, fmt)
+                    if path:
+                        paths[(problem.id, fmt)] = path
+                        continue
+                    data = data or problem_report_data(problem)
+                    pending.append((problem.id, version, fmt, data))
+            reports = [item[3] for item in pending]
+            report_formats = [item[2] for item in pending]
+            if pool:
+                contents = pool.map(render_report, reports, report_formats, chunksize=8)
+            else:
+                contents = map(render_report, reports, report_formats)
+            for (problem_id, version, fmt, _), content in zip(pending, contents):
+                paths[(problem_id, fmt)] = report_store.put(problem_id, version, fmt, content)
+                generated += 1
+            db.session.expunge_all()
+    finally:
+        if pool:
+            pool.shutdown()
+    return paths, generated
+
+@jobs.register('problem_reports')
+def problem_reports_job(problem_ids, formats, force=False):
+    paths, generated = build_problem_reports(problem_ids, formats, force=force)
+    return {'generated': generated, 'up_to_date': len(paths) - generated}
+
+@app.route('/problems/<int:id>/report')
+@app.route('/problems/<int:id>/report.<fmt>')
+@login_required
+@query_budget(5)
+def problem_report(id, fmt='docx'):
+    """Rapport d'un problème et de ses incidents : servi depuis le cache s'il est à jour
+
+    Sinon sa génération est confiée à la file des tâches ; la réponse l'attend
+    quelques secondes puis renvoie 202 avec l'adresse de la tâche. `?wait=0`
+    répond immédiatement.
+    """
+    if fmt not in REPORT_FORMATS:
+        return jsonify({'message': f"Format inconnu : {fmt}"}), 400
+    version = current_problem_report_version(id)
+    if version is None:
+        return jsonify({'message': 'Problème introuvable'}), 404
+    path = report_store.get(id, version, fmt)
+    if path is None:
+        job = enqueue_job('problem_reports', [id], [fmt], priority=PRIORITY_HIGH, dedupe_key=f'report:{id}:{fmt}')
+        status = wait_for_job(job, REPORT_WAIT_SECONDS if request.args.get('wait', '1') != '0' else 0)
+        path = report_store.get(id, version, fmt) if status == 'succeeded' else None
+        if path is None:
+            return job_response(job)
+    return send_file(os.path.abspath(path), mimetype=REPORT_FORMATS[fmt], etag=version,
+                     as_attachment=fmt != 'html', download_name=f"Problem_Report_{id}.{fmt}")
+
+@app.route('/api/problems/reports', methods=['POST'])
+@login_required
+def generate_problem_reports():
+    """Régénère en arrière-plan les rapports de plusieurs problèmes (tous par défaut)"""
+    data = request.get_json(silent=True) or {}
+    formats = data.get('formats') or ['docx']
+    unknown = [fmt for fmt in formats if fmt not in REPORT_FORMATS]
+    if unknown:
+        return jsonify({'message': f"Formats inconnus : {', '.join(map(str, unknown))}"}), 400
+    problem_ids = data.get('ids')
+    if problem_ids is None:
+        problem_ids = [problem_id for (problem_id,) in db.session.query(Problem.id).order_by(Problem.id)]
+    elif not all(isinstance(problem_id, int) for problem_id in problem_ids):
+        return jsonify({'message': 'ids doit être une liste d\'entiers'}), 400
+    job = enqueue_job('problem_reports', problem_ids, formats, bool(data.get('force')), priority=PRIORITY_LOW)
+    return job_response(job)
+
+@app.cli.command('build-reports')
+@click.argument('problem_ids', nargs=-1, type=int)
+@click.option('--format', 'formats', multiple=True, type=click.Choice(list(REPORT_FORMATS)),
+              default=('docx',), show_default=True, help='Format à produire (répétable)')
+@click.option('--workers', default=os.cpu_count() or 1, show_default=True, help='Processus de rendu')
+@click.option('--force', is_flag=True, help='Régénérer même les rapports à jour')
+def build_reports_command(problem_ids, formats, workers, force):
+    """Génère les rapports des problèmes indiqués (tous par défaut), en parallèle"""
+    if not problem_ids:
+        problem_ids = [problem_id for (problem_id,) in db.session.query(Problem.id).order_by(Problem.id)]
+    started = time.perf_counter()
+    paths, generated = build_problem_reports(list(problem_ids), formats, force=force, processes=workers)
+    elapsed = time.perf_counter() - started
+    print(f"✅ {generated} rapports générés, {len(paths) - generated} déjà à jour ({elapsed:.2f}s)")
+
 @app.route('/users')
 @login_required
+@query_budget(3)
 def users():
     q = request.args.get('q', '').strip()
     page = int(request.args.get('page', 1))
@@ -485,14 +2852,40 @@ def users():
 # Routes pour la base de connaissances
 @app.route('/knowledge')
 @login_required
+@query_budget(8)
 def knowledge():
-    articles = KnowledgeArticle.query.order_by(KnowledgeArticle.created_at.desc()).all()
-    return render_template('knowledge.html', articles=articles)
+    default_sort = 'relevance' if request.args.get('q', '').strip() else 'recent'
+    page, filters = list_arguments(KNOWLEDGE_SORTS, default_sort, KNOWLEDGE_PER_PAGE,
+                                   category=None, status=('DRAFT', 'IN_REVIEW', 'PUBLISHED'))
+    query = db.session.query(KnowledgeArticle.id, KnowledgeArticle.updated_at)
+    if filters['category']:
+        query = query.filter(KnowledgeArticle.category == filters['category'])
+    if filters['status']:
+        query = query.filter(KnowledgeArticle.status == filters['status'])
+    order = KNOWLEDGE_SORTS[filters['sort']][1] or KNOWLEDGE_SORTS['recent'][1]
+    if filters['q']:
+        ensure_search_index()
+        ranked = [article_id for article_id, _ in search_index.search(filters['q'], limit=KNOWLEDGE_SEARCH_LIMIT)]
+        query = query.filter(KnowledgeArticle.id.in_(ranked))
+        if ranked and filters['sort'] == 'relevance':
+            order = (db.case({article_id: rank for rank, article_id in enumerate(ranked)}, value=KnowledgeArticle.id),)
+    pagination = query.order_by(*order).paginate(page=page, per_page=filters['per_page'], error_out=False)
+    cards = fragment_cache.render(
+        'article', pagination.items,
+        load=lambda ids: {article.id: article for article in
+                          KnowledgeArticle.query.options(*KNOWLEDGE_LIST_LOADING).filter(KnowledgeArticle.id.in_(ids))},
+        render=render_article_fragment)
+    sorts = [(key, label) for key, (label, _) in KNOWLEDGE_SORTS.items() if key != 'relevance' or filters['q']]
+    category_args = {name: value for name, value in filters['links'].items() if name != 'category'}
+    return render_template('knowledge.html', cards=cards, pagination=pagination, filters=filters, sorts=sorts,
+                           categories=KNOWLEDGE_CATEGORIES, category_args=category_args)
 
 @app.route('/knowledge/<int:id>')
 @login_required
+@query_budget(7)
+@conditional(row_version(KnowledgeArticle))
 def view_knowledge_article(id):
-    article = KnowledgeArticle.query.get_or_404(id)
+    article = KnowledgeArticle.query.options(*KNOWLEDGE_DETAIL_LOADING).filter_by(id=id).first_or_404()
     return render_template('view_knowledge_article.html', article=article)
 
 @app.route('/knowledge/create', methods=['GET', 'POST'])
@@ -514,14 +2907,7 @@ def create_knowledge_article():
         )
         
         # Gestion des tags
-        if tags_str:
-            tag_names = [name.strip() for name in tags_str.split(',')]
-            for tag_name in tag_names:
-                tag = Tag.query.filter_by(name=tag_name).first()
-                if not tag:
-                    tag = Tag(name=tag_name)
-                    db.session.add(tag)
-                new_article.tags.append(tag)
+        new_article.tags = resolve_tags(parse_tag_names(tags_str))
         
         db.session.add(new_article)
         db.session.commit()
@@ -530,15 +2916,7 @@ def create_knowledge_article():
         files = request.files.getlist('attachments')
         for file in files:
             if file and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                file.save(filepath)
-                attachment = Attachment(
-                    filename=filename,
-                    file_path=filepath,
-                    article_id=new_article.id
-                )
-                db.session.add(attachment)
+                db.session.add(store_attachment(file, article_id=new_article.id))
         
         db.session.commit()
         
@@ -564,30 +2942,15 @@ def edit_knowledge_article(id):
         article.importance = request.form['importance']
         
         # Mise à jour des tags
-        article.tags.clear()
-        tags_str = request.form['tags']
-        if tags_str:
-            tag_names = [name.strip() for name in tags_str.split(',')]
-            for tag_name in tag_names:
-                tag = Tag.query.filter_by(name=tag_name).first()
-                if not tag:
-                    tag = Tag(name=tag_name)
-                    db.session.add(tag)
-                article.tags.append(tag)
+        article.tags = resolve_tags(parse_tag_names(request.form['tags']))
+        # Tags et pièces jointes ne modifient pas la ligne de l'article : la date sert de version à la page
+        article.updated_at = datetime.utcnow()
         
         # Gestion des nouvelles pièces jointes
         files = request.files.getlist('attachments')
         for file in files:
             if file and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                file.save(filepath)
-                attachment = Attachment(
-                    filename=filename,
-                    file_path=filepath,
-                    article_id=article.id
-                )
-                db.session.add(attachment)
+                db.session.add(store_attachment(file, article_id=article.id))
         
         db.session.commit()
         flash('Article mis à jour avec succès!', 'success')
@@ -606,19 +2969,24 @@ def delete_knowledge_article(id):
     
     try:
         # Supprimer les pièces jointes
-        for attachment in article.attachments:
-            try:
-                os.remove(attachment.file_path)
-            except OSError:
-                pass  # Ignorer les erreurs si le fichier n'existe pas
+        released = [release_attachment(attachment) for attachment in article.attachments]
         
         db.session.delete(article)
         db.session.commit()
+        schedule_blob_collection(released)
         return jsonify({'success': True})
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)}), 500
 
+@app.route('/knowledge/attachment/<int:id>')
+@login_required
+def download_attachment(id):
+    attachment = Attachment.query.get_or_404(id)
+    if not os.path.exists(attachment.file_path):
+        return render_template('404.html'), 404
+    return send_file(os.path.abspath(attachment.file_path), download_name=attachment.filename)
+
 @app.route('/knowledge/attachment/<int:id>/delete', methods=['POST'])
 @login_required
 def delete_attachment(id):
@@ -630,15 +2998,11 @@ def delete_attachment(id):
         return jsonify({'success': False, 'message': 'Permission denied'}), 403
     
     try:
-        # Supprimer le fichier physique
-        try:
-            os.remove(attachment.file_path)
-        except OSError:
-            pass  # Ignorer les erreurs si le fichier n'existe pas
-        
-        # Supprimer l'enregistrement de la base de données
-        db.session.delete(attachment)
+        # Supprimer l'enregistrement, puis le contenu s'il n'est plus référencé
+        released = release_attachment(attachment)
+        article.updated_at = datetime.utcnow()
         db.session.commit()
+        schedule_blob_collection([released])
         return jsonify({'success': True})
     except Exception as e:
         db.session.rollback()
@@ -646,87 +3010,363 @@ def delete_attachment(id):
 
 @app.route('/api/knowledge', methods=['POST'])
 @login_required
+@query_budget(8)
 def search_knowledge():
     query = request.args.get('q', '')
+    limit = min(max(request.args.get('limit', SEARCH_MAX_RESULTS, type=int), 1), 500)
     if query:
-        articles = KnowledgeArticle.query.filter(
-            db.or_(
-                KnowledgeArticle.title.contains(query),
-                KnowledgeArticle.content.contains(query),
-                KnowledgeArticle.tags.contains(query)
-            )
-        ).all()
+        articles = search_articles(query, limit=limit)
     else:
-        articles = KnowledgeArticle.query.all()
+        articles = KnowledgeArticle.query.options(selectinload(KnowledgeArticle.tags)).all()
     
     return jsonify([{
         'id': article.id,
         'title': article.title,
         'content': article.content[:200] + '...' if len(article.content) > 200 else article.content,
-        'tags': article.tags,
-        'created_at': article.created_at.strftime('%Y-%m-%d %H:%M')
+        'tags': [tag.name for tag in article.tags],
+        'created_at': api_datetime(article.created_at)
     } for article in articles])
 
 @app.route('/api/knowledge/suggest')
 @login_required
+@query_budget(5)
 def suggest_knowledge_articles():
+    """Saisie semi-automatique : titres d'articles commençant par les mots tapés"""
     query = request.args.get('q', '').strip()
     if not query:
         return jsonify([])
-    # Recherche simple : LIKE sur le titre et le contenu
-    articles = KnowledgeArticle.query.filter(
-        db.or_(
-            KnowledgeArticle.title.ilike(f'%{query}%'),
-            KnowledgeArticle.content.ilike(f'%{query}%')
-        )
-    ).order_by(KnowledgeArticle.created_at.desc()).limit(5).all()
-    return jsonify([
-        {
-            'id': a.id,
-            'title': a.title,
-            'content': a.content[:120] + ('...' if len(a.content) > 120 else '')
-        } for a in articles
-    ])
+    return Response(title_suggestions('article', query, suggest_limit()), mimetype='application/json')
 
 # API pour obtenir les données
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 500
+
+class ApiQueryError(ValueError):
+    """Paramètre de requête invalide pour les API de liste"""
+
+INCIDENT_API_FIELDS = {
+    'id': Incident.id,
+    'title': Incident.title,
+    'description': Incident.description,
+    'priority': Incident.priority,
+    'status': Incident.status,
+    'created_at': Incident.created_at,
+    'updated_at': Incident.updated_at,
+    'assigned_to': User.email,
+    'problem_id': Incident.problem_id,
+}
+INCIDENT_DEFAULT_FIELDS = ['id', 'title', 'description', 'priority', 'status', 'created_at', 'assigned_to']
+
+INCIDENT_API_JOINS = [({'assigned_to'}, User, User.id == Incident.assigned_to_id)]
+
+def _analysis_texts(model, separator):
+    # Pourquoi ou solutions concaténés dans l'ordre de leur position : agrégat sur une sous-requête triée
+    ordered = db.select(model.text) \
+        .where(model.analysis_id == RootCauseAnalysis.id) \
+        .order_by(model.position).correlate(RootCauseAnalysis).subquery()
+    return db.select(func.aggregate_strings(ordered.c.text, separator)).scalar_subquery()
+
+# Champs renvoyés en liste : concaténés par la base avec un séparateur absent des textes saisis
+API_LIST_FIELDS = {'whys', 'solutions'}
+API_LIST_SEPARATOR = '\x1f'
+
+PROBLEM_API_FIELDS = {
+    'id': Problem.id,
+    'title': Problem.title,
+    'description': Problem.description,
+    'root_cause': Problem.root_cause,
+    'status': Problem.status,
+    'created_at': Problem.created_at,
+    'updated_at': Problem.updated_at,
+    'assigned_to': User.email,
+    # Analyse des causes racines, sur demande (fields=...)
+    'rca_domain': RootCauseAnalysis.domain,
+    'rca_severity': RootCauseAnalysis.severity,
+    'whys': _analysis_texts(RcaWhy, API_LIST_SEPARATOR),
+    'solutions': _analysis_texts(RcaSolution, API_LIST_SEPARATOR),
+}
+PROBLEM_DEFAULT_FIELDS = ['id', 'title', 'description', 'root_cause', 'status', 'created_at', 'assigned_to']
+PROBLEM_API_JOINS = [
+    ({'assigned_to'}, User, User.id == Problem.assigned_to_id),
+    ({'rca_domain', 'rca_severity'} | API_LIST_FIELDS, RootCauseAnalysis, RootCauseAnalysis.problem_id == Problem.id),
+]
+
+def allow_long_concat():
+    # GROUP_CONCAT de MySQL est tronqué à 1024 octets par défaut
+    if db.session.get_bind().dialect.name == 'mysql':
+        db.session.execute(text('SET SESSION group_concat_max_len = 1048576'))
+
+def encode_cursor(created_at, row_id):
+    raw = f"{created_at.isoformat() if created_at else ''}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.rsplit('|', 1)
+        return (datetime.fromisoformat(created_at) if created_at else None), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ApiQueryError('Curseur invalide')
+
+def api_datetime(value):
+    """Format des dates des API ('2025-01-31 14:05'), sans passer par strftime"""
+    return value.isoformat(' ', 'minutes') if value is not None else None
+
+def _api_rows(rows, fields, api_fields):
+    """Lignes (colonnes techniques puis champs demandés) → dictionnaires prêts pour orjson
+
+    Les Enum sont laissés tels quels (orjson les sérialise par leur valeur) ;
+    seules les colonnes de date et les listes concaténées sont converties.
+    """
+    dates = [f for f in fields if isinstance(api_fields[f].type, db.DateTime)]
+    lists = [f for f in fields if f in API_LIST_FIELDS]
+    for row in rows:
+        item = dict(zip(fields, row[2:]))
+        for f in dates:
+            item[f] = api_datetime(item[f])
+        for f in lists:
+            item[f] = item[f].split(API_LIST_SEPARATOR) if item[f] else []
+        yield item
+
+def _parse_enum_list(enum_cls, raw, name):
+    try:
+        return [enum_cls[value.strip()] for value in raw.split(',') if value.strip()]
+    except KeyError:
+        raise ApiQueryError(f'Valeur invalide pour {name} : {raw}')
+
+def _keyset_list(model, api_fields, default_fields, joins, filters):
+    """Liste paginée par curseur (created_at, id) ou flux NDJSON pour les API incidents/problèmes
+
+    Seules les colonnes demandées sont lues : aucun objet ORM n'est hydraté.
+    """
+    fields = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()] or default_fields
+    unknown = [f for f in fields if f not in api_fields]
+    if unknown:
+        raise ApiQueryError(f"Champs inconnus : {', '.join(unknown)}")
+
+    stream = request.args.get('format') == 'ndjson' or \
+        request.accept_mimetypes.best == 'application/x-ndjson'
+    limit = request.args.get('limit', type=int)
+    if not stream:
+        limit = max(1, min(limit or API_PAGE_SIZE, API_MAX_PAGE_SIZE))
+
+    columns = [model.created_at.label('_created_at'), model.id.label('_id')]
+    columns += [api_fields[f].label(f) for f in fields]
+    query = db.session.query(*columns)
+    for needed, target, condition in joins:
+        if needed.intersection(fields):
+            query = query.outerjoin(target, condition)
+    if API_LIST_FIELDS.intersection(fields):
+        allow_long_concat()
+    for condition in filters:
+        query = query.filter(condition)
+
+    cursor = request.args.get('cursor')
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(db.or_(
+            model.created_at < created_at,
+            db.and_(model.created_at == created_at, model.id < row_id)
+        ))
+    query = query.order_by(model.created_at.desc(), model.id.desc())
+
+    if stream:
+        if limit:
+            query = query.limit(limit)
+
+        def generate():
+            # Curseur côté serveur : les lignes arrivent par lots sans tout charger en mémoire
+            for item in _api_rows(query.yield_per(STREAM_BATCH_SIZE), fields, api_fields):
+                yield app.json.dumps_bytes(item) + b'\n'
+
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    response = jsonify(list(_api_rows(rows, fields, api_fields)))
+    if has_more:
+        next_cursor = encode_cursor(rows[-1]._created_at, rows[-1]._id)
+        args = request.args.to_dict()
+        args['cursor'] = next_cursor
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = f'<{url_for(request.endpoint, **args)}>; rel="next"'
+    return response
+
+@app.errorhandler(ApiQueryError)
+def api_query_error(error):
+    return jsonify({'message': str(error)}), 400
+
 @app.route('/api/incidents')
 @login_required
+@query_budget(3)
+@conditional(table_version(Incident, 'incident'), per_row=False)
 def get_incidents():
-    incidents = Incident.query.all()
-    return jsonify([{
-        'id': incident.id,
-        'title': incident.title,
-        'description': incident.description,
-        'priority': incident.priority.value if incident.priority else None,
-        'status': incident.status.value if incident.status else None,
-        'created_at': incident.created_at.strftime('%Y-%m-%d %H:%M'),
-        'assigned_to': incident.assigned_to.email if incident.assigned_to else None
-    } for incident in incidents])
+    filters = []
+    if request.args.get('status'):
+        filters.append(Incident.status.in_(_parse_enum_list(Status, request.args['status'], 'status')))
+    if request.args.get('priority'):
+        filters.append(Incident.priority.in_(_parse_enum_list(Priority, request.args['priority'], 'priority')))
+    if request.args.get('problem_id'):
+        problem_id = request.args.get('problem_id', type=int)
+        if problem_id is None:
+            raise ApiQueryError('problem_id doit être un entier')
+        filters.append(Incident.problem_id == problem_id)
+    return _keyset_list(Incident, INCIDENT_API_FIELDS, INCIDENT_DEFAULT_FIELDS, INCIDENT_API_JOINS, filters)
 
 @app.route('/api/problems')
 @login_required
+@query_budget(4)  # + SET group_concat_max_len sous MySQL pour whys/solutions
+@conditional(table_version(Problem, 'problem'), per_row=False)
 def get_problems():
-    problems = Problem.query.all()
-    return jsonify([{
-        'id': problem.id,
-        'title': problem.title,
-        'description': problem.description,
-        'root_cause': problem.root_cause,
-        'status': problem.status.value if problem.status else None,
-        'created_at': problem.created_at.strftime('%Y-%m-%d %H:%M'),
-        'assigned_to': problem.assigned_to.email if problem.assigned_to else None
-    } for problem in problems])
+    filters = []
+    if request.args.get('status'):
+        filters.append(Problem.status.in_(_parse_enum_list(Status, request.args['status'], 'status')))
+    return _keyset_list(Problem, PROBLEM_API_FIELDS, PROBLEM_DEFAULT_FIELDS, PROBLEM_API_JOINS, filters)
+
+# Exports complets (CSV, NDJSON, XLSX) : curseur côté serveur et réponse envoyée par morceaux
+def _column_fields(model):
+    return {column.key: getattr(model, column.key) for column in model.__table__.columns}
+
+def _analysis_step(model, position):
+    return db.select(model.text).where(model.analysis_id == RootCauseAnalysis.id, model.position == position) \
+        .scalar_subquery()
+
+INCIDENT_EXPORT_FIELDS = dict(_column_fields(Incident), assigned_to=User.email)
+PROBLEM_EXPORT_FIELDS = dict(
+    _column_fields(Problem),
+    assigned_to=User.email,
+    rca_domain=RootCauseAnalysis.domain,
+    rca_severity=RootCauseAnalysis.severity,
+    **{f'why{position}': _analysis_step(RcaWhy, position) for position in range(1, WHY_COUNT + 1)},
+    solutions=_analysis_texts(RcaSolution, '\n'),
+)
+# Entité -> (modèle, champs exportables, jointures (champs qui l'exigent, table, condition))
+EXPORTS = {
+    'incidents': (Incident, INCIDENT_EXPORT_FIELDS, [
+        ({'assigned_to'}, User, User.id == Incident.assigned_to_id),
+    ]),
+    'problems': (Problem, PROBLEM_EXPORT_FIELDS, [
+        ({'assigned_to'}, User, User.id == Problem.assigned_to_id),
+        ({'rca_domain', 'rca_severity', 'solutions'} | set(INCIDENT_WHY_FIELDS),
+         RootCauseAnalysis, RootCauseAnalysis.problem_id == Problem.id),
+    ]),
+}
+
+def _export_date(value, name):
+    try:
+        return _parse_incident_date(value)
+    except (TypeError, ValueError):
+        raise ApiQueryError(f'{name} invalide : {value}')
+
+def parse_export_arguments(entity, args):
+    """Colonnes et filtres d'un export : fields, from, to (dates de création), status, priority"""
+    model, export_fields, _ = EXPORTS[entity]
+    fields = [f.strip() for f in (args.get('fields') or '').split(',') if f.strip()] or list(export_fields)
+    unknown = [f for f in fields if f not in export_fields]
+    if unknown:
+        raise ApiQueryError(f"Champs inconnus : {', '.join(unknown)}")
+    filters = []
+    if args.get('from'):
+        filters.append(model.created_at >= _export_date(args['from'], 'from'))
+    if args.get('to'):
+        end = _export_date(args['to'], 'to')
+        # Une date sans heure inclut toute la journée
+        filters.append(model.created_at < end + timedelta(days=1) if len(args['to']) == 10 else model.created_at <= end)
+    if args.get('status'):
+        filters.append(model.status.in_(_parse_enum_list(Status, args['status'], 'status')))
+    if args.get('priority'):
+        if model is not Incident:
+            raise ApiQueryError('priority ne concerne que les incidents')
+        filters.append(Incident.priority.in_(_parse_enum_list(Priority, args['priority'], 'priority')))
+    return fields, filters
+
+def export_rows(entity, fields, filters):
+    """Lignes d'un export, lues par lots de STREAM_BATCH_SIZE sans tout charger en mémoire"""
+    model, export_fields, joins = EXPORTS[entity]
+    query = db.session.query(*(export_fields[f].label(f) for f in fields))
+    for needed, target, condition in joins:
+        if needed.intersection(fields):
+            query = query.outerjoin(target, condition)
+    query = query.filter(*filters).order_by(model.created_at, model.id)
+    if 'solutions' in fields:
+        allow_long_concat()
+    # Curseur côté serveur (stream_results) : seul le lot en cours est en mémoire
+    yield from query.yield_per(STREAM_BATCH_SIZE)
+
+def export_response(entity, fmt):
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'message': f"Format non supporté, attendu : {', '.join(EXPORT_FORMATS)}"}), 404
+    fields, filters = parse_export_arguments(entity, request.args)
+    chunks = export_chunks(fmt, fields, export_rows(entity, fields, filters), app.json.dumps_bytes, sheet=entity)
+    # Pas de Content-Length : la réponse part en Transfer-Encoding: chunked
+    response = Response(stream_with_context(chunks), mimetype=EXPORT_FORMATS[fmt])
+    response.headers['Content-Disposition'] = \
+        f'attachment; filename="{entity}-{datetime.utcnow():%Y%m%d-%H%M}.{fmt}"'
+    return response
+
+@app.route('/api/incidents/export.<fmt>')
+@login_required
+@query_budget(2)
+def export_incidents(fmt):
+    return export_response('incidents', fmt)
+
+@app.route('/api/problems/export.<fmt>')
+@login_required
+@query_budget(2)
+def export_problems(fmt):
+    return export_response('problems', fmt)
+
+@app.cli.command('export')
+@click.argument('entity', type=click.Choice(sorted(EXPORTS)))
+@click.option('--output', '-o', type=click.Path(dir_okay=False), help='Fichier de sortie (sortie standard sinon)')
+@click.option('--format', 'fmt', type=click.Choice(list(EXPORT_FORMATS)),
+              help="Format (déduit de l'extension du fichier, csv sinon)")
+@click.option('--fields', help='Colonnes séparées par des virgules (toutes par défaut)')
+@click.option('--from', 'date_from', help='Créés à partir de cette date (AAAA-MM-JJ[ HH:MM])')
+@click.option('--to', 'date_to', help="Créés jusqu'à cette date incluse")
+@click.option('--status', help='Statuts séparés par des virgules')
+@click.option('--priority', help='Priorités séparées par des virgules (incidents)')
+def export_command(entity, output, fmt, fields, date_from, date_to, status, priority):
+    """Exporte tous les incidents ou problèmes en CSV, NDJSON ou XLSX, en flux"""
+    fmt = fmt or (os.path.splitext(output)[1].lstrip('.').lower() if output else '') or 'csv'
+    if fmt not in EXPORT_FORMATS:
+        raise click.UsageError(f"Format non supporté, utilisez --format ({', '.join(EXPORT_FORMATS)})")
+    args = {'fields': fields, 'from': date_from, 'to': date_to, 'status': status, 'priority': priority}
+    try:
+        fields, filters = parse_export_arguments(entity, args)
+    except ApiQueryError as e:
+        raise click.UsageError(str(e))
+    count = [0]
+
+    def counted(rows):
+        for row in rows:
+            count[0] += 1
+            yield row
+
+    started = time.perf_counter()
+    stream = open(output, 'wb') if output else click.get_binary_stream('stdout')
+    try:
+        for chunk in export_chunks(fmt, fields, counted(export_rows(entity, fields, filters)),
+                                   app.json.dumps_bytes, sheet=entity):
+            stream.write(chunk)
+    finally:
+        if output:
+            stream.close()
+    if output:
+        elapsed = time.perf_counter() - started
+        size = os.path.getsize(output) / (1024 * 1024)
+        print(f"✅ {count[0]} lignes exportées dans {output} ({size:.1f} Mo) en {elapsed:.2f}s")
 
 @app.route('/api/users')
 @login_required
+@query_budget(2)
 def get_users():
-    users = User.query.filter_by(is_active=True).all()
-    return jsonify([{
-        'id': user.id,
-        'email': user.email,
-        'team': user.team,
-        'role': user.role
-    } for user in users])
+    # Colonnes seulement : pas d'objets User à hydrater
+    fields = ('id', 'email', 'team', 'role')
+    rows = db.session.query(User.id, User.email, User.team, User.role).filter_by(is_active=True)
+    return jsonify([dict(zip(fields, row)) for row in rows])
 
 @app.route('/api/problems/suggest_root_cause', methods=['POST'])
 @login_required
@@ -755,61 +3395,51 @@ def suggest_root_cause():
 
 @app.route('/api/dashboard_stats')
 @login_required
+@query_budget(5)
 def dashboard_stats():
-    # Incidents par statut
-    incident_status_raw = db.session.query(Incident.status, func.count()).group_by(Incident.status).all()
-    incident_status_counts = {status.name: count for status, count in incident_status_raw}
-    
-    # Problèmes par statut
-    problem_status_raw = db.session.query(Problem.status, func.count()).group_by(Problem.status).all()
-    problem_status_counts = {status.name: count for status, count in problem_status_raw}
-
-    # Evolution incidents par mois (6 derniers mois)
-    incident_evolution_raw = db.session.query(
-        func.date_format(Incident.created_at, '%Y-%m'), func.count()
-    ).group_by(func.date_format(Incident.created_at, '%Y-%m')).order_by(func.date_format(Incident.created_at, '%Y-%m').desc()).limit(6).all()
-    
-    # Evolution problèmes par mois (6 derniers mois)
-    problem_evolution_raw = db.session.query(
-        func.date_format(Problem.created_at, '%Y-%m'), func.count()
-    ).group_by(func.date_format(Problem.created_at, '%Y-%m')).order_by(func.date_format(Problem.created_at, '%Y-%m').desc()).limit(6).all()
-    
-    # Transformer les Row en dictionnaires/listes qui sont JSON serializables
-    incident_evolution = [{'date': date, 'count': count} for date, count in reversed(incident_evolution_raw)]
-    problem_evolution = [{'date': date, 'count': count} for date, count in reversed(problem_evolution_raw)]
+    # Lecture des compteurs pré-agrégés (voir rebuild_rollups / _update_rollups)
+    return jsonify({
+        'incident_status': rollup_status_counts('incident'),
+        'problem_status': rollup_status_counts('problem'),
+        'incident_evolution': rollup_monthly_counts('incident'),
+        'problem_evolution': rollup_monthly_counts('problem')
+    })
 
+@app.route('/api/rca/stats')
+@login_required
+@query_budget(3)
+def rca_stats():
+    # Analyses par domaine et sévérité (index domaine/sévérité), puis causes racines les plus fréquentes
+    domain = request.args.get('domain')
+    severity = request.args.get('severity')
+    groups = db.session.query(RootCauseAnalysis.domain, RootCauseAnalysis.severity, func.count(RootCauseAnalysis.id)) \
+        .group_by(RootCauseAnalysis.domain, RootCauseAnalysis.severity).all()
+    causes = db.session.query(RootCauseAnalysis.root_cause, func.count(RootCauseAnalysis.id).label('total')) \
+        .filter(RootCauseAnalysis.root_cause.isnot(None))
+    if domain:
+        causes = causes.filter(RootCauseAnalysis.domain == domain)
+    if severity:
+        causes = causes.filter(RootCauseAnalysis.severity == severity)
+    causes = causes.group_by(RootCauseAnalysis.root_cause).order_by(db.desc('total')).limit(10).all()
     return jsonify({
-        'incident_status': incident_status_counts,
-        'problem_status': problem_status_counts,
-        'incident_evolution': incident_evolution,
-        'problem_evolution': problem_evolution
+        'groups': [{'domain': d, 'severity': s, 'count': n} for d, s, n in groups],
+        'root_causes': [{'root_cause': cause, 'count': n} for cause, n in causes]
     })
 
 @app.route('/suggest_knowledge', methods=['POST'])
 @login_required
+@query_budget(8)
 def suggest_knowledge():
-    query = request.json.get('query', '').lower()
-    if not query:
+    query = request.json.get('query', '')
+    if not query.strip():
         return jsonify([])
-    # Recherche simple par similarité dans le titre ou le contenu
-    articles = KnowledgeArticle.query.all()
-    suggestions = []
-    for article in articles:
-        if query in (article.title or '').lower() or query in (article.content or '').lower():
-            suggestions.append({
-                'id': article.id,
-                'title': article.title,
-                'url': url_for('view_knowledge_article', id=article.id)
-            })
-        elif any(word in (article.title or '').lower() or word in (article.content or '').lower() for word in query.split()):
-            suggestions.append({
-                'id': article.id,
-                'title': article.title,
-                'url': url_for('view_knowledge_article', id=article.id)
-            })
-        if len(suggestions) >= 5:
-            break
-    return jsonify(suggestions)
+    # Les articles contenant le plus de mots de la requête arrivent en tête
+    articles = search_articles(query, limit=5, prefix=True)
+    return jsonify([{
+        'id': article.id,
+        'title': article.title,
+        'url': url_for('view_knowledge_article', id=article.id)
+    } for article in articles])
 
 # Gestion des erreurs
 @app.errorhandler(404)
@@ -821,13 +3451,64 @@ def internal_error(error):
     db.session.rollback()
     return render_template('500.html'), 500
 
+# Vérification du schéma au démarrage
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+_REVISION_RE = re.compile(r"^(revision|down_revision)\s*=\s*(.+)$", re.M)
+
+def migration_heads():
+    """Révisions de tête de migrations/versions, lues sans importer Alembic"""
+    revisions, parents = set(), set()
+    versions_dir = os.path.join(MIGRATIONS_DIR, 'versions')
+    for name in os.listdir(versions_dir):
+        if not name.endswith('.py'):
+            continue
+        with open(os.path.join(versions_dir, name), encoding='utf-8') as f:
+            for key, value in _REVISION_RE.findall(f.read()):
+                ids = re.findall(r"['\"](\w+)['\"]", value)
+                (revisions if key == 'revision' else parents).update(ids)
+    return revisions - parents
+
+def check_schema(connection):
+    """État du schéma par rapport aux migrations : 'current', 'outdated', 'unversioned' ou 'empty'"""
+    inspector = sa_inspect(connection)
+    if inspector.has_table('alembic_version'):
+        current = {row[0] for row in connection.execute(text("SELECT version_num FROM alembic_version"))}
+        if current:
+            return 'current' if current == migration_heads() else 'outdated'
+    if inspector.has_table(User.__tablename__):
+        return 'unversioned'
+    return 'empty'
+
+def stamp_schema_head(connection):
+    """Marque la base à la dernière révision Alembic (après création directe des tables)"""
+    from alembic.config import Config
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+    config = Config(os.path.join(MIGRATIONS_DIR, 'alembic.ini'))
+    config.set_main_option('script_location', MIGRATIONS_DIR)
+    MigrationContext.configure(connection).stamp(ScriptDirectory.from_config(config), 'heads')
+
 # Initialisation de l'application
 def init_app():
+    """Vérifie la révision Alembic de la base ; les tables ne sont créées que sur une base vide"""
     with app.app_context():
-        # Créer toutes les tables
-        db.create_all()
-        # Créer l'admin par défaut
-        create_default_admin()
+        with db.engine.begin() as connection:
+            state = check_schema(connection)
+            if state == 'empty':
+                # Base neuve : création directe des tables, marquées à la dernière révision
+                db.metadata.create_all(connection)
+                stamp_schema_head(connection)
+                print("✅ Tables créées. Créez un administrateur : flask --app wsgi create-admin")
+            elif state == 'unversioned':
+                # Base créée avant les migrations : on complète les tables manquantes
+                db.metadata.create_all(connection)
+                print("⚠️ Base sans révision Alembic : vérifiez le schéma puis lancez flask --app wsgi db stamp head")
+            elif state == 'outdated':
+                print("⚠️ Schéma en retard sur les migrations : lancez flask --app wsgi db upgrade")
+        # Remplir les compteurs du tableau de bord s'ils n'ont jamais été calculés
+        if db.session.query(StatusRollup.entity).first() is None and (
+                db.session.query(Incident.id).first() or db.session.query(Problem.id).first()):
+            rebuild_rollups()
         print("✅ Application Flask initialisée avec succès!")
 
 def allowed_file(filename):
@@ -835,5 +3516,6 @@ def allowed_file(filename):
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 if __name__ == '__main__':
+    create_app()
     init_app()
     app.run(debug=True, host='0.0.0.0', port=5000) 
\ No newline at end of file
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark du démarrage à froid : de l'import de l'application à la première réponse
+
+Chaque mesure lance un nouvel interpréteur Python (comme un worker qui démarre)
+et chronomètre les étapes : import de app.py, create_app(), init_app() et
+première requête HTTP.
+
+    python benchmarks/cold_start.py --runs 10
+    DATABASE_URL=mysql+pymysql://... python benchmarks/cold_start.py
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PHASES = ('import', 'create_app', 'init_app', 'first_request', 'total')
+
+
+def child(path, migrations_cli):
+    """Exécuté dans un interpréteur neuf : affiche les durées mesurées en JSON"""
+    started = time.perf_counter()
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    import app as application
+    imported = time.perf_counter()
+    flask_app = application.create_app({'MIGRATIONS_CLI': migrations_cli})
+    created = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        application.init_app()
+    initialized = time.perf_counter()
+    client = flask_app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = '1'
+    response = client.get(path)
+    answered = time.perf_counter()
+    print(json.dumps({
+        'import': imported - started,
+        'create_app': created - imported,
+        'init_app': initialized - created,
+        'first_request': answered - initialized,
+        'total': answered - started,
+        'status': response.status_code,
+    }))
+
+
+def prepare_database(env):
+    """Crée le schéma et l'administrateur avant les mesures (la première création n'est pas mesurée)"""
+    code = (
+        "import sys, os; sys.path.insert(0, %r); os.chdir(%r)\n"
+        "import app\n"
+        "app.create_app(); app.init_app()\n"
+        "with app.app.app_context(): app.create_default_admin()\n"
+    ) % (ROOT, ROOT)
+    subprocess.run([sys.executable, '-c', code], env=env, check=True, stdout=subprocess.DEVNULL)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mesure du démarrage à froid de l'application")
+    parser.add_argument('--runs', type=int, default=5, help="Nombre de démarrages mesurés")
+    parser.add_argument('--path', default='/api/dashboard_stats', help="URL de la première requête")
+    parser.add_argument('--with-migrations-cli', action='store_true',
+                        help="Charger aussi Flask-Migrate/Alembic (comme la commande flask)")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.path, args.with_migrations_cli)
+        return
+
+    env = dict(os.environ)
+    temp_db = None
+    if not env.get('DATABASE_URL'):
+        temp_db = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+        env['DATABASE_URL'] = 'sqlite:///' + temp_db
+    print("🚀 Benchmark du démarrage à froid")
+    print(f"   Base: {env['DATABASE_URL'].split('@')[-1]}")
+    prepare_database(env)
+
+    command = [sys.executable, os.path.abspath(__file__), '--child', '--path', args.path]
+    if args.with_migrations_cli:
+        command.append('--with-migrations-cli')
+    results = []
+    process_times = []
+    try:
+        for _ in range(args.runs):
+            spawned = time.perf_counter()
+            output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+            process_times.append(time.perf_counter() - spawned)
+            results.append(json.loads(output.strip().splitlines()[-1]))
+    finally:
+        if temp_db:
+            os.unlink(temp_db)
+
+    print(f"\n📊 {args.runs} démarrages, première requête {args.path} → HTTP {results[-1]['status']}")
+    print(f"   {'étape':<15}{'médiane':>10}{'min':>10}{'max':>10}")
+    for phase in PHASES:
+        values = [result[phase] * 1000 for result in results]
+        print(f"   {phase:<15}{statistics.median(values):>8.1f}ms{min(values):>8.1f}ms{max(values):>8.1f}ms")
+    values = [value * 1000 for value in process_times]
+    print(f"   {'processus':<15}{statistics.median(values):>8.1f}ms{min(values):>8.1f}ms{max(values):>8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
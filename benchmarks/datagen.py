@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Générateur déterministe de données pour les benchmarks
+
+Remplit une base vide avec des incidents, problèmes, articles, tags et
+utilisateurs au texte français réaliste. Le même couple (volume, graine)
+produit toujours les mêmes données (au sel du mot de passe près).
+
+    DATABASE_URL=sqlite:////tmp/bench.db python benchmarks/datagen.py --incidents 100000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Date de référence fixe : les données ne dépendent pas du jour de génération
+REFERENCE_DATE = datetime(2026, 1, 1)
+HISTORY_DAYS = 730
+TAG_COUNT = 200
+BATCH_SIZE = 5000
+
+SUBJECTS = [
+    "Serveur de messagerie", "Base de données clients", "Réseau du site de Lyon",
+    "Application de facturation", "Portail RH", "VPN", "Imprimante du troisième étage",
+    "Service d'authentification", "Stockage partagé", "Pare-feu principal", "API de paiement",
+    "Poste de travail", "Serveur de fichiers", "Application mobile", "Entrepôt de données",
+    "Annuaire LDAP", "Wi-Fi invités", "Plateforme de sauvegarde", "Intranet", "ERP",
+]
+SYMPTOMS = [
+    "indisponible", "très lent", "renvoie une erreur 500", "ne répond plus", "saturé",
+    "redémarre en boucle", "refuse les connexions", "affiche une page blanche",
+    "perd des données", "en timeout", "génère des exceptions", "bloque les utilisateurs",
+]
+CONTEXTS = [
+    "depuis ce matin", "après la mise en production de la veille", "pour les utilisateurs du siège",
+    "en heures de pointe", "de façon intermittente", "sur l'ensemble des sites",
+    "depuis le changement de version", "lors de la clôture mensuelle",
+]
+CAUSES = [
+    "saturation de la mémoire du serveur", "disque plein sur le stockage", "certificat expiré",
+    "mise à jour défectueuse de l'application", "erreur de configuration du firewall",
+    "bug dans le code de l'application", "mot de passe du compte de service expiré",
+    "procédure de validation non respectée", "erreur humaine lors d'une intervention",
+    "bande passante insuffisante", "verrou sur la base de données", "charge cpu excessive",
+    "permission manquante sur le dossier partagé", "documentation d'exploitation obsolète",
+]
+IMPACTS = [
+    "Les utilisateurs ne peuvent plus travailler.", "Impact critique sur la production.",
+    "Quelques utilisateurs sont concernés.", "Le service client est bloqué.",
+    "Impact majeur sur la facturation.", "Pas d'impact pour les clients.",
+    "Incident urgent : les commandes ne sont plus enregistrées.",
+]
+ACTIONS = [
+    "Vérifier l'espace disque du serveur", "Redémarrer le service concerné",
+    "Contrôler les journaux d'erreurs", "Renouveler le certificat", "Purger le cache applicatif",
+    "Vérifier les règles du pare-feu", "Relancer la réplication de la base de données",
+    "Réinitialiser le mot de passe du compte de service", "Augmenter la mémoire allouée",
+    "Revenir à la version précédente", "Prévenir l'équipe réseau", "Mettre à jour la documentation",
+]
+CATEGORIES = ["Infrastructure", "Application", "Sécurité", "Réseau", "Procédure", "Poste de travail"]
+TAG_WORDS = [
+    "réseau", "vpn", "messagerie", "base-de-données", "sauvegarde", "certificat", "firewall",
+    "windows", "linux", "mysql", "facturation", "rh", "imprimante", "wifi", "sso", "ldap",
+    "stockage", "mémoire", "cpu", "disque", "performance", "sécurité", "mise-à-jour", "timeout",
+]
+TEAMS = ["Support N1", "Support N2", "Réseau", "Systèmes", "Applications", "Sécurité", "admin"]
+
+
+def volumes(incidents):
+    """Volumes de chaque table déduits du nombre d'incidents"""
+    return {
+        'incidents': incidents,
+        'problems': max(1, incidents // 20),
+        'articles': max(1, incidents // 10),
+        'users': max(20, incidents // 500),
+        'tags': TAG_COUNT,
+    }
+
+
+def _title(rng):
+    return f"{rng.choice(SUBJECTS)} {rng.choice(SYMPTOMS)} {rng.choice(CONTEXTS)}"
+
+
+def _description(rng, sentences):
+    parts = [f"{rng.choice(SUBJECTS)} {rng.choice(SYMPTOMS)} {rng.choice(CONTEXTS)}."]
+    for _ in range(sentences - 1):
+        parts.append(rng.choice(IMPACTS) if rng.random() < 0.4 else f"Cause probable : {rng.choice(CAUSES)}.")
+    return ' '.join(parts)
+
+
+def _created_at(rng):
+    return REFERENCE_DATE - timedelta(seconds=rng.randrange(HISTORY_DAYS * 86400))
+
+
+def _insert(table, rows):
+    from app import db
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(table.insert(), rows[start:start + BATCH_SIZE])
+    db.session.commit()
+
+
+def generate(incidents=10000, seed=42, progress=print):
+    """Remplit la base courante (contexte d'application requis) ; retourne les volumes créés"""
+    from werkzeug.security import generate_password_hash
+    from app import (db, User, Tag, KnowledgeArticle, Problem, Incident, Priority, Status,
+                     article_tags, article_incidents, article_problems, rebuild_rollups)
+
+    if db.session.query(User.id).first() is not None:
+        raise RuntimeError("La base n'est pas vide : le générateur n'écrit que dans une base neuve")
+
+    rng = random.Random(seed)
+    counts = volumes(incidents)
+    statuses = list(Status)
+    status_weights = [15, 15, 40, 30]
+
+    # Un seul calcul de hash : il coûte plusieurs centaines de millisecondes
+    password_hash = generate_password_hash("benchmark")
+    users = [{'email': 'admin@exemple.fr', 'password_hash': password_hash, 'is_active': True,
+              'team': 'admin', 'role': 'admin'}]
+    for i in range(2, counts['users'] + 1):
+        users.append({'email': f'utilisateur{i}@exemple.fr', 'password_hash': password_hash,
+                      'is_active': rng.random() < 0.95, 'team': rng.choice(TEAMS),
+                      'role': 'admin' if rng.random() < 0.05 else 'user'})
+    _insert(User.__table__, users)
+    progress(f"   👤 {len(users)} utilisateurs")
+
+    tags = [{'name': TAG_WORDS[i % len(TAG_WORDS)] + (f"-{i // len(TAG_WORDS)}" if i >= len(TAG_WORDS) else '')}
+            for i in range(counts['tags'])]
+    _insert(Tag.__table__, tags)
+    progress(f"   🏷️ {len(tags)} tags")
+
+    problems = []
+    for _ in range(counts['problems']):
+        created_at = _created_at(rng)
+        problems.append({
+            'title': _title(rng),
+            'description': _description(rng, rng.randint(2, 6)),
+            'root_cause': rng.choice(CAUSES) if rng.random() < 0.7 else None,
+            'status': rng.choices(statuses, status_weights)[0],
+            'created_at': created_at,
+            'updated_at': created_at,
+            'assigned_to_id': rng.randint(1, counts['users']),
+        })
+    _insert(Problem.__table__, problems)
+    progress(f"   🧩 {len(problems)} problèmes")
+
+    priorities = list(Priority)
+    rows = []
+    for i in range(counts['incidents']):
+        created_at = _created_at(rng)
+        rows.append({
+            'title': _title(rng),
+            'description': _description(rng, rng.randint(1, 5)),
+            'priority': rng.choices(priorities, [10, 30, 60])[0],
+            'status': rng.choices(statuses, status_weights)[0],
+            'created_at': created_at,
+            'updated_at': created_at,
+            'incident_date': created_at,
+            'owner': rng.choice(TEAMS),
+            'impact': rng.choice(IMPACTS),
+            'assigned_to_id': rng.randint(1, counts['users']),
+            'problem_id': rng.randint(1, counts['problems']) if rng.random() < 0.3 else None,
+        })
+        if len(rows) == BATCH_SIZE * 4:
+            _insert(Incident.__table__, rows)
+            rows = []
+    if rows:
+        _insert(Incident.__table__, rows)
+    progress(f"   🚨 {counts['incidents']} incidents")
+
+    articles, links = [], {'tags': [], 'incidents': [], 'problems': []}
+    for article_id in range(1, counts['articles'] + 1):
+        created_at = _created_at(rng)
+        steps = rng.sample(ACTIONS, rng.randint(2, 5))
+        articles.append({
+            'title': f"Résoudre : {_title(rng)}",
+            'content': _description(rng, rng.randint(3, 8)) + "\n\nÉtapes :\n" +
+                       "\n".join(f"{n}. {step}." for n, step in enumerate(steps, start=1)),
+            'category': rng.choice(CATEGORIES),
+            'status': rng.choices(['DRAFT', 'IN_REVIEW', 'PUBLISHED'], [15, 10, 75])[0],
+            'importance': rng.choice(['LOW', 'MEDIUM', 'HIGH', 'CRITICAL']),
+            'created_at': created_at,
+            'updated_at': created_at,
+            'author_id': rng.randint(1, counts['users']),
+        })
+        for tag_id in rng.sample(range(1, counts['tags'] + 1), rng.randint(1, 4)):
+            links['tags'].append({'article_id': article_id, 'tag_id': tag_id})
+        if rng.random() < 0.3:
+            links['incidents'].append({'article_id': article_id, 'incident_id': rng.randint(1, counts['incidents'])})
+        if rng.random() < 0.2:
+            links['problems'].append({'article_id': article_id, 'problem_id': rng.randint(1, counts['problems'])})
+    _insert(KnowledgeArticle.__table__, articles)
+    _insert(article_tags, links['tags'])
+    _insert(article_incidents, links['incidents'])
+    _insert(article_problems, links['problems'])
+    progress(f"   📚 {len(articles)} articles")
+
+    # Les insertions en masse ne passent pas par la session : compteurs recalculés
+    rebuild_rollups()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génère des données de benchmark dans une base vide")
+    parser.add_argument('--incidents', type=int, default=10000, help="Nombre d'incidents (10k à 1M)")
+    parser.add_argument('--seed', type=int, default=42, help="Graine du générateur")
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    import contextlib, io
+    import app as application
+    flask_app = application.create_app({'MIGRATIONS_CLI': False})
+    with contextlib.redirect_stdout(io.StringIO()):
+        application.init_app()
+
+    print(f"🏗️ Génération de {args.incidents} incidents (graine {args.seed})")
+    started = time.perf_counter()
+    with flask_app.app_context():
+        generate(args.incidents, args.seed)
+    print(f"✅ Données générées en {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
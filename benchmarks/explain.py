@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Plans d'exécution des requêtes chaudes sur les incidents et les problèmes
+
+Rejoue les routes les plus sollicitées, capture les requêtes SQL qu'elles
+émettent puis demande au moteur leur plan (EXPLAIN). Le code de sortie est 1
+si une requête parcourt entièrement une table surveillée : un index manque ou
+n'est plus utilisable après une modification de la requête.
+
+    python benchmarks/explain.py
+    python benchmarks/explain.py --verbose
+    DATABASE_URL=mysql+pymysql://... python benchmarks/explain.py
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import re
+import sys
+
+from datagen import ROOT, generate
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.data')
+WATCHED_TABLES = ('incidents', 'problems')
+
+# (nom, URL, suivre le lien de la page suivante)
+HOT_CASES = [
+    ('dashboard', '/dashboard', False),
+    ('incidents', '/incidents', False),
+    ('incidents_status', '/incidents?status=OPEN', False),
+    ('incidents_priority', '/incidents?priority=P1', False),
+    ('incidents_updated', '/incidents?sort=updated', False),
+    ('api_incidents', '/api/incidents?limit=50', True),
+    ('api_incidents_status', '/api/incidents?status=OPEN,IN_PROGRESS&limit=50', True),
+    ('api_incidents_priority', '/api/incidents?priority=P1&limit=50', True),
+    ('api_incidents_problem', '/api/incidents?problem_id=1&limit=50', False),
+    ('api_problems', '/api/problems?limit=50', True),
+    ('api_problems_status', '/api/problems?status=OPEN&limit=50', True),
+    ('dashboard_stats', '/api/dashboard_stats', False),
+]
+
+# SQLite >= 3.36 écrit « SCAN incidents », les versions antérieures « SCAN TABLE incidents »
+_SQLITE_SCAN_RE = re.compile(r'^SCAN (?:TABLE )?(\w+)$')
+_SQLITE_TABLE_RE = re.compile(r'^(?:SCAN|SEARCH) (?:TABLE )?(\w+)')
+
+
+class StatementRecorder:
+    """Garde les SELECT qui lisent une table surveillée, avec leurs paramètres"""
+
+    def __init__(self, tables):
+        self.pattern = re.compile(r'\b(?:FROM|JOIN)\s+[`"]?(' + '|'.join(tables) + r')\b', re.IGNORECASE)
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and self.pattern.search(statement):
+            self.statements.append((statement, parameters))
+
+
+def explain(connection, statement, parameters):
+    """Plan d'une requête : [(table, détail, parcours complet ?)]
+
+    table vaut None pour une ligne de plan non reconnue (sous-requête, tri temporaire...).
+    """
+    dialect = connection.dialect.name
+    if dialect == 'sqlite':
+        rows = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).fetchall()
+        plan = []
+        for row in rows:
+            detail = row[-1]
+            match = _SQLITE_TABLE_RE.match(detail)
+            plan.append((match.group(1) if match else None, detail, bool(_SQLITE_SCAN_RE.match(detail))))
+        return plan
+    if dialect == 'mysql':
+        rows = connection.exec_driver_sql('EXPLAIN ' + statement, parameters).mappings().all()
+        # Sans table (« Select tables optimized away », MAX sur un index) : ligne lue mais rien à parcourir
+        return [(row['table'] or '', f"{row['table']} type={row['type']} key={row['key']} rows={row['rows']} {row['Extra'] or ''}",
+                 row['type'] == 'ALL') for row in rows]
+    raise RuntimeError(f"EXPLAIN non pris en charge pour {dialect}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vérifie que les requêtes chaudes utilisent un index")
+    parser.add_argument('--incidents', type=int, default=10000, help="Volume de données de la base SQLite générée")
+    parser.add_argument('--seed', type=int, default=42, help="Graine du générateur")
+    parser.add_argument('--only', nargs='*', help="Ne rejouer que ces cas")
+    parser.add_argument('--verbose', action='store_true', help="Afficher le plan de chaque requête")
+    args = parser.parse_args()
+
+    if not os.getenv('DATABASE_URL'):
+        # Même base que benchmarks/suite.py
+        os.makedirs(DATA_DIR, exist_ok=True)
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(DATA_DIR, f'bench-{args.incidents}-{args.seed}.db')
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    import app as application
+    from sqlalchemy import event
+    flask_app = application.create_app({'QUERY_BUDGET_STRICT': False, 'JOB_WORKERS': 0})
+    with contextlib.redirect_stdout(io.StringIO()):
+        application.init_app()
+
+    print(f"🔎 Plans d'exécution ({', '.join(WATCHED_TABLES)})")
+    print(f"   Base: {os.environ['DATABASE_URL'].split('@')[-1]}")
+    with flask_app.app_context():
+        with application.db.engine.connect() as connection:
+            state = application.check_schema(connection)
+        if state == 'outdated':
+            # Les plans doivent porter sur les index des dernières migrations
+            from flask_migrate import upgrade
+            print("⬆️ Application des migrations...")
+            with contextlib.redirect_stderr(io.StringIO()):
+                upgrade()
+        admin = application.User.query.filter_by(role='admin').order_by(application.User.id).first()
+        if admin is None:
+            print("🏗️ Génération des données...")
+            generate(args.incidents, args.seed)
+            admin = application.User.query.filter_by(role='admin').order_by(application.User.id).first()
+        admin_id = admin.id
+        engine = application.db.engine
+
+    client = flask_app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(admin_id)
+        session['_fresh'] = True
+    flask_app.logger.disabled = True
+
+    cases = [case for case in HOT_CASES if not args.only or case[0] in args.only]
+    failures = 0
+    print(f"\n   {'cas':<28}{'requêtes':>9}   résultat")
+    for name, url, follow in cases:
+        recorder = StatementRecorder(WATCHED_TABLES)
+        event.listen(engine, 'before_cursor_execute', recorder)
+        try:
+            response = client.get(url)
+            if follow and response.headers.get('X-Next-Cursor'):
+                # Page suivante : le filtre du curseur (created_at, id) doit lui aussi suivre un index
+                client.get(url + '&cursor=' + response.headers['X-Next-Cursor'])
+        finally:
+            event.remove(engine, 'before_cursor_execute', recorder)
+
+        scans, unread, plans, seen = [], 0, [], set()
+        with engine.connect() as connection:
+            for statement, parameters in recorder.statements:
+                if statement in seen:
+                    continue
+                seen.add(statement)
+                plan = explain(connection, statement, parameters)
+                plans.append((statement, plan))
+                scans += [detail for table, detail, full_scan in plan if full_scan and table in WATCHED_TABLES]
+                # Un plan dont aucune ligne n'est comprise ne prouve rien : échec plutôt que succès
+                if all(table is None for table, _, _ in plan):
+                    unread += 1
+        if response.status_code >= 400 and not recorder.statements:
+            verdict = f"❌ erreur HTTP {response.status_code}"
+            failures += 1
+        elif unread:
+            verdict = f"❌ {unread} plan(s) illisible(s)"
+            failures += 1
+        elif scans:
+            verdict = "❌ parcours complet : " + " ; ".join(scans)
+            failures += 1
+        else:
+            verdict = "✅"
+        print(f"   {name:<28}{len(seen):>9}   {verdict}")
+        if args.verbose or scans or unread:
+            for statement, plan in plans:
+                print("      " + " ".join(statement.split())[:160])
+                for table, detail, full_scan in plan:
+                    print(f"         {'⚠️ ' if full_scan else '→ '}{detail}")
+
+    if failures:
+        print(f"\n❌ {failures} cas en échec")
+        sys.exit(1)
+    print("\n✅ Aucun parcours complet")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Suite de benchmarks : routes principales et ProblemAnalyzer sur un gros volume
+
+Génère (une fois) une base de test déterministe, chronomètre chaque cas puis
+compare la médiane et le nombre de requêtes SQL aux valeurs de référence
+enregistrées dans benchmarks/baselines.json. Le code de sortie est 1 si un cas
+régresse ou échoue.
+
+    python benchmarks/suite.py --incidents 10000
+    python benchmarks/suite.py --incidents 100000 --update-baseline
+    DATABASE_URL=mysql+pymysql://... python benchmarks/suite.py
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+
+from datagen import ROOT, generate
+
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.data')
+ANALYZER_SAMPLE = 200
+# En dessous de cet écart absolu, une variation relative n'est que du bruit
+MIN_DELTA_MS = 2.0
+
+# (nom, méthode, URL, corps JSON)
+ROUTE_CASES = [
+    ('knowledge', 'GET', '/knowledge', None),
+    ('incidents', 'GET', '/incidents', None),
+    ('dashboard_stats', 'GET', '/api/dashboard_stats', None),
+    ('suggest_knowledge', 'POST', '/suggest_knowledge', {'query': 'serveur messagerie lent'}),
+    ('similar_incidents', 'GET', '/api/incidents/5/similar', None),
+    ('api_incidents', 'GET', '/api/incidents?limit=1000', None),
+    ('api_problems', 'GET', '/api/problems?limit=1000', None),
+]
+
+
+def measure(func, repeat, warmup):
+    """Exécute func (warmup + repeat fois) ; retourne les durées mesurées, le nombre de requêtes SQL et le statut
+
+    Un cas en erreur dès la première exécution n'est pas chronométré.
+    """
+    from utils.query_budget import QueryCounter
+    for _ in range(max(1, warmup)):
+        status = func()
+        if status >= 400:
+            return [], 0, status
+    durations = []
+    for _ in range(repeat):
+        with QueryCounter(record=False) as counter:
+            started = time.perf_counter()
+            status = func()
+            durations.append((time.perf_counter() - started) * 1000)
+    return durations, counter.count, status
+
+
+def route_case(client, method, url, body, errors):
+    def call():
+        try:
+            return client.open(url, method=method, json=body).status_code
+        except Exception as e:
+            # Exception levée jusque dans le gestionnaire d'erreurs 500
+            errors[url] = f"{type(e).__name__}: {e}"
+            return 500
+    return call
+
+
+def analyzer_case(application):
+    """suggest_solutions sur un échantillon fixe de problèmes"""
+    from utils.problem_analyzer import ProblemAnalyzer
+    with application.app.app_context():
+        problems = [(p.title or '', p.description or '', p.root_cause or '')
+                    for p in application.Problem.query.order_by(application.Problem.id).limit(ANALYZER_SAMPLE)]
+
+    def call():
+        for title, description, root_cause in problems:
+            ProblemAnalyzer.suggest_solutions(title, description, [description[:80]], root_cause)
+        return 200
+    return call
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def compare(name, result, baseline, tolerance):
+    """Retourne la liste des régressions d'un cas par rapport à sa référence"""
+    if baseline is None:
+        return []
+    problems = []
+    limit = baseline['median_ms'] * (1 + tolerance)
+    if result['median_ms'] > limit and result['median_ms'] - baseline['median_ms'] > MIN_DELTA_MS:
+        problems.append(f"médiane {result['median_ms']:.1f}ms > {limit:.1f}ms (référence {baseline['median_ms']:.1f}ms)")
+    if result['queries'] > baseline['queries']:
+        problems.append(f"{result['queries']} requêtes SQL au lieu de {baseline['queries']}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks des routes et de l'analyseur de problèmes")
+    parser.add_argument('--incidents', type=int, default=10000, help="Volume de données (10k à 1M incidents)")
+    parser.add_argument('--seed', type=int, default=42, help="Graine du générateur")
+    parser.add_argument('--repeat', type=int, default=10, help="Mesures par cas")
+    parser.add_argument('--warmup', type=int, default=2, help="Exécutions non mesurées par cas")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Dégradation relative tolérée de la médiane (défaut : 0.25)")
+    parser.add_argument('--only', nargs='*', help="Ne lancer que ces cas")
+    parser.add_argument('--update-baseline', action='store_true', help="Enregistrer les résultats comme référence")
+    parser.add_argument('--output', help="Écrire les résultats en JSON dans ce fichier")
+    args = parser.parse_args()
+
+    if not os.getenv('DATABASE_URL'):
+        # Base SQLite conservée d'une exécution à l'autre pour ne générer les données qu'une fois
+        os.makedirs(DATA_DIR, exist_ok=True)
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(DATA_DIR, f'bench-{args.incidents}-{args.seed}.db')
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    import app as application
+    flask_app = application.create_app({'MIGRATIONS_CLI': False, 'QUERY_BUDGET_STRICT': False})
+    with contextlib.redirect_stdout(io.StringIO()):
+        application.init_app()
+
+    print(f"🚀 Benchmarks ({args.incidents} incidents, graine {args.seed})")
+    print(f"   Base: {os.environ['DATABASE_URL'].split('@')[-1]}")
+    with flask_app.app_context():
+        admin = application.User.query.filter_by(role='admin').order_by(application.User.id).first()
+        if admin is None:
+            print("🏗️ Génération des données...")
+            started = time.perf_counter()
+            generate(args.incidents, args.seed)
+            print(f"   terminée en {time.perf_counter() - started:.1f}s")
+            admin = application.User.query.filter_by(role='admin').order_by(application.User.id).first()
+        admin_id = admin.id
+
+    client = flask_app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(admin_id)
+        session['_fresh'] = True
+    # Les erreurs sont résumées dans le tableau plutôt que journalisées à chaque appel
+    flask_app.logger.disabled = True
+    errors = {}
+    cases = [(name, route_case(client, method, url, body, errors)) for name, method, url, body in ROUTE_CASES]
+    cases.append(('ProblemAnalyzer.suggest_solutions', analyzer_case(application)))
+    if args.only:
+        cases = [case for case in cases if case[0] in args.only]
+
+    baselines = {}
+    if os.path.exists(BASELINES_PATH):
+        with open(BASELINES_PATH, encoding='utf-8') as f:
+            baselines = json.load(f)
+    scale_baselines = baselines.get(str(args.incidents), {})
+
+    results, failures = {}, 0
+    print(f"\n   {'cas':<36}{'médiane':>10}{'p95':>10}{'SQL':>6}   résultat")
+    for name, func in cases:
+        durations, queries, status = measure(func, args.repeat, args.warmup)
+        if not durations:
+            results[name] = {'status': status}
+            failures += 1
+            print(f"   {name:<36}{'-':>10}{'-':>10}{'-':>6}   ❌ erreur HTTP {status}")
+            continue
+        result = {
+            'median_ms': round(statistics.median(durations), 2),
+            'p95_ms': round(percentile(durations, 0.95), 2),
+            'min_ms': round(min(durations), 2),
+            'queries': queries,
+            'status': status,
+        }
+        results[name] = result
+        regressions = compare(name, result, scale_baselines.get(name), args.tolerance)
+        if regressions:
+            verdict = "❌ " + " ; ".join(regressions)
+            failures += 1
+        else:
+            verdict = "✅" if name in scale_baselines else "🆕 sans référence"
+        print(f"   {name:<36}{result['median_ms']:>8.1f}ms{result['p95_ms']:>8.1f}ms{queries:>6}   {verdict}")
+
+    for url, error in errors.items():
+        print(f"   ⚠️ {url} : {error}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'incidents': args.incidents, 'seed': args.seed, 'results': results}, f, indent=2)
+    if args.update_baseline:
+        scale_baselines.update({name: {'median_ms': r['median_ms'], 'queries': r['queries']}
+                                for name, r in results.items() if 'median_ms' in r})
+        baselines[str(args.incidents)] = scale_baselines
+        with open(BASELINES_PATH, 'w', encoding='utf-8') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True, ensure_ascii=False)
+            f.write('\n')
+        print(f"\n💾 Références mises à jour dans {os.path.relpath(BASELINES_PATH, ROOT)}")
+        return
+    if failures:
+        print(f"\n❌ {failures} cas en échec")
+        sys.exit(1)
+    print("\n✅ Aucune régression")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,10 @@
-from app import app, db
+from app import create_app, db
 from sqlalchemy import text
 
 def migrate_knowledge_table():
     print("🔄 Début de la migration de la table knowledge_articles...")
     
+    app = create_app()
     with app.app_context():
         try:
             # Ajout des colonnes manquantes
@@ -0,0 +1,174 @@
+"""Analyses des causes racines (5 pourquoi et solutions) normalisées
+
+Revision ID: 4d8b2e6f1a93
+Revises: 9c3e5a17d2f0
+Create Date: 2026-10-18 18:03:44.907215
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+from utils.rca import WHY_COUNT, classify_analysis, fold_description, last_why, parse_folded_description
+
+
+# revision identifiers, used by Alembic.
+revision = '4d8b2e6f1a93'
+down_revision = '9c3e5a17d2f0'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+WHY_FIELDS = [f'why{n}' for n in range(1, WHY_COUNT + 1)]
+
+problems = sa.table('problems', sa.column('id', sa.Integer), sa.column('title', sa.String),
+                    sa.column('description', sa.Text), sa.column('root_cause', sa.Text))
+incidents = sa.table('incidents', sa.column('id', sa.Integer), sa.column('title', sa.String),
+                     sa.column('description', sa.Text), *(sa.column(field, sa.Text) for field in WHY_FIELDS))
+analyses = sa.table('root_cause_analyses', sa.column('id', sa.Integer), sa.column('problem_id', sa.Integer),
+                    sa.column('incident_id', sa.Integer), sa.column('root_cause', sa.Text),
+                    sa.column('domain', sa.String), sa.column('severity', sa.String),
+                    sa.column('created_at', sa.DateTime), sa.column('updated_at', sa.DateTime))
+rca_whys = sa.table('rca_whys', sa.column('analysis_id', sa.Integer), sa.column('position', sa.SmallInteger),
+                    sa.column('text', sa.Text))
+rca_solutions = sa.table('rca_solutions', sa.column('analysis_id', sa.Integer), sa.column('position', sa.SmallInteger),
+                         sa.column('text', sa.Text))
+
+
+def upgrade():
+    op.create_table('root_cause_analyses',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('problem_id', sa.Integer(), nullable=True),
+    sa.Column('incident_id', sa.Integer(), nullable=True),
+    sa.Column('root_cause', sa.Text(), nullable=True),
+    sa.Column('domain', sa.String(length=50), nullable=True),
+    sa.Column('severity', sa.String(length=20), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['incident_id'], ['incidents.id'], ),
+    sa.ForeignKeyConstraint(['problem_id'], ['problems.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('incident_id'),
+    sa.UniqueConstraint('problem_id')
+    )
+    with op.batch_alter_table('root_cause_analyses', schema=None) as batch_op:
+        batch_op.create_index('ix_root_cause_analyses_domain_severity', ['domain', 'severity'], unique=False)
+        batch_op.create_index(batch_op.f('ix_root_cause_analyses_severity'), ['severity'], unique=False)
+
+    op.create_table('rca_whys',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('analysis_id', sa.Integer(), nullable=False),
+    sa.Column('position', sa.SmallInteger(), nullable=False),
+    sa.Column('text', sa.Text(), nullable=False),
+    sa.ForeignKeyConstraint(['analysis_id'], ['root_cause_analyses.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('analysis_id', 'position', name='uq_rca_whys_position')
+    )
+    op.create_table('rca_solutions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('analysis_id', sa.Integer(), nullable=False),
+    sa.Column('position', sa.SmallInteger(), nullable=False),
+    sa.Column('text', sa.Text(), nullable=False),
+    sa.ForeignKeyConstraint(['analysis_id'], ['root_cause_analyses.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('analysis_id', 'position', name='uq_rca_solutions_position')
+    )
+
+    connection = op.get_bind()
+    _backfill_problems(connection)
+    _backfill_incidents(connection)
+
+
+def _insert_analyses(connection, owner, items):
+    """Insère un lot d'analyses puis leurs étapes ; items : [(propriétaire, cause racine, pourquoi, solutions, contexte)]"""
+    now = datetime.utcnow()
+    rows = []
+    for owner_id, root_cause, whys, solutions, context in items:
+        domain, severity = classify_analysis(whys, root_cause, context)
+        rows.append({owner: owner_id, 'root_cause': root_cause, 'domain': domain, 'severity': severity,
+                     'created_at': now, 'updated_at': now})
+    connection.execute(analyses.insert(), rows)
+    ids = dict(connection.execute(sa.select(analyses.c[owner], analyses.c.id)
+                                  .where(analyses.c[owner].in_([item[0] for item in items]))).all())
+    why_rows, solution_rows = [], []
+    for owner_id, _, whys, solutions, _ in items:
+        why_rows += [{'analysis_id': ids[owner_id], 'position': position, 'text': why.strip()}
+                     for position, why in enumerate(whys, 1) if why and why.strip()]
+        solution_rows += [{'analysis_id': ids[owner_id], 'position': position, 'text': solution}
+                          for position, solution in enumerate(solutions, 1)]
+    if why_rows:
+        connection.execute(rca_whys.insert(), why_rows)
+    if solution_rows:
+        connection.execute(rca_solutions.insert(), solution_rows)
+
+
+def _backfill_problems(connection):
+    """Sépare les descriptions repliées par l'ancien formulaire : description, pourquoi et solutions"""
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(problems.c.id, problems.c.title, problems.c.description, problems.c.root_cause)
+            .where(problems.c.id > last_id, problems.c.description.like('%Analyse des 5 Pourquoi:%'))
+            .order_by(problems.c.id).limit(BATCH_SIZE)).all()
+        if not rows:
+            return
+        last_id = rows[-1].id
+        items = []
+        for row in rows:
+            parsed = parse_folded_description(row.description)
+            if parsed is None:
+                continue
+            description, whys, solutions = parsed
+            connection.execute(problems.update().where(problems.c.id == row.id).values(description=description))
+            root_cause = (row.root_cause or '').strip() or last_why(whys)
+            items.append((row.id, root_cause, whys, solutions, f"{row.title or ''} {description}"))
+        if items:
+            _insert_analyses(connection, 'problem_id', items)
+
+
+def _backfill_incidents(connection):
+    last_id = 0
+    columns = [incidents.c[field] for field in WHY_FIELDS]
+    while True:
+        rows = connection.execute(
+            sa.select(incidents.c.id, incidents.c.title, incidents.c.description, *columns)
+            .where(incidents.c.id > last_id, sa.or_(*(column.isnot(None) for column in columns)))
+            .order_by(incidents.c.id).limit(BATCH_SIZE)).all()
+        if not rows:
+            return
+        last_id = rows[-1].id
+        items = []
+        for incident_id, title, description, *whys in rows:
+            if last_why(whys) is None:
+                continue
+            context = ' '.join(part for part in (title, description) if part)
+            items.append((incident_id, last_why(whys), whys, [], context))
+        if items:
+            _insert_analyses(connection, 'incident_id', items)
+
+
+def downgrade():
+    # Les pourquoi et solutions des problèmes retournent dans leur description
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.select(analyses.c.id, analyses.c.problem_id, problems.c.description)
+        .join(problems, problems.c.id == analyses.c.problem_id)).all()
+    for analysis_id, problem_id, description in rows:
+        whys = [''] * WHY_COUNT
+        for position, text in connection.execute(
+                sa.select(rca_whys.c.position, rca_whys.c.text).where(rca_whys.c.analysis_id == analysis_id)):
+            whys[position - 1] = text
+        solutions = connection.execute(
+            sa.select(rca_solutions.c.text).where(rca_solutions.c.analysis_id == analysis_id)
+            .order_by(rca_solutions.c.position)).scalars().all()
+        connection.execute(problems.update().where(problems.c.id == problem_id)
+                           .values(description=fold_description(description, whys, solutions)))
+
+    op.drop_table('rca_solutions')
+    op.drop_table('rca_whys')
+    with op.batch_alter_table('root_cause_analyses', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_root_cause_analyses_severity'))
+        batch_op.drop_index('ix_root_cause_analyses_domain_severity')
+
+    op.drop_table('root_cause_analyses')
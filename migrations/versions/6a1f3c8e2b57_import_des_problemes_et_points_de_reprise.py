@@ -0,0 +1,39 @@
+"""Import des problèmes : référence d'origine et points de reprise
+
+Revision ID: 6a1f3c8e2b57
+Revises: 4d8b2e6f1a93
+Create Date: 2026-10-18 21:12:05.318462
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6a1f3c8e2b57'
+down_revision = '4d8b2e6f1a93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('import_checkpoints',
+    sa.Column('source', sa.String(length=100), nullable=False),
+    sa.Column('records', sa.Integer(), nullable=False),
+    sa.Column('inserted', sa.Integer(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('source')
+    )
+    with op.batch_alter_table('problems', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('external_ref', sa.String(length=191), nullable=True))
+        batch_op.create_index(batch_op.f('ix_problems_external_ref'), ['external_ref'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('problems', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_problems_external_ref'))
+        batch_op.drop_column('external_ref')
+
+    op.drop_table('import_checkpoints')
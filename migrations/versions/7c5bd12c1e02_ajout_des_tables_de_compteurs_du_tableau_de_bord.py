@@ -0,0 +1,37 @@
+"""Ajout des tables de compteurs du tableau de bord
+
+Revision ID: 7c5bd12c1e02
+Revises: 55139ca5079b
+Create Date: 2026-10-18 09:12:40.512318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c5bd12c1e02'
+down_revision = '55139ca5079b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('status_rollups',
+    sa.Column('entity', sa.String(length=20), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('entity', 'status')
+    )
+    op.create_table('monthly_rollups',
+    sa.Column('entity', sa.String(length=20), nullable=False),
+    sa.Column('month', sa.String(length=7), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('entity', 'month')
+    )
+    # Les compteurs sont remplis par `flask rebuild-rollups`
+
+
+def downgrade():
+    op.drop_table('monthly_rollups')
+    op.drop_table('status_rollups')
@@ -0,0 +1,44 @@
+"""Index composites des listes d'incidents et de problèmes
+
+Revision ID: 9c3e5a17d2f0
+Revises: e58d2f7a1b64
+Create Date: 2026-10-18 17:12:08.334150
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c3e5a17d2f0'
+down_revision = 'e58d2f7a1b64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('incidents', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_incidents_created_at'), ['created_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_incidents_assigned_to_id'), ['assigned_to_id'], unique=False)
+        batch_op.create_index('ix_incidents_status_created_at', ['status', 'created_at'], unique=False)
+        batch_op.create_index('ix_incidents_priority_created_at', ['priority', 'created_at'], unique=False)
+        batch_op.create_index('ix_incidents_problem_id_created_at', ['problem_id', 'created_at'], unique=False)
+
+    with op.batch_alter_table('problems', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_problems_created_at'), ['created_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_problems_assigned_to_id'), ['assigned_to_id'], unique=False)
+        batch_op.create_index('ix_problems_status_created_at', ['status', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('problems', schema=None) as batch_op:
+        batch_op.drop_index('ix_problems_status_created_at')
+        batch_op.drop_index(batch_op.f('ix_problems_assigned_to_id'))
+        batch_op.drop_index(batch_op.f('ix_problems_created_at'))
+
+    with op.batch_alter_table('incidents', schema=None) as batch_op:
+        batch_op.drop_index('ix_incidents_problem_id_created_at')
+        batch_op.drop_index('ix_incidents_priority_created_at')
+        batch_op.drop_index('ix_incidents_status_created_at')
+        batch_op.drop_index(batch_op.f('ix_incidents_assigned_to_id'))
+        batch_op.drop_index(batch_op.f('ix_incidents_created_at'))
@@ -0,0 +1,32 @@
+"""Index sur la date de mise à jour des incidents et problèmes
+
+Revision ID: e58d2f7a1b64
+Revises: b71e4c09a3d5
+Create Date: 2026-10-18 16:05:51.203417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e58d2f7a1b64'
+down_revision = 'b71e4c09a3d5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('incidents', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_incidents_updated_at'), ['updated_at'], unique=False)
+
+    with op.batch_alter_table('problems', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_problems_updated_at'), ['updated_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('problems', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_problems_updated_at'))
+
+    with op.batch_alter_table('incidents', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_incidents_updated_at'))
@@ -32,14 +32,16 @@ def main():
     
     # Importer et démarrer l'application
     try:
-        from app import app, init_app
+        from app import create_app, init_app
         
         print("\n🔧 Initialisation de l'application...")
+        app = create_app()
         init_app()
         
         print("\n🌐 Démarrage du serveur...")
         print("   URL: http://localhost:5000")
-        print("   Admin: admin@admin.com / admin123")
+        print("   Admin: flask --app wsgi create-admin (si aucun compte n'existe)")
+        print("   Production: python serve.py")
         print("\nAppuyez sur Ctrl+C pour arrêter le serveur")
         
         # Démarrer l'application
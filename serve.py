@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Serveur de production multi-processus pour l'application ITIL Management System
+
+L'application est chargée une seule fois dans le processus maître (import des
+modules, création des tables, index de recherche, de similarité et des titres), puis les workers sont
+créés par fork. Chaque worker repart d'un pool de connexions vide et exécute
+aussi les tâches d'arrière-plan (JOB_WORKERS threads, 0 pour les confier à
+`flask run-jobs`).
+
+    python serve.py --workers 4 --threads 8 --live-streams 50
+
+Les flux de mises à jour en direct (/api/live) gardent chacun un thread : ils ont
+leurs propres threads (--live-streams par worker), en plus de ceux des requêtes.
+
+Rechargement sans coupure : kill -HUP <pid du maître> relance les workers.
+Pour charger une nouvelle version du code : kill -USR2 <pid> puis kill -QUIT
+sur l'ancien maître une fois le nouveau prêt.
+"""
+
+import argparse
+import os
+import sys
+from dotenv import load_dotenv
+
+# Charger les variables d'environnement
+load_dotenv()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serveur de production ITIL (gunicorn, pré-fork)")
+    parser.add_argument('--bind', default=os.getenv('ITIL_BIND', '0.0.0.0:5000'),
+                        help="Adresse d'écoute (défaut : 0.0.0.0:5000)")
+    parser.add_argument('--workers', type=int, default=int(os.getenv('WEB_CONCURRENCY', os.cpu_count() or 1)),
+                        help="Nombre de processus (défaut : nombre de cœurs)")
+    parser.add_argument('--threads', type=int, default=int(os.getenv('ITIL_THREADS', '4')),
+                        help="Threads par processus (défaut : 4)")
+    parser.add_argument('--live-streams', type=int, default=None,
+                        help="Flux /api/live ouverts par processus, en plus des threads "
+                             "(défaut : LIVE_MAX_STREAMS de l'application, 100)")
+    parser.add_argument('--timeout', type=int, default=int(os.getenv('ITIL_TIMEOUT', '60')),
+                        help="Délai avant qu'un worker bloqué soit relancé (secondes)")
+    parser.add_argument('--graceful-timeout', type=int, default=int(os.getenv('ITIL_GRACEFUL_TIMEOUT', '30')),
+                        help="Délai laissé aux requêtes en cours lors d'un rechargement (secondes)")
+    parser.add_argument('--max-requests', type=int, default=int(os.getenv('ITIL_MAX_REQUESTS', '0')),
+                        help="Relancer un worker après N requêtes (0 : jamais)")
+    parser.add_argument('--pid', default=os.getenv('ITIL_PIDFILE'),
+                        help="Fichier où écrire le PID du maître (pour kill -HUP)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        print("❌ gunicorn n'est pas installé (il n'est disponible que sous Linux/macOS)")
+        print("Installez-le avec : pip install gunicorn, ou utilisez python run.py en développement")
+        sys.exit(1)
+
+    from app import (create_app, default_config, init_app, ensure_search_index, ensure_similarity_index,
+                     ensure_title_index, title_indexes, stop_job_runner, db)
+
+    # Une seule valeur pour les threads des flux et le plafond appliqué par l'application
+    if args.live_streams is None:
+        args.live_streams = default_config()['LIVE_MAX_STREAMS']
+
+    class ITILServer(BaseApplication):
+        def __init__(self, options):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            # Une connexion par thread : requêtes et tâches d'arrière-plan du worker
+            job_workers = int(os.getenv('JOB_WORKERS', '2'))
+            app = create_app({
+                'MIGRATIONS_CLI': False,
+                'JOB_WORKERS': job_workers,
+                'LIVE_MAX_STREAMS': args.live_streams,
+                'SQLALCHEMY_ENGINE_OPTIONS': {
+                    'pool_size': args.threads + job_workers,
+                    'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '2')),
+                    'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '3600')),
+                    'pool_pre_ping': True,
+                },
+            })
+            init_app()
+            with app.app_context():
+                ensure_search_index()
+                ensure_similarity_index()
+                for kind in title_indexes:
+                    ensure_title_index(kind)
+                db.session.remove()
+                # Aucune connexion ouverte par le maître ne doit être partagée avec les workers
+                db.engine.dispose()
+            return app
+
+    def post_fork(server, worker):
+        # Le worker abandonne le pool hérité sans fermer les connexions du parent
+        with application.wsgi().app_context():
+            db.engine.dispose(close=False)
+
+    def worker_exit(server, worker):
+        # Laisse les tâches d'arrière-plan en cours se terminer (sinon elles seront reprises)
+        stop_job_runner(timeout=args.graceful_timeout)
+
+    options = {
+        'bind': args.bind,
+        'workers': args.workers,
+        'threads': args.threads + args.live_streams,
+        'worker_class': 'gthread' if args.threads + args.live_streams > 1 else 'sync',
+        'timeout': args.timeout,
+        'graceful_timeout': args.graceful_timeout,
+        'max_requests': args.max_requests,
+        'max_requests_jitter': args.max_requests // 10,
+        'preload_app': True,
+        'post_fork': post_fork,
+        'worker_exit': worker_exit,
+        'pidfile': args.pid,
+        'accesslog': '-',
+    }
+
+    print("🚀 Démarrage du serveur de production ITIL Management System")
+    print(f"   Adresse: {args.bind}")
+    print(f"   Workers: {args.workers} × {args.threads} threads (+ {args.live_streams} flux en direct)")
+    application = ITILServer(options)
+    application.run()
+
+
+if __name__ == "__main__":
+    main()
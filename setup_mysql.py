@@ -35,8 +35,9 @@ def setup_database():
 
     # --- Initialisation de l'application Flask et des tables ---
     # On importe ici pour éviter les problèmes d'imports circulaires/contextuels
-    from app import app, db, User
+    from app import create_app, db, User
 
+    app = create_app()
     with app.app_context():
         # Créer toutes les tables
         db.create_all()
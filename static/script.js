@@ -336,4 +336,114 @@ document.addEventListener('DOMContentLoaded', () => {
     if (document.getElementById('incidentStatusChart')) {
         updateDashboardCharts();
     }
-}); 
\ No newline at end of file
+}); 
+// Mises à jour en direct : flux SSE (/api/live), long-polling (/api/live/poll) en secours
+(function () {
+    const totals = document.querySelectorAll('[data-live-total]');
+    const list = document.querySelector('[data-live-list]');
+    if (!totals.length && !list) {
+        return;
+    }
+    const statusBadges = { OPEN: 'primary', IN_PROGRESS: 'warning', RESOLVED: 'success', CLOSED: 'secondary' };
+    const counters = {};
+    let lastEventId = null;
+    let pendingChanges = 0;
+
+    function showTotals(entity) {
+        const element = document.querySelector(`[data-live-total="${entity}"]`);
+        if (element && counters[entity]) {
+            element.textContent = Object.values(counters[entity]).reduce((sum, count) => sum + count, 0);
+        }
+    }
+
+    function applyCounters(data) {
+        Object.entries(data.status || {}).forEach(([entity, byStatus]) => {
+            if (data.absolute) {
+                counters[entity] = Object.assign({}, byStatus);
+            } else if (counters[entity]) {
+                Object.entries(byStatus).forEach(([status, delta]) => {
+                    counters[entity][status] = (counters[entity][status] || 0) + delta;
+                });
+            }
+            showTotals(entity);
+        });
+    }
+
+    function notify(count) {
+        const notice = list.querySelector('[data-live-notice]');
+        if (!notice) {
+            return;
+        }
+        pendingChanges += count;
+        notice.querySelector('[data-live-notice-text]').textContent = pendingChanges > 0
+            ? `${pendingChanges} nouvel(s) élément(s) depuis l'affichage de la page.`
+            : 'La liste a changé depuis l\'affichage de la page.';
+        notice.classList.remove('d-none');
+    }
+
+    function applyRow(entity, data) {
+        if (!list || list.dataset.liveList !== entity) {
+            return;
+        }
+        const row = data.id ? list.querySelector(`[data-live-id="${data.id}"]`) : null;
+        if (data.op === 'created') {
+            notify(1);
+        } else if (data.op === 'bulk') {
+            notify(data.count);
+        } else if (data.op === 'reload') {
+            notify(0);
+        } else if (row && data.op === 'deleted') {
+            row.classList.add('opacity-50');
+        } else if (row && data.op === 'updated') {
+            row.querySelector('[data-live-field="title"]').textContent = data.title || '';
+            const badge = row.querySelector('[data-live-field="status"]');
+            badge.textContent = data.status;
+            badge.className = `badge bg-${statusBadges[data.status] || 'secondary'}`;
+        }
+    }
+
+    function handle(kind, data) {
+        if (kind === 'counters') {
+            applyCounters(data);
+        } else if (kind === 'reset') {
+            if (list) {
+                notify(0);
+            }
+        } else {
+            applyRow(kind, data);
+        }
+    }
+
+    function poll() {
+        const query = lastEventId ? `?last_event_id=${encodeURIComponent(lastEventId)}` : '';
+        fetch(`/api/live/poll${query}`)
+            .then(response => response.ok ? response.json() : Promise.reject(response.status))
+            .then(body => {
+                lastEventId = body.last_event_id;
+                if (body.reset) {
+                    handle('reset', {});
+                }
+                body.events.forEach(item => handle(item.event, item.data));
+                setTimeout(poll, body.retry * 1000);
+            })
+            .catch(() => setTimeout(poll, 10000));
+    }
+
+    if (!window.EventSource) {
+        poll();
+        return;
+    }
+    const source = new EventSource('/api/live');
+    ['counters', 'incident', 'problem', 'reset'].forEach(kind => {
+        source.addEventListener(kind, event => {
+            lastEventId = event.lastEventId;
+            handle(kind, JSON.parse(event.data));
+        });
+    });
+    source.onerror = () => {
+        // Flux refusé (trop de clients) ou coupé par un proxy : bascule en long-polling
+        if (source.readyState === EventSource.CLOSED) {
+            poll();
+        }
+    };
+})();
@@ -0,0 +1,18 @@
+import pytest
+
+from app import create_app, db
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    """Application sur une base SQLite jetable, sans tâches d'arrière-plan"""
+    path = tmp_path_factory.mktemp('db') / 'itil.db'
+    flask_app = create_app({
+        'TESTING': True,
+        'JOB_WORKERS': 0,
+        'MIGRATIONS_CLI': False,
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{path}',
+    })
+    with flask_app.app_context():
+        db.create_all()
+    return flask_app
@@ -0,0 +1,129 @@
+import pytest
+from flask import g
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import selectinload
+
+from app import (Incident, KnowledgeArticle, Priority, Problem, RootCauseAnalysis, Status, Tag, User,
+                 apply_analysis, db, query_budget)
+from utils.query_budget import QueryBudgetExceeded, QueryCounter
+
+
+@pytest.fixture(scope='module')
+def problems(app):
+    with app.app_context():
+        for n in range(3):
+            problem = Problem(title=f'Problème {n}')
+            problem.incidents = [Incident(title=f'Incident {n}.{m}') for m in range(2)]
+            db.session.add(problem)
+        db.session.commit()
+
+
+@query_budget(2)
+def lazy_view():
+    # N+1 : une requête par problème pour charger ses incidents
+    return [len(problem.incidents) for problem in Problem.query.all()]
+
+
+@query_budget(2)
+def eager_view():
+    return [len(problem.incidents) for problem in Problem.query.options(selectinload(Problem.incidents))]
+
+
+def test_n_plus_one_exceeds_budget(app, problems):
+    with app.test_request_context('/'):
+        app.preprocess_request()
+        with pytest.raises(QueryBudgetExceeded) as error:
+            lazy_view()
+    assert error.value.count == 4
+    assert error.value.budget == 2
+    assert len(error.value.statements) == 4
+
+
+def test_eager_loading_fits_budget(app, problems):
+    with app.test_request_context('/'):
+        app.preprocess_request()
+        assert eager_view() == [2, 2, 2]
+        assert g.query_counter.count == 2
+
+
+def test_failing_statement_is_counted_and_timed(app):
+    with app.app_context(), QueryCounter() as counter:
+        with pytest.raises(OperationalError):
+            db.session.execute(text('SELECT * FROM table_inexistante'))
+        db.session.rollback()
+        failed = counter.duration
+        db.session.execute(text('SELECT 1'))
+    assert counter.count == 2
+    assert 0 < failed <= counter.duration < 1
+
+
+@pytest.fixture(scope='module')
+def seeded(app):
+    """Quelques lignes de chaque type, avec auteurs, étiquettes et assignés : une
+    relation chargée ligne par ligne dépasse alors le budget de la vue"""
+    with app.app_context():
+        users = [User(email=f'budget{n}@example.com', password_hash='x', team='N2') for n in range(3)]
+        tags = [Tag(name=f'budget-{n}') for n in range(3)]
+        problems = [Problem(title=f'Problème budget {n}', status=Status.OPEN, assigned_to=users[n % 3])
+                    for n in range(4)]
+        for n, problem in enumerate(problems):
+            problem.analysis = apply_analysis(RootCauseAnalysis(), [f'Pourquoi {n}', 'Ensuite'], [f'Solution {n}'],
+                                              context='réseau')
+        incidents = [Incident(title=f'Incident budget {n}', priority=Priority.P2, status=Status.OPEN,
+                              assigned_to=users[n % 3], problem=problems[n % 4]) for n in range(12)]
+        articles = [KnowledgeArticle(title=f'Article budget {n}', content='Contenu', category='Réseau',
+                                     status='PUBLISHED', author=users[n % 3], validator=users[(n + 1) % 3],
+                                     tags=tags[:n % 3 + 1], related_incidents=incidents[n:n + 2],
+                                     related_problems=problems[n % 4:n % 4 + 1]) for n in range(12)]
+        db.session.add_all(users + tags + problems + incidents + articles)
+        db.session.commit()
+        return {'user': users[0].id, 'article': articles[0].id, 'incident': incidents[-1].id}
+
+
+@pytest.fixture
+def client(app, seeded, monkeypatch):
+    monkeypatch.setitem(app.config, 'QUERY_BUDGET_STRICT', True)
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(seeded['user'])
+        session['_fresh'] = True
+    return client
+
+
+@pytest.mark.parametrize('url', [
+    '/incidents',
+    '/incidents?q=budget&priority=P2',
+    '/knowledge',
+    '/knowledge?q=budget',
+    '/knowledge/{article}',
+    '/api/incidents',
+    '/api/problems',
+    '/api/problems?fields=id,rca_domain,rca_severity,whys,solutions',
+    '/api/dashboard_stats',
+])
+def test_list_routes_fit_budget(client, seeded, url):
+    # En mode strict un dépassement lève QueryBudgetExceeded à travers le client de test
+    response = client.get(url.format(**seeded))
+    assert response.status_code == 200
+
+
+def test_incident_form_actions_are_not_budgeted(app, client, seeded):
+    response = client.post('/incidents', data={'action': 'create', 'title': 'Incident formulaire',
+                                               'priority': 'P3', 'status': 'OPEN'})
+    assert response.status_code == 302
+    incident_id = seeded['incident']
+    response = client.post('/incidents', data={'action': f'edit_{incident_id}', f'title_{incident_id}': 'Modifié'})
+    assert response.status_code == 302
+    response = client.post('/incidents', data={'action': f'delete_{incident_id}'})
+    assert response.status_code == 302
+    with app.app_context():
+        assert db.session.get(Incident, incident_id) is None
+
+
+def test_problem_api_returns_analysis(client):
+    response = client.get('/api/problems?limit=1000&fields=title,rca_domain,whys,solutions')
+    problem = next(item for item in response.get_json() if item['title'] == 'Problème budget 2')
+    assert problem['whys'] == ['Pourquoi 2', 'Ensuite']
+    assert problem['solutions'] == ['Solution 2']
+    assert problem['rca_domain']
@@ -0,0 +1,41 @@
+import io
+import json
+
+import pytest
+
+from utils.streaming import iter_json_array
+
+
+def test_elements_split_across_chunks():
+    items = [{'id': n, 'ok': n % 2 == 0, 'value': None, 'ratio': n / 7, 'text': 'éè\\"'} for n in range(200)]
+    items += [12345, -1.5e3, True, False, None, 'fin']
+    stream = io.BytesIO(json.dumps(items).encode('utf-8'))
+    assert list(iter_json_array(stream, chunk_size=7)) == items
+
+
+def test_bad_element_in_large_stream_fails_without_reading_to_the_end():
+    good = ',\n'.join(json.dumps({'id': n, 'title': f'incident {n}'}) for n in range(20000))
+    data = f'[{good},\n{{"id": 20000, "title" "sans deux-points"}},\n{good}]'.encode('utf-8')
+    stream = io.BytesIO(data)
+    read = []
+    with pytest.raises(ValueError, match='JSON invalide'):
+        for item in iter_json_array(stream, chunk_size=4096):
+            read.append(item)
+    assert len(read) == 20000
+    # L'erreur est levée dès le morceau qui contient l'élément invalide
+    assert stream.tell() < len(data) / 2 + 2 * 4096
+
+
+def test_unterminated_element_is_bounded():
+    data = b'[{"id": 1}, {"title": "' + b'x' * 100000
+    stream = io.BytesIO(data)
+    with pytest.raises(ValueError, match='plus de 1000'):
+        list(iter_json_array(stream, chunk_size=512, max_item_size=1000))
+    assert stream.tell() < 4096
+
+
+def test_truncated_document():
+    with pytest.raises(ValueError, match='tronqué'):
+        list(iter_json_array(io.BytesIO(b'[{"id": 1}, {"id": tr'), chunk_size=4))
+    with pytest.raises(ValueError, match='non terminé'):
+        list(iter_json_array(io.BytesIO(b'[{"id": 1}'), chunk_size=4))
@@ -0,0 +1,244 @@
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+import bisect
+import heapq
+import threading
+
+from utils.search_index import STOPWORDS, TOKEN_RE, fold
+
+# Nombre de documents gardés à chaque nœud : plafond du nombre de suggestions
+TOP_SIZE = 20
+
+
+class _Node:
+    __slots__ = ('children', 'docs', 'top')
+
+    def __init__(self):
+        self.children: Dict[str, '_Node'] = {}
+        self.docs: set = set()  # documents dont un mot se termine ici
+        # Meilleurs documents du sous-arbre, (-score, id) croissants ; None : à recalculer
+        self.top: Optional[List[Tuple[float, int]]] = []
+
+
+class PrefixIndex:
+    """Arbre de préfixes des mots des titres, pour la saisie semi-automatique
+
+    Chaque nœud garde les TOP_SIZE meilleurs documents (score le plus haut) de
+    son sous-arbre : une suggestion sur un seul mot ne fait que descendre
+    l'arbre. L'index est mis à jour document par document ; un nœud qui perd un
+    de ses meilleurs documents alors que sa liste était pleine est recalculé à
+    partir de ses enfants à la lecture suivante.
+    """
+
+    def __init__(self, size: int = TOP_SIZE):
+        self.size = size
+        self._lock = threading.Lock()
+        self._root = _Node()
+        self._docs: Dict[int, Tuple[float, Tuple[str, ...], Any]] = {}
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, doc_id: int) -> bool:
+        return doc_id in self._docs
+
+    @staticmethod
+    def words(title: str) -> Tuple[str, ...]:
+        """Mots normalisés d'un titre (minuscules, sans accents ni mots vides)"""
+        return tuple(dict.fromkeys(t for t in TOKEN_RE.findall(fold(title)) if t not in STOPWORDS))
+
+    @staticmethod
+    def terms(query: str) -> Tuple[str, ...]:
+        """Termes d'une saisie : mots déjà tapés sans les mots vides (ils ne sont pas
+        indexés), puis le dernier mot tel quel, traité comme un préfixe"""
+        tokens = TOKEN_RE.findall(fold(query))
+        return tuple(t for t in tokens[:-1] if t not in STOPWORDS) + tuple(tokens[-1:])
+
+    def add(self, doc_id: int, title: str, score: float, payload: Any) -> None:
+        """Indexe (ou réindexe) un document ; payload est renvoyé tel quel par suggest()"""
+        words = self.words(title)
+        with self._lock:
+            self._remove_locked(doc_id)
+            self._docs[doc_id] = (score, words, payload)
+            entry = (-score, doc_id)
+            seen = set()
+            for word in words:
+                node = self._root
+                for char in word:
+                    child = node.children.get(char)
+                    if child is None:
+                        child = node.children[char] = _Node()
+                    node = child
+                    if id(node) not in seen:
+                        seen.add(id(node))
+                        self._offer(node, entry)
+                node.docs.add(doc_id)
+
+    def _offer(self, node: _Node, entry: Tuple[float, int]) -> None:
+        top = node.top
+        if top is None:
+            return
+        if len(top) < self.size or entry < top[-1]:
+            bisect.insort(top, entry)
+            if len(top) > self.size:
+                top.pop()
+
+    def remove(self, doc_id: int) -> None:
+        """Retire un document de l'index"""
+        with self._lock:
+            self._remove_locked(doc_id)
+
+    def _remove_locked(self, doc_id: int) -> None:
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return
+        score, words, _ = doc
+        entry = (-score, doc_id)
+        seen = set()
+        for word in words:
+            path = [self._root]
+            for char in word:
+                path.append(path[-1].children[char])
+            path[-1].docs.discard(doc_id)
+            for node in path[1:]:
+                if id(node) in seen or node.top is None:
+                    continue
+                seen.add(id(node))
+                position = bisect.bisect_left(node.top, entry)
+                if position < len(node.top) and node.top[position] == entry:
+                    if len(node.top) == self.size:
+                        node.top = None  # d'autres documents du sous-arbre peuvent remonter
+                    else:
+                        del node.top[position]
+            # Branches devenues vides
+            for depth in range(len(word), 0, -1):
+                node = path[depth]
+                if node.docs or node.children:
+                    break
+                del path[depth - 1].children[word[depth - 1]]
+
+    def clear(self) -> None:
+        """Vide complètement l'index"""
+        with self._lock:
+            self._root = _Node()
+            self._docs = {}
+            self.ready = False
+
+    def _find(self, prefix: str) -> Optional[_Node]:
+        node = self._root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def _top(self, node: _Node) -> List[Tuple[float, int]]:
+        if node.top is None:
+            candidates = {(-self._docs[doc_id][0], doc_id) for doc_id in node.docs}
+            for child in node.children.values():
+                candidates.update(self._top(child))
+            node.top = heapq.nsmallest(self.size, candidates)
+        return node.top
+
+    def _subtree_docs(self, node: _Node) -> set:
+        docs = set(node.docs)
+        stack = list(node.children.values())
+        while stack:
+            child = stack.pop()
+            docs.update(child.docs)
+            stack.extend(child.children.values())
+        return docs
+
+    def _matches(self, entries, terms: List[str], limit: int) -> List[Tuple[float, int]]:
+        matches = []
+        for entry in entries:
+            words = self._docs[entry[1]][1]
+            if all(any(word.startswith(term) for word in words) for term in terms):
+                matches.append(entry)
+                if len(matches) == limit:
+                    break
+        return matches
+
+    def suggest(self, query: str, limit: int = 5) -> List[Any]:
+        """Documents dont les mots commencent par chacun des termes saisis, les meilleurs d'abord
+
+        Un seul terme : lecture directe de la liste du nœud. Plusieurs termes :
+        les documents du terme le plus long (le plus sélectif) sont filtrés par
+        les autres, d'abord parmi les meilleurs du nœud, puis s'il en manque dans
+        tout son sous-arbre, par score décroissant.
+        """
+        terms = list(self.terms(query))
+        if not terms:
+            return []
+        limit = min(limit, self.size)
+        with self._lock:
+            if len(terms) == 1:
+                node = self._find(terms[0])
+                return [self._docs[doc_id][2] for _, doc_id in self._top(node)[:limit]] if node else []
+            terms.sort(key=len, reverse=True)
+            node = self._find(terms[0])
+            if node is None:
+                return []
+            top = self._top(node)
+            matches = self._matches(top, terms[1:], limit)
+            if len(matches) < limit and len(top) == self.size:
+                # Les meilleurs du nœud ne suffisent pas : parcours du sous-arbre
+                entries = sorted((-self._docs[doc_id][0], doc_id) for doc_id in self._subtree_docs(node))
+                matches = self._matches(entries, terms[1:], limit)
+            return [self._docs[doc_id][2] for _, doc_id in matches]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            nodes, stack = 0, [self._root]
+            while stack:
+                node = stack.pop()
+                nodes += 1
+                stack.extend(node.children.values())
+        return {'documents': len(self._docs), 'nodes': nodes}
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class Coalescer:
+    """Regroupe les appels identiques simultanés
+
+    Le premier appelant d'une clé calcule le résultat ; ceux qui arrivent pendant
+    le calcul l'attendent et reçoivent le même résultat (ou la même exception).
+    Rien n'est gardé une fois le calcul terminé.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.coalesced = 0
+
+    def run(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = compute()
+        except BaseException as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
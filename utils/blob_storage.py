@@ -0,0 +1,86 @@
+from typing import IO, Iterator, Tuple
+import hashlib
+import os
+import tempfile
+import time
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class BlobStore:
+    """Stockage de fichiers adressé par contenu (SHA-256)
+
+    Chaque contenu est écrit une seule fois sous <racine>/ab/cd/<sha256>.
+    L'écriture se fait en deux temps : `write_temp` copie le flux par morceaux
+    dans un fichier temporaire en calculant l'empreinte, puis `commit` le met en
+    place (ou le supprime si le contenu existe déjà).
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.tmp_dir = os.path.join(root, 'tmp')
+
+    def path_for(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256[:2], sha256[2:4], sha256)
+
+    def exists(self, sha256: str) -> bool:
+        return os.path.exists(self.path_for(sha256))
+
+    def write_temp(self, stream: IO, chunk_size: int = CHUNK_SIZE) -> Tuple[str, int, str]:
+        """Copie le flux dans un fichier temporaire ; retourne (sha256, taille, chemin temporaire)"""
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                while True:
+                    chunk = stream.read(chunk_size)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return digest.hexdigest(), size, tmp_path
+
+    def commit(self, sha256: str, tmp_path: str) -> str:
+        """Met le fichier temporaire à sa place définitive (sauf si le contenu y est déjà)"""
+        final_path = self.path_for(sha256)
+        if os.path.exists(final_path):
+            os.unlink(tmp_path)
+            # Rajeunit le fichier : le balayage des fichiers sans référence l'épargne
+            os.utime(final_path)
+        else:
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            os.replace(tmp_path, final_path)
+        return final_path
+
+    def discard(self, tmp_path: str) -> None:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+
+    def stored(self, min_age: float = 0) -> Iterator[str]:
+        """Empreintes des contenus sur disque non modifiés depuis au moins `min_age` secondes"""
+        if not os.path.isdir(self.root):
+            return
+        limit = time.time() - min_age
+        for level1 in os.scandir(self.root):
+            if not level1.is_dir() or len(level1.name) != 2:
+                continue  # le dossier tmp et tout ce qui n'est pas un préfixe d'empreinte
+            for level2 in os.scandir(level1.path):
+                if not level2.is_dir():
+                    continue
+                for entry in os.scandir(level2.path):
+                    if entry.is_file() and entry.stat().st_mtime <= limit:
+                        yield entry.name
+
+    def delete(self, sha256: str) -> None:
+        try:
+            os.unlink(self.path_for(sha256))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,70 @@
+from typing import Iterable, Iterator, Optional
+import zlib
+
+try:
+    import brotli
+except ImportError:  # Brotli est facultatif : gzip seul est alors proposé
+    brotli = None
+
+# Types de contenu qui gagnent à être compressés (les images, PDF et archives le sont déjà)
+COMPRESSIBLE_TYPES = {
+    'application/json', 'application/x-ndjson', 'application/javascript',
+    'application/xml', 'image/svg+xml', 'text/csv', 'text/css', 'text/html',
+    'text/javascript', 'text/plain', 'text/xml',
+}
+GZIP_LEVEL = 6
+# Qualité 5 : taux au moins égal à gzip -6 pour un temps de calcul moindre
+BROTLI_QUALITY = 5
+
+
+def available_encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate(accept_encodings) -> Optional[str]:
+    """Choisit l'encodage le mieux noté par le client parmi ceux disponibles (br, puis gzip)"""
+    best, best_quality = None, 0
+    for encoding in available_encodings():
+        quality = accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def _compressor(encoding: str):
+    if encoding == 'br':
+        return brotli.Compressor(quality=BROTLI_QUALITY)
+    # wbits=31 : en-tête et somme de contrôle gzip
+    return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    compressor = _compressor(encoding)
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: str, min_chunk: int = 16384) -> Iterator[bytes]:
+    """Compresse un flux au fil de l'eau
+
+    Les morceaux sont regroupés jusqu'à `min_chunk` octets avant d'être vidés
+    vers le client : le taux de compression reste bon et les premières lignes
+    d'un flux NDJSON arrivent sans attendre la fin.
+    """
+    compressor = _compressor(encoding)
+    pending = 0
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        if encoding == 'br':
+            out = compressor.process(chunk)
+        else:
+            out = compressor.compress(chunk)
+        pending += len(chunk)
+        if pending >= min_chunk:
+            out += compressor.flush() if encoding == 'br' else compressor.flush(zlib.Z_SYNC_FLUSH)
+            pending = 0
+        if out:
+            yield out
+    yield compressor.finish() if encoding == 'br' else compressor.flush()
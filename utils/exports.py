@@ -0,0 +1,201 @@
+from datetime import date, datetime
+from typing import Callable, Iterable, Iterator, List, Sequence
+from xml.sax.saxutils import escape
+import csv
+import enum
+import io
+import re
+import zipfile
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+# Taille des morceaux envoyés au client : quelques dizaines de lignes à la fois
+CHUNK_SIZE = 64 * 1024
+XLSX_MAX_CELL = 32767  # limite d'Excel par cellule
+
+# Caractères interdits en XML 1.0 (hors tabulation et retours à la ligne)
+_XML_INVALID = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def cell_text(value) -> str:
+    """Valeur d'une cellule en texte : dates à la seconde, Enum par leur valeur, None vide"""
+    if value is None:
+        return ''
+    if isinstance(value, enum.Enum):
+        value = value.value
+    if isinstance(value, datetime):
+        return value.isoformat(' ', 'seconds')
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def csv_chunks(fields: Sequence[str], rows: Iterable[Sequence]) -> Iterator[bytes]:
+    """CSV UTF-8 (avec BOM pour Excel), vidé par morceaux d'environ CHUNK_SIZE octets"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('﻿')
+    writer.writerow(fields)
+    for row in rows:
+        writer.writerow([cell_text(value) for value in row])
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+def ndjson_chunks(fields: Sequence[str], rows: Iterable[Sequence], dumps: Callable[[dict], bytes]) -> Iterator[bytes]:
+    """Un objet JSON par ligne, sérialisé par `dumps` (orjson via l'application)"""
+    pending: List[bytes] = []
+    size = 0
+    for row in rows:
+        line = dumps(dict(zip(fields, row))) + b'\n'
+        pending.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            yield b''.join(pending)
+            pending.clear()
+            size = 0
+    yield b''.join(pending)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Fichier non positionnable qui garde les octets écrits jusqu'au prochain envoi"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        self.size = 0
+        return data
+
+
+def _column_letter(index: int) -> str:
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _xlsx_cell(ref: str, value, style: int = 0) -> str:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f'<c r="{ref}"><v>{value}</v></c>'
+    text = _XML_INVALID.sub('', cell_text(value))[:XLSX_MAX_CELL]
+    if not text:
+        return ''
+    style_attr = f' s="{style}"' if style else ''
+    return f'<c r="{ref}" t="inlineStr"{style_attr}><is><t xml:space="preserve">{escape(text)}</t></is></c>'
+
+
+def xlsx_chunks(fields: Sequence[str], rows: Iterable[Sequence], sheet: str = 'Export') -> Iterator[bytes]:
+    """Classeur XLSX écrit en flux
+
+    Les textes sont en ligne dans les cellules (pas de table de chaînes partagées
+    à garder en mémoire) et l'archive est produite avec des descripteurs de
+    données : chaque morceau compressé part dès qu'il atteint CHUNK_SIZE.
+    """
+    sink = _ChunkSink()
+    letters = [_column_letter(index) for index in range(len(fields))]
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, content in (
+            ('[Content_Types].xml', _XLSX_CONTENT_TYPES),
+            ('_rels/.rels', _XLSX_RELS),
+            ('xl/workbook.xml', _XLSX_WORKBOOK.format(sheet=escape(sheet[:31], {'"': '&quot;'}))),
+            ('xl/_rels/workbook.xml.rels', _XLSX_WORKBOOK_RELS),
+            ('xl/styles.xml', _XLSX_STYLES),
+        ):
+            archive.writestr(zipfile.ZipInfo(name, date_time=(1980, 1, 1, 0, 0, 0)), content.encode('utf-8'),
+                             compress_type=zipfile.ZIP_DEFLATED)
+        info = zipfile.ZipInfo('xl/worksheets/sheet1.xml', date_time=(1980, 1, 1, 0, 0, 0))
+        info.compress_type = zipfile.ZIP_DEFLATED
+        with archive.open(info, 'w', force_zip64=True) as part:
+            header = ''.join(_xlsx_cell(f'{letter}1', field, style=1) for letter, field in zip(letters, fields))
+            part.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                '<sheetViews><sheetView workbookViewId="0"><pane ySplit="1" topLeftCell="A2" state="frozen"/>'
+                f'</sheetView></sheetViews><sheetData><row r="1">{header}</row>'
+            ).encode('utf-8'))
+            for number, row in enumerate(rows, start=2):
+                cells = ''.join(_xlsx_cell(f'{letter}{number}', value) for letter, value in zip(letters, row))
+                part.write(f'<row r="{number}">{cells}</row>'.encode('utf-8'))
+                if sink.size >= CHUNK_SIZE:
+                    yield sink.drain()
+            part.write(b'</sheetData></worksheet>')
+    yield sink.drain()
+
+
+def export_chunks(fmt: str, fields: Sequence[str], rows: Iterable[Sequence],
+                  dumps: Callable[[dict], bytes], sheet: str = 'Export') -> Iterator[bytes]:
+    if fmt == 'csv':
+        return csv_chunks(fields, rows)
+    if fmt == 'ndjson':
+        return ndjson_chunks(fields, rows, dumps)
+    if fmt == 'xlsx':
+        return xlsx_chunks(fields, rows, sheet)
+    raise ValueError(f"Format d'export non supporté : {fmt}")
+
+
+_XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+_XLSX_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/></Relationships>'
+)
+_XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{sheet}" sheetId="1" r:id="rId1"/></sheets></workbook>'
+)
+_XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/></Relationships>'
+)
+# Deux styles : normal et gras (ligne d'en-tête)
+_XLSX_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill><fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+    '</styleSheet>'
+)
@@ -0,0 +1,72 @@
+from typing import Any
+from datetime import date
+import dataclasses
+import decimal
+import enum
+import json
+import uuid
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson est facultatif : on retombe sur le module json
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    """Types non gérés nativement par le sérialiseur"""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if hasattr(value, '__html__'):
+        return str(value.__html__())
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Objet de type {type(value).__name__} non sérialisable en JSON")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Fournisseur JSON de Flask (jsonify, request.get_json) s'appuyant sur orjson
+
+    orjson sérialise en C les dictionnaires, listes, dates (ISO 8601) et Enum
+    (par leur valeur) et produit directement des octets UTF-8. Sans orjson, le
+    module json est utilisé avec les mêmes conversions.
+    """
+
+    def dumps_bytes(self, obj: Any, indent: bool = False, **kwargs) -> bytes:
+        if orjson is not None and not kwargs:
+            option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(obj, default=_default, option=option)
+        if indent:
+            kwargs.update(indent=2, separators=(',', ': '))
+        return self.dumps(obj, **kwargs).encode('utf-8')
+
+    def dumps(self, obj: Any, **kwargs) -> str:
+        if orjson is not None and not kwargs:
+            return self.dumps_bytes(obj).decode('utf-8')
+        kwargs.setdefault('default', _default)
+        kwargs.setdefault('ensure_ascii', False)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        kwargs.setdefault('separators', (',', ':'))
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs) -> Any:
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        # Même règle que Flask : sortie indentée en mode debug, sauf si compact est forcé
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(self.dumps_bytes(obj, indent=indent), mimetype=self.mimetype)
@@ -0,0 +1,57 @@
+from typing import Callable, Dict, Hashable, List, Sequence, Tuple
+
+from markupsafe import Markup
+
+from utils.cache import LRUCache
+
+
+class FragmentCache:
+    """Morceaux de HTML rendus, indexés par (type, id, date de mise à jour)
+
+    Une ligne modifiée change de clé : seule elle est relue et rendue à
+    nouveau, les autres sont servies depuis le cache. Les anciennes versions
+    sortent du cache par ancienneté (LRU).
+
+        fragments = cache.render('incident', [(12, updated_at), ...],
+                                 load=lambda ids: {i.id: i for i in ...},
+                                 render=lambda incident: ...)
+    """
+
+    def __init__(self, maxsize: int = 5000):
+        self._cache = LRUCache(maxsize=maxsize)
+        self.rendered = 0
+
+    def render(self, kind: str, versions: Sequence[Tuple[Hashable, object]],
+               load: Callable[[List[Hashable]], Dict[Hashable, object]],
+               render: Callable[[object], object]) -> List[object]:
+        """Retourne les fragments dans l'ordre de `versions`
+
+        `load(ids)` ne reçoit que les identifiants absents du cache et retourne
+        {id: objet} ; `render(objet)` produit le fragment (une chaîne ou un
+        tuple de chaînes).
+        """
+        keys = [(kind, row_id, updated_at) for row_id, updated_at in versions]
+        found = self._cache.get_many(keys)
+        missing = [key[1] for key in keys if key not in found]
+        if missing:
+            objects = load(missing)
+            fresh = {}
+            for key in keys:
+                if key not in found and key[1] in objects:
+                    fresh[key] = _markup(render(objects[key[1]]))
+            self.rendered += len(fresh)
+            self._cache.set_many(fresh)
+            found.update(fresh)
+        return [found[key] for key in keys if key in found]
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return self._cache.stats()
+
+
+def _markup(fragment):
+    if isinstance(fragment, tuple):
+        return tuple(Markup(part) for part in fragment)
+    return Markup(fragment)
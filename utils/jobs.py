@@ -0,0 +1,116 @@
+from typing import Callable, Dict, List, NamedTuple, Optional
+import random
+import threading
+
+from utils.cache import LRUCache
+
+# Priorités : la plus petite valeur passe en premier
+PRIORITY_HIGH = 10
+PRIORITY_NORMAL = 100
+PRIORITY_LOW = 200
+
+
+def backoff_delay(attempt: int, base: float = 5.0, cap: float = 600.0, jitter: float = 0.2) -> float:
+    """Délai avant la tentative suivante : exponentiel, plafonné, avec une part aléatoire"""
+    delay = min(cap, base * 2 ** max(attempt - 1, 0))
+    return delay * (1 + random.uniform(-jitter, jitter))
+
+
+class JobSpec(NamedTuple):
+    name: str
+    function: Callable
+    priority: int
+    max_attempts: int
+
+
+class JobRegistry:
+    """Tâches exécutables en arrière-plan, déclarées par nom
+
+        @jobs.register('collect_orphan_blobs', max_attempts=5)
+        def collect_orphan_blobs_job(hashes):
+            ...
+    """
+
+    def __init__(self):
+        self._specs: Dict[str, JobSpec] = {}
+
+    def register(self, name: str, priority: int = PRIORITY_NORMAL, max_attempts: int = 3):
+        def decorator(function: Callable) -> Callable:
+            self._specs[name] = JobSpec(name, function, priority, max_attempts)
+            return function
+        return decorator
+
+    def get(self, name: str) -> Optional[JobSpec]:
+        return self._specs.get(name)
+
+    def names(self) -> List[str]:
+        return sorted(self._specs)
+
+
+class JobRunner:
+    """Threads qui exécutent les tâches de la file
+
+    `claim()` réserve la prochaine tâche prête et retourne son identifiant (ou
+    None) ; `run(id)` l'exécute et retourne son statut final. Les threads
+    attendent `poll_interval` secondes quand la file est vide, ou moins si
+    `wake()` signale une nouvelle tâche. Les statuts des tâches terminées ici
+    sont gardés en mémoire pour `wait()`.
+    """
+
+    def __init__(self, claim: Callable[[], Optional[int]], run: Callable[[int], str],
+                 threads: int = 2, poll_interval: float = 2.0, name: str = 'jobs'):
+        self.claim = claim
+        self.run = run
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.name = name
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._finished = threading.Condition()
+        self._statuses = LRUCache(maxsize=1000)
+        self._workers: List[threading.Thread] = []
+
+    def start(self) -> 'JobRunner':
+        if not self._workers:
+            for index in range(self.threads):
+                worker = threading.Thread(target=self._loop, name=f'{self.name}-{index}', daemon=True)
+                worker.start()
+                self._workers.append(worker)
+        return self
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Arrête les threads après la tâche en cours"""
+        self._stopping.set()
+        self._wakeup.set()
+        for worker in self._workers:
+            worker.join(timeout)
+        self._workers = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers) and not self._stopping.is_set()
+
+    def wait(self, job_id: int, timeout: float) -> Optional[str]:
+        """Attend la fin d'une tâche exécutée par ce processus ; None si elle n'est pas finie à temps"""
+        with self._finished:
+            self._finished.wait_for(lambda: self._statuses.get(job_id) is not None, timeout)
+            return self._statuses.get(job_id)
+
+    def _loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                job_id = self.claim()
+            except Exception:
+                # Base indisponible : on réessaie au prochain tour
+                job_id = None
+            if job_id is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            status = self.run(job_id)
+            with self._finished:
+                self._statuses.set(job_id, status)
+                self._finished.notify_all()
@@ -0,0 +1,98 @@
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+import os
+import secrets
+import threading
+import time
+
+# (numéro, type, données JSON, trame SSE prête à envoyer)
+LiveEvent = Tuple[int, str, str, bytes]
+
+
+class EventBroker:
+    """Diffusion d'événements en mémoire, dans un processus
+
+    Les événements sont numérotés et gardés dans un journal circulaire : publier
+    coûte la même chose quel que soit le nombre d'abonnés, qui attendent sur une
+    condition commune puis relisent le journal après leur dernier numéro. La
+    trame SSE de chaque événement est construite une seule fois.
+
+    Les identifiants envoyés aux clients ("jeton-numéro") portent un jeton propre
+    au processus, renouvelé après un fork : un client reconnecté à un autre
+    worker n'est pas confondu avec un client en retard.
+    """
+
+    def __init__(self, history: int = 1000):
+        self.history = history
+        self._reset()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self) -> None:
+        self.token = secrets.token_hex(4)
+        self._events: deque = deque(maxlen=self.history)
+        self._seq = 0
+        self._condition = threading.Condition()
+        self.subscribers = 0
+        self.published = 0
+
+    @property
+    def last_seq(self) -> int:
+        return self._seq
+
+    def event_id(self, seq: int) -> str:
+        return f"{self.token}-{seq}"
+
+    def parse_id(self, value: Optional[str]) -> Optional[int]:
+        """Numéro d'un identifiant reçu du client ; None s'il vient d'un autre processus"""
+        token, _, seq = (value or '').partition('-')
+        if token != self.token or not seq.isdigit():
+            return None
+        return min(int(seq), self._seq)
+
+    def publish(self, kind: str, data: str) -> int:
+        """Ajoute un événement (data : JSON déjà sérialisé) et réveille les abonnés"""
+        with self._condition:
+            self._seq += 1
+            frame = f"id: {self.event_id(self._seq)}\nevent: {kind}\ndata: {data}\n\n".encode('utf-8')
+            self._events.append((self._seq, kind, data, frame))
+            self.published += 1
+            self._condition.notify_all()
+            return self._seq
+
+    def _since(self, after: int) -> Optional[List[LiveEvent]]:
+        if after >= self._seq:
+            return []
+        if not self._events or self._events[0][0] > after + 1:
+            return None  # le journal a déjà oublié une partie des événements manqués
+        return [event for event in self._events if event[0] > after]
+
+    def wait(self, after: int, timeout: float) -> Optional[List[LiveEvent]]:
+        """Événements publiés après `after`, en attendant au plus `timeout` secondes
+
+        Retourne [] si rien n'est arrivé, None si des événements ont été perdus.
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                events = self._since(after)
+                if events != []:
+                    return events
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return []
+                self._condition.wait(remaining)
+
+    @contextmanager
+    def subscription(self) -> Iterator[None]:
+        with self._condition:
+            self.subscribers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.subscribers -= 1
+
+    def stats(self) -> dict:
+        return {'subscribers': self.subscribers, 'published': self.published, 'buffered': len(self._events)}
@@ -1,6 +1,54 @@
-from typing import List, Dict
-import re
-from collections import Counter
+from typing import Dict, Iterable, List, Set, Tuple
+from utils.search_index import TOKEN_RE, fold
+
+
+def _stem(token: str) -> str:
+    """Réduit un mot à une forme simple (pluriels en -s/-x)"""
+    if len(token) > 3 and token[-1] in 'sx':
+        return token[:-1]
+    return token
+
+
+def _keyword_tokens(text: str) -> List[str]:
+    return [_stem(t) for t in TOKEN_RE.findall(fold(text))]
+
+
+class KeywordMatcher:
+    """Automate de recherche simultanée de mots-clés (éventuellement composés)
+
+    Les mots-clés sont compilés en un trie de mots : le texte est parcouru une
+    seule fois, la comparaison se fait mot à mot (donc sur des frontières de mots)
+    et sans tenir compte des accents ni de la casse.
+    """
+
+    def __init__(self, groups: Dict[str, Iterable[str]]):
+        self._trie: Dict = {}
+        self.keyword_count = 0
+        for group, keywords in groups.items():
+            for keyword in keywords:
+                node = self._trie
+                for token in _keyword_tokens(keyword):
+                    node = node.setdefault(token, {})
+                node.setdefault(None, set()).add((group, keyword))
+                self.keyword_count += 1
+
+    def find(self, text: str) -> Set[Tuple[str, str]]:
+        """Retourne l'ensemble des (groupe, mot-clé) présents dans le texte"""
+        tokens = _keyword_tokens(text)
+        found: Set[Tuple[str, str]] = set()
+        trie = self._trie
+        for start in range(len(tokens)):
+            node = trie.get(tokens[start])
+            position = start + 1
+            while node is not None:
+                if None in node:
+                    found.update(node[None])
+                if position >= len(tokens):
+                    break
+                node = node.get(tokens[position])
+                position += 1
+        return found
+
 
 class ProblemAnalyzer:
     # Dictionnaire des domaines ITIL courants et leurs mots-clés associés
@@ -12,6 +60,9 @@ class ProblemAnalyzer:
         'utilisateur': ['formation', 'erreur humaine', 'interface', 'expérience utilisateur', 'documentation']
     }
 
+    # Mots-clés indiquant un problème de forte gravité
+    HIGH_SEVERITY_KEYWORDS = ['critique', 'urgent', 'bloquant', 'majeur', 'production', 'sécurité']
+
     # Solutions génériques par domaine
     DOMAIN_SOLUTIONS = {
         'infrastructure': [
@@ -46,6 +97,43 @@ class ProblemAnalyzer:
         ]
     }
 
+    SEVERITY_GROUP = '__severity__'
+    _matcher = None
+
+    @classmethod
+    def _get_matcher(cls) -> KeywordMatcher:
+        """Compile une seule fois les tables de mots-clés en automate"""
+        if cls._matcher is None:
+            groups = dict(cls.ITIL_DOMAINS)
+            groups[cls.SEVERITY_GROUP] = cls.HIGH_SEVERITY_KEYWORDS
+            ProblemAnalyzer._matcher = KeywordMatcher(groups)
+        return cls._matcher
+
+    @staticmethod
+    def classify(text: str) -> Dict:
+        """Calcule en un seul parcours les scores par domaine, le domaine principal et la sévérité"""
+        found = ProblemAnalyzer._get_matcher().find(text or '')
+        scores = {domain: 0 for domain in ProblemAnalyzer.ITIL_DOMAINS}
+        severity_score = 0
+        for group, _keyword in found:
+            if group == ProblemAnalyzer.SEVERITY_GROUP:
+                severity_score += 1
+            else:
+                scores[group] += 1
+        # En cas d'égalité, le premier domaine déclaré l'emporte
+        domain = max(scores.items(), key=lambda x: x[1])[0]
+        return {
+            'domain': domain,
+            'scores': scores,
+            'severity': 'high' if severity_score > 1 else 'normal'
+        }
+
+    @staticmethod
+    def classify_many(texts: Iterable[str]) -> List[Dict]:
+        """Classe un lot de textes (ré-analyse d'un historique de problèmes)"""
+        classify = ProblemAnalyzer.classify
+        return [classify(text) for text in texts]
+
     @staticmethod
     def analyze_root_cause(whys: List[str]) -> str:
         """Analyse les 5 pourquoi pour déterminer la cause racine"""
@@ -69,13 +157,14 @@ class ProblemAnalyzer:
         """Suggère des solutions basées sur l'analyse complète du problème"""
         # Identifier le domaine principal
         all_text = f"{title} {description} {' '.join(whys)} {root_cause}"
-        main_domain = ProblemAnalyzer._identify_domain(all_text)
+        # Domaine et gravité obtenus en un seul parcours du texte
+        analysis = ProblemAnalyzer.classify(all_text)
+        main_domain = analysis['domain']
         
         # Obtenir les solutions spécifiques au domaine
         domain_solutions = ProblemAnalyzer.DOMAIN_SOLUTIONS.get(main_domain, [])
         
-        # Analyser la gravité basée sur les mots-clés
-        severity = ProblemAnalyzer._analyze_severity(all_text)
+        severity = analysis['severity']
         
         # Personnaliser les solutions
         solutions = []
@@ -95,24 +184,12 @@ class ProblemAnalyzer:
     @staticmethod
     def _identify_domain(text: str) -> str:
         """Identifie le domaine ITIL basé sur les mots-clés"""
-        text = text.lower()
-        domain_scores = {}
-        
-        for domain, keywords in ProblemAnalyzer.ITIL_DOMAINS.items():
-            score = sum(1 for keyword in keywords if keyword in text)
-            domain_scores[domain] = score
-        
-        # Retourner le domaine avec le score le plus élevé
-        return max(domain_scores.items(), key=lambda x: x[1])[0]
+        return ProblemAnalyzer.classify(text)['domain']
 
     @staticmethod
     def _analyze_severity(text: str) -> str:
         """Analyse la sévérité du problème"""
-        high_severity_keywords = ['critique', 'urgent', 'bloquant', 'majeur', 'production', 'sécurité']
-        text = text.lower()
-        
-        severity_score = sum(1 for keyword in high_severity_keywords if keyword in text)
-        return 'high' if severity_score > 1 else 'normal'
+        return ProblemAnalyzer.classify(text)['severity']
 
     @staticmethod
     def _generate_immediate_action(root_cause: str) -> str:
@@ -0,0 +1,99 @@
+from typing import List, Optional
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Levée quand une vue exécute plus de requêtes SQL que son budget"""
+
+    def __init__(self, endpoint: str, count: int, budget: int, statements: Optional[List[str]] = None):
+        self.endpoint = endpoint
+        self.count = count
+        self.budget = budget
+        self.statements = statements or []
+        message = f"{endpoint} : {count} requêtes SQL exécutées pour un budget de {budget}"
+        if self.statements:
+            message += "\n" + "\n".join(f"  - {statement}" for statement in self.statements)
+        super().__init__(message)
+
+
+class QueryCounter:
+    """Compte (et chronomètre) les requêtes SQL exécutées par le thread courant
+
+    S'utilise comme gestionnaire de contexte, par exemple dans un test :
+
+        with QueryCounter() as counter:
+            client.get('/knowledge')
+        assert counter.count <= 3, counter.statements
+    """
+
+    _local = threading.local()
+    _installed = False
+    _install_lock = threading.Lock()
+
+    def __init__(self, record: bool = True):
+        self.record = record
+        self.count = 0
+        self.duration = 0.0
+        self.statements: List[str] = []
+
+    @classmethod
+    def install(cls) -> None:
+        """Branche l'écouteur global sur tous les moteurs SQLAlchemy (une seule fois)"""
+        with cls._install_lock:
+            if not cls._installed:
+                event.listen(Engine, 'before_cursor_execute', cls._on_execute)
+                event.listen(Engine, 'after_cursor_execute', cls._on_executed)
+                event.listen(Engine, 'handle_error', cls._on_error)
+                cls._installed = True
+
+    @classmethod
+    def _on_execute(cls, conn, cursor, statement, parameters, context, executemany):
+        # Début rangé sur le contexte d'exécution : une requête en erreur ne laisse rien derrière elle
+        if context is not None:
+            context._query_started = time.perf_counter()
+        for counter in getattr(cls._local, 'active', ()):
+            counter.count += 1
+            if counter.record:
+                counter.statements.append(statement)
+
+    @classmethod
+    def _add_duration(cls, context) -> None:
+        started = getattr(context, '_query_started', None)
+        if started is None:
+            return
+        context._query_started = None
+        elapsed = time.perf_counter() - started
+        for counter in getattr(cls._local, 'active', ()):
+            counter.duration += elapsed
+
+    @classmethod
+    def _on_executed(cls, conn, cursor, statement, parameters, context, executemany):
+        cls._add_duration(context)
+
+    @classmethod
+    def _on_error(cls, exception_context) -> None:
+        # Le temps passé par une requête en échec compte aussi
+        cls._add_duration(exception_context.execution_context)
+
+    def start(self) -> 'QueryCounter':
+        self.install()
+        active = getattr(self._local, 'active', None)
+        if active is None:
+            active = self._local.active = []
+        active.append(self)
+        return self
+
+    def stop(self) -> None:
+        active = getattr(self._local, 'active', [])
+        if self in active:
+            active.remove(self)
+
+    def __enter__(self) -> 'QueryCounter':
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
@@ -0,0 +1,59 @@
+from typing import Iterable, List, Optional, Sequence, Tuple
+import re
+
+from utils.problem_analyzer import ProblemAnalyzer
+
+WHY_COUNT = 5
+
+# Description repliée par l'ancien formulaire des problèmes :
+# "{description}\n\nAnalyse des 5 Pourquoi:\n1. ...\n5. ...\n\nSolutions suggérées:\n{solutions}"
+_FOLDED_RE = re.compile(
+    r'^(?P<description>.*?)\n\nAnalyse des 5 Pourquoi:\n'
+    + r'\n'.join(rf'{n}\. (?P<why{n}>.*?)' for n in range(1, WHY_COUNT + 1))
+    + r'\n\nSolutions suggérées:\n(?P<solutions>.*)$',
+    re.S,
+)
+_BULLET_RE = re.compile(r'^\s*(?:[-•*]|\d+[.)])\s+')
+
+
+def parse_folded_description(text: Optional[str]) -> Optional[Tuple[str, List[str], List[str]]]:
+    """Sépare une description repliée en (description, 5 pourquoi, solutions) ; None si elle n'a pas ce format"""
+    match = _FOLDED_RE.match(text or '')
+    if match is None:
+        return None
+    whys = [match.group(f'why{n}').strip() for n in range(1, WHY_COUNT + 1)]
+    return match.group('description'), whys, split_solutions(match.group('solutions'))
+
+
+def fold_description(description: Optional[str], whys: Sequence[str], solutions: Iterable[str]) -> str:
+    """Format historique de la description (retour arrière de la migration)"""
+    whys = list(whys) + [''] * (WHY_COUNT - len(whys))
+    numbered = '\n'.join(f"{n}. {why}" for n, why in enumerate(whys[:WHY_COUNT], 1))
+    return f"{description or ''}\n\nAnalyse des 5 Pourquoi:\n{numbered}\n\nSolutions suggérées:\n" + '\n'.join(solutions)
+
+
+def split_solutions(text: Optional[str]) -> List[str]:
+    """Une solution par ligne, sans puces ni numéros"""
+    solutions = []
+    for line in (text or '').splitlines():
+        line = _BULLET_RE.sub('', line).strip()
+        if line:
+            solutions.append(line)
+    return solutions
+
+
+def last_why(whys: Sequence[Optional[str]]) -> Optional[str]:
+    """Dernier pourquoi renseigné : la cause racine par défaut"""
+    for why in reversed(whys):
+        if why and why.strip():
+            return why.strip()
+    return None
+
+
+def classify_analysis(whys: Sequence[Optional[str]], root_cause: Optional[str] = None,
+                      context: Optional[str] = None) -> Tuple[Optional[str], str]:
+    """Domaine ITIL et sévérité d'une analyse ; domaine None si aucun mot-clé n'est reconnu"""
+    text = ' '.join(part for part in (context, *whys, root_cause) if part)
+    analysis = ProblemAnalyzer.classify(text)
+    domain = analysis['domain'] if analysis['scores'][analysis['domain']] else None
+    return domain, analysis['severity']
@@ -0,0 +1,367 @@
+from typing import Dict, List, Optional, Tuple
+import glob
+import html
+import io
+import os
+import re
+import tempfile
+import zipfile
+
+# À incrémenter quand la mise en page change : les rapports en cache sont alors régénérés
+RENDERER_VERSION = 2
+
+REPORT_FORMATS = {
+    'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'pdf': 'application/pdf',
+    'html': 'text/html',  # Flask ajoute le charset
+}
+
+WHY_LABELS = ('Pourquoi 1', 'Pourquoi 2', 'Pourquoi 3', 'Pourquoi 4', 'Pourquoi 5')
+INCIDENT_COLUMNS = ('ID', 'Titre', 'Priorité', 'Statut', 'Date')
+
+# Caractères interdits en XML 1.0 (hors tabulation et retours à la ligne)
+_XML_INVALID = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def report_blocks(report: Dict) -> List[Tuple]:
+    """Contenu d'un rapport de problème, commun aux trois formats
+
+    Chaque bloc est un tuple : ('title', texte), ('heading', texte),
+    ('subheading', texte), ('field', libellé, valeur), ('text', texte) ou
+    ('table', en-têtes, lignes).
+    """
+    blocks = [
+        ('title', f"Rapport de problème #{report['id']}"),
+        ('field', 'Titre', report.get('title') or ''),
+        ('field', 'Statut', report.get('status') or ''),
+        ('field', 'Responsable', report.get('assigned_to') or 'Non assigné'),
+        ('field', 'Créé le', report.get('created_at') or ''),
+        ('field', 'Mis à jour le', report.get('updated_at') or ''),
+        ('heading', 'Description'),
+        ('text', report.get('description') or 'Aucune description'),
+        ('heading', 'Cause racine'),
+        ('text', report.get('root_cause') or 'Non déterminée'),
+    ]
+    analysis = report.get('analysis')
+    if analysis and analysis.get('whys'):
+        blocks.append(('heading', 'Analyse des 5 pourquoi'))
+        blocks.extend(('field', WHY_LABELS[why['position'] - 1], why['text']) for why in analysis['whys'])
+    if analysis and analysis.get('solutions'):
+        blocks.append(('heading', 'Solutions'))
+        blocks.extend(('text', f"• {solution}") for solution in analysis['solutions'])
+    incidents = report.get('incidents') or []
+    blocks.append(('heading', f"Incidents liés ({len(incidents)})"))
+    if not incidents:
+        blocks.append(('text', 'Aucun incident lié'))
+        return blocks
+    blocks.append(('table', INCIDENT_COLUMNS, [
+        (str(i['id']), i.get('title') or '', i.get('priority') or '', i.get('status') or '', i.get('created_at') or '')
+        for i in incidents
+    ]))
+    for incident in incidents:
+        whys = [(label, incident.get(f'why{n}')) for n, label in enumerate(WHY_LABELS, 1)]
+        whys = [(label, value) for label, value in whys if value]
+        if not incident.get('description') and not whys:
+            continue
+        blocks.append(('subheading', f"Incident #{incident['id']} — {incident.get('title') or ''}"))
+        if incident.get('description'):
+            blocks.append(('text', incident['description']))
+        blocks.extend(('field', label, value) for label, value in whys)
+    return blocks
+
+
+# --- HTML ---
+
+_HTML_STYLE = (
+    "body{font-family:Arial,Helvetica,sans-serif;margin:2em auto;max-width:60em;color:#222}"
+    "h1{font-size:1.6em}h2{font-size:1.25em;margin-top:1.5em;border-bottom:1px solid #ccc}"
+    "h3{font-size:1.05em;margin-top:1.2em}p{white-space:pre-wrap}"
+    "table{border-collapse:collapse;width:100%}th,td{border:1px solid #ccc;padding:.3em .5em;text-align:left}"
+    "th{background:#f2f2f2}.field{margin:.2em 0}.field b{display:inline-block;min-width:9em}"
+)
+
+
+def render_html(report: Dict) -> bytes:
+    parts = []
+    for block in report_blocks(report):
+        kind = block[0]
+        if kind == 'title':
+            parts.append(f"<h1>{html.escape(block[1])}</h1>")
+        elif kind == 'heading':
+            parts.append(f"<h2>{html.escape(block[1])}</h2>")
+        elif kind == 'subheading':
+            parts.append(f"<h3>{html.escape(block[1])}</h3>")
+        elif kind == 'field':
+            parts.append(f"<div class=\"field\"><b>{html.escape(block[1])} :</b> {html.escape(str(block[2]))}</div>")
+        elif kind == 'text':
+            parts.append(f"<p>{html.escape(block[1])}</p>")
+        elif kind == 'table':
+            head = ''.join(f"<th>{html.escape(h)}</th>" for h in block[1])
+            rows = ''.join('<tr>' + ''.join(f"<td>{html.escape(c)}</td>" for c in row) + '</tr>' for row in block[2])
+            parts.append(f"<table><thead><tr>{head}</tr></thead><tbody>{rows}</tbody></table>")
+    document = (
+        "<!DOCTYPE html>\n<html lang=\"fr\"><head><meta charset=\"utf-8\">"
+        f"<title>Rapport de problème #{report['id']}</title><style>{_HTML_STYLE}</style></head>"
+        "<body>" + '\n'.join(parts) + "</body></html>\n"
+    )
+    return document.encode('utf-8')
+
+
+# --- Word (.docx) ---
+# Un .docx est une archive ZIP de trois fichiers XML : pas besoin de bibliothèque dédiée
+
+_DOCX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+_DOCX_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>'
+)
+# Largeur des colonnes du tableau des incidents, en vingtièmes de point
+_DOCX_COLUMN_WIDTHS = (800, 4400, 1000, 1400, 1800)
+_DOCX_BORDERS = ''.join(
+    f'<w:{side} w:val="single" w:sz="4" w:space="0" w:color="AAAAAA"/>'
+    for side in ('top', 'left', 'bottom', 'right', 'insideH', 'insideV')
+)
+
+
+def _docx_run(text: str, bold: bool = False, size: Optional[int] = None) -> str:
+    props = ('<w:b/>' if bold else '') + (f'<w:sz w:val="{size * 2}"/>' if size else '')
+    props = f'<w:rPr>{props}</w:rPr>' if props else ''
+    lines = _XML_INVALID.sub('', str(text)).split('\n')
+    body = '<w:br/>'.join(f'<w:t xml:space="preserve">{html.escape(line, quote=False)}</w:t>' for line in lines)
+    return f'<w:r>{props}{body}</w:r>'
+
+
+def _docx_paragraph(*runs: str) -> str:
+    return '<w:p>' + ''.join(runs) + '</w:p>'
+
+
+def render_docx(report: Dict) -> bytes:
+    body = []
+    for block in report_blocks(report):
+        kind = block[0]
+        if kind == 'title':
+            body.append(_docx_paragraph(_docx_run(block[1], bold=True, size=18)))
+        elif kind == 'heading':
+            body.append(_docx_paragraph(_docx_run(block[1], bold=True, size=14)))
+        elif kind == 'subheading':
+            body.append(_docx_paragraph(_docx_run(block[1], bold=True, size=12)))
+        elif kind == 'field':
+            body.append(_docx_paragraph(_docx_run(f"{block[1]} : ", bold=True), _docx_run(block[2])))
+        elif kind == 'text':
+            body.append(_docx_paragraph(_docx_run(block[1])))
+        elif kind == 'table':
+            grid = ''.join(f'<w:gridCol w:w="{w}"/>' for w in _DOCX_COLUMN_WIDTHS)
+            rows = []
+            for index, row in enumerate([block[1]] + list(block[2])):
+                cells = ''.join(
+                    f'<w:tc><w:tcPr><w:tcW w:w="{w}" w:type="dxa"/></w:tcPr>'
+                    f'{_docx_paragraph(_docx_run(cell, bold=index == 0))}</w:tc>'
+                    for cell, w in zip(row, _DOCX_COLUMN_WIDTHS)
+                )
+                rows.append(f'<w:tr>{cells}</w:tr>')
+            body.append(
+                f'<w:tbl><w:tblPr><w:tblW w:w="0" w:type="auto"/><w:tblBorders>{_DOCX_BORDERS}</w:tblBorders>'
+                f'</w:tblPr><w:tblGrid>{grid}</w:tblGrid>{"".join(rows)}</w:tbl>'
+            )
+            # Word exige un paragraphe entre un tableau et la suite du document
+            body.append('<w:p/>')
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>'
+        + ''.join(body) +
+        '<w:sectPr><w:pgSz w:w="11906" w:h="16838"/>'
+        '<w:pgMar w:top="1134" w:right="1134" w:bottom="1134" w:left="1134" w:header="0" w:footer="0" w:gutter="0"/>'
+        '</w:sectPr></w:body></w:document>'
+    )
+    return _zip_parts([
+        ('[Content_Types].xml', _DOCX_CONTENT_TYPES),
+        ('_rels/.rels', _DOCX_RELS),
+        ('word/document.xml', document),
+    ])
+
+
+def _zip_parts(parts: List[Tuple[str, str]]) -> bytes:
+    """Archive ZIP reproductible : même contenu, mêmes octets"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, content in parts:
+            info = zipfile.ZipInfo(name, date_time=(1980, 1, 1, 0, 0, 0))
+            info.compress_type = zipfile.ZIP_DEFLATED
+            archive.writestr(info, content.encode('utf-8'))
+    return buffer.getvalue()
+
+
+# --- PDF ---
+# PDF minimal (polices standard, encodage WinAnsi) : suffisant pour un rapport texte
+
+_PDF_PAGE = (595, 842)  # A4 en points
+_PDF_MARGIN = 56
+_PDF_FONTS = {'regular': 'F1', 'bold': 'F2', 'mono': 'F3'}
+_PDF_STYLES = {
+    'title': ('bold', 16),
+    'heading': ('bold', 13),
+    'subheading': ('bold', 11),
+    'text': ('regular', 10),
+    'mono': ('mono', 8),
+}
+
+
+def _pdf_wrap(text: str, font: str, size: int) -> List[str]:
+    width = _PDF_PAGE[0] - 2 * _PDF_MARGIN
+    # Largeur moyenne d'un caractère : 0,6 em en Courier, ~0,55 em en Helvetica
+    per_line = max(10, int(width / (size * (0.6 if font == 'mono' else 0.55))))
+    lines = []
+    for paragraph in str(text).split('\n'):
+        line = ''
+        for word in paragraph.split(' '):
+            while len(word) > per_line:
+                if line:
+                    lines.append(line)
+                    line = ''
+                lines.append(word[:per_line])
+                word = word[per_line:]
+            candidate = f"{line} {word}" if line else word
+            if len(candidate) > per_line:
+                lines.append(line)
+                line = word
+            else:
+                line = candidate
+        lines.append(line)
+    return lines
+
+
+def _pdf_string(text: str) -> str:
+    encoded = text.encode('cp1252', errors='replace').decode('latin-1')
+    return '(' + encoded.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)') + ')'
+
+
+def _pdf_lines(blocks: List[Tuple]) -> List[Tuple[str, int, str, int]]:
+    """Lignes à imprimer : (police, taille, texte, espace avant)"""
+    lines = []
+
+    def add(style, text, space=0):
+        font, size = _PDF_STYLES[style]
+        for index, line in enumerate(_pdf_wrap(text, font, size)):
+            lines.append((font, size, line, space if index == 0 else 0))
+
+    for block in blocks:
+        kind = block[0]
+        if kind in ('title', 'heading', 'subheading'):
+            add(kind, block[1], space=14 if kind != 'title' else 0)
+        elif kind == 'field':
+            add('text', f"{block[1]} : {block[2]}")
+        elif kind == 'text':
+            add('text', block[1], space=4)
+        elif kind == 'table':
+            widths = (6, 44, 9, 12, 16)
+            for index, row in enumerate([block[1]] + list(block[2])):
+                cells = [str(cell)[:w - 1].ljust(w) for cell, w in zip(row, widths)]
+                add('mono', ''.join(cells).rstrip(), space=4 if index == 0 else 0)
+    return lines
+
+
+def render_pdf(report: Dict) -> bytes:
+    pages: List[List[str]] = [[]]
+    y = _PDF_PAGE[1] - _PDF_MARGIN
+    for font, size, text, space in _pdf_lines(report_blocks(report)):
+        step = size * 1.35 + space
+        if y - step < _PDF_MARGIN and pages[-1]:
+            pages.append([])
+            y = _PDF_PAGE[1] - _PDF_MARGIN
+            step = size * 1.35
+        y -= step
+        pages[-1].append(f"BT /{_PDF_FONTS[font]} {size} Tf {_PDF_MARGIN} {y:.1f} Td {_pdf_string(text)} Tj ET")
+
+    # Objets : 1 catalogue, 2 arbre des pages, 3-5 polices, puis (page, contenu) par page
+    objects = [
+        '<< /Type /Catalog /Pages 2 0 R >>',
+        None,
+        '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+        '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>',
+        '<< /Type /Font /Subtype /Type1 /BaseFont /Courier /Encoding /WinAnsiEncoding >>',
+    ]
+    kids = []
+    for commands in pages:
+        stream = '\n'.join(commands)
+        page_number = len(objects) + 1
+        kids.append(f"{page_number} 0 R")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {_PDF_PAGE[0]} {_PDF_PAGE[1]}] "
+            f"/Resources << /Font << /F1 3 0 R /F2 4 0 R /F3 5 0 R >> >> /Contents {page_number + 1} 0 R >>"
+        )
+        objects.append(f"<< /Length {len(stream.encode('latin-1'))} >>\nstream\n{stream}\nendstream")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    output = b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n'
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n{body}\nendobj\n".encode('latin-1')
+    xref = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode('latin-1')
+    output += ''.join(f"{offset:010d} 00000 n \n" for offset in offsets).encode('latin-1')
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode('latin-1')
+    return output
+
+
+RENDERERS = {'docx': render_docx, 'pdf': render_pdf, 'html': render_html}
+
+
+def render_report(report: Dict, fmt: str) -> bytes:
+    """Produit le rapport dans le format demandé (fonction pure, utilisable dans un autre processus)"""
+    return RENDERERS[fmt](report)
+
+
+class ReportStore:
+    """Cache disque des rapports générés
+
+    Un rapport est rangé sous <racine>/<id du problème>/<version>.<format> :
+    tant que la version (calculée à partir des dates de mise à jour) ne change
+    pas, le fichier existant est servi tel quel. Les fichiers sont écrits via un
+    fichier temporaire puis renommés, ce qui les rend visibles d'un seul coup aux
+    autres workers.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path_for(self, problem_id: int, version: str, fmt: str) -> str:
+        return os.path.join(self.root, str(problem_id), f"{version}.{fmt}")
+
+    def get(self, problem_id: int, version: str, fmt: str) -> Optional[str]:
+        path = self.path_for(problem_id, version, fmt)
+        return path if os.path.exists(path) else None
+
+    def put(self, problem_id: int, version: str, fmt: str, content: bytes) -> str:
+        """Enregistre un rapport et supprime les versions précédentes du même format"""
+        path = self.path_for(problem_id, version, fmt)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                out.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        for old in glob.glob(os.path.join(directory, f"*.{fmt}")):
+            if old != path:
+                try:
+                    os.unlink(old)
+                except FileNotFoundError:
+                    pass
+        return path
@@ -0,0 +1,161 @@
+from typing import Dict, Iterable, List, Tuple
+import bisect
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+
+# Mots vides français (et quelques anglais) ignorés à l'indexation
+STOPWORDS = frozenset("""
+au aux avec ce ces dans de des du elle en et eux il ils je la le les leur lui ma mais me meme mes moi mon
+ne nos notre nous on ou par pas pour qu que qui sa se ses son sur ta te tes toi ton tu un une vos votre vous
+est sont etait ete etre avoir a ont cette cet y d l s n c j m t qu
+the and of to in is for on it
+""".split())
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+COMBINING_RE = re.compile(r"[\u0300-\u036f]")
+
+
+def fold(text: str) -> str:
+    """Met le texte en minuscules et supprime les accents"""
+    text = (text or '').lower()
+    if text.isascii():
+        return text
+    return COMBINING_RE.sub('', unicodedata.normalize('NFKD', text))
+
+
+def tokenize(text: str) -> List[str]:
+    """Découpe un texte en termes normalisés, sans mots vides"""
+    return [t for t in TOKEN_RE.findall(fold(text)) if t not in STOPWORDS]
+
+
+class SearchIndex:
+    """Index inversé en mémoire avec classement BM25 pondéré par champ"""
+
+    # Poids des champs (BM25F simplifié) : un terme du titre compte triple
+    FIELD_WEIGHTS = {'title': 3.0, 'tags': 2.0, 'content': 1.0}
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._doc_terms: Dict[int, Dict[str, float]] = {}
+        self._doc_len: Dict[int, float] = {}
+        self._total_len = 0.0
+        self._vocabulary: List[str] = []
+        self._vocabulary_dirty = False
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    def __contains__(self, doc_id: int) -> bool:
+        return doc_id in self._doc_len
+
+    def _weighted_terms(self, title: str, content: str, tags: Iterable[str]) -> Dict[str, float]:
+        """Calcule les fréquences pondérées des termes d'un document"""
+        terms: Counter = Counter()
+        for field, text in (('title', title), ('content', content), ('tags', ' '.join(tags or []))):
+            weight = self.FIELD_WEIGHTS[field]
+            for token in tokenize(text):
+                terms[token] += weight
+        return dict(terms)
+
+    def add(self, doc_id: int, title: str, content: str, tags: Iterable[str] = ()) -> None:
+        """Indexe (ou réindexe) un document"""
+        terms = self._weighted_terms(title, content, tags)
+        with self._lock:
+            self._remove_locked(doc_id)
+            for term, tf in terms.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    self._vocabulary_dirty = True
+                postings[doc_id] = tf
+            length = sum(terms.values())
+            self._doc_terms[doc_id] = terms
+            self._doc_len[doc_id] = length
+            self._total_len += length
+
+    def remove(self, doc_id: int) -> None:
+        """Retire un document de l'index"""
+        with self._lock:
+            self._remove_locked(doc_id)
+
+    def _remove_locked(self, doc_id: int) -> None:
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[term]
+                self._vocabulary_dirty = True
+        self._total_len -= self._doc_len.pop(doc_id, 0.0)
+
+    def clear(self) -> None:
+        """Vide complètement l'index"""
+        with self._lock:
+            self._postings = {}
+            self._doc_terms = {}
+            self._doc_len = {}
+            self._total_len = 0.0
+            self._vocabulary = []
+            self._vocabulary_dirty = False
+            self.ready = False
+
+    def _expand_prefix(self, prefix: str) -> List[str]:
+        """Retourne les termes du vocabulaire commençant par le préfixe"""
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(self._postings)
+            self._vocabulary_dirty = False
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        end = bisect.bisect_left(self._vocabulary, prefix + '\uffff')
+        return self._vocabulary[start:end]
+
+    def search(self, query: str, limit: int = 10, prefix: bool = False) -> List[Tuple[int, float]]:
+        """Recherche les documents correspondant à la requête, triés par score BM25
+
+        Si `prefix` est vrai, le dernier terme de la requête est traité comme
+        un préfixe (saisie en cours d'un champ de recherche).
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+        with self._lock:
+            n_docs = len(self._doc_len)
+            if not n_docs:
+                return []
+            avg_len = self._total_len / n_docs or 1.0
+            scores: Dict[int, float] = {}
+            groups: List[List[str]] = [[t] for t in terms[:-1]]
+            groups.append(self._expand_prefix(terms[-1]) if prefix else [terms[-1]])
+            for group in groups:
+                for term in group:
+                    postings = self._postings.get(term)
+                    if not postings:
+                        continue
+                    df = len(postings)
+                    idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+                    for doc_id, tf in postings.items():
+                        norm = self.K1 * (1 - self.B + self.B * self._doc_len[doc_id] / avg_len)
+                        scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.K1 + 1) / (tf + norm)
+        if not scores:
+            return []
+        if len(scores) > limit:
+            best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], item[0]))
+        else:
+            best = sorted(scores.items(), key=lambda item: (item[1], item[0]), reverse=True)
+        return best
+
+    def doc_ids(self) -> List[int]:
+        """Liste les identifiants indexés"""
+        with self._lock:
+            return list(self._doc_len)
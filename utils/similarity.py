@@ -0,0 +1,196 @@
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import threading
+import zlib
+
+import numpy as np
+
+from utils.search_index import tokenize
+
+NUM_PERM = 64
+BANDS = 16
+# Les hachages produisent 31 bits : cette valeur marque une signature vide
+_EMPTY = np.uint32(0xFFFFFFFF)
+_SHIFT = np.uint64(33)
+BATCH_SIZE = 1000
+# Mots hachés à la fois : borne le tableau intermédiaire à NUM_PERM × 16384 × 8 octets (8 Mio)
+HASH_CHUNK = 16384
+
+
+def token_hashes(text: str) -> List[int]:
+    """Empreintes des mots du texte, stables d'un processus à l'autre"""
+    return [zlib.crc32(t.encode('utf-8')) for t in tokenize(text) if len(t) > 1]
+
+
+class MinHashIndex:
+    """Index de similarité textuelle MinHash + LSH
+
+    Chaque document est résumé par une signature de NUM_PERM minima de hachage :
+    la proportion de minima égaux entre deux signatures estime la similarité de
+    Jaccard de leurs ensembles de mots. Les signatures sont découpées en BANDS
+    bandes ; deux documents ne sont comparés que s'ils partagent au moins une
+    bande identique, ce qui évite de parcourir tout l'index (seuil effectif
+    d'environ 0,5 avec 16 bandes de 4 lignes). Le score des candidats est
+    ensuite calculé d'un bloc avec NumPy.
+    """
+
+    def __init__(self, num_perm: int = NUM_PERM, bands: int = BANDS, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm doit être un multiple de bands")
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        # Famille de hachage multiply-shift : (a * x + b) mod 2^64, bits de poids fort
+        self._a = rng.integers(1, 1 << 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)
+        # Multiplicateurs impairs : chaque bande est réduite à un entier de 64 bits
+        self._band_mix = rng.integers(1, 1 << 63, size=self.rows, dtype=np.uint64) | np.uint64(1)
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets: List[Dict[int, set]] = [{} for _ in range(self.bands)]
+            self._signatures = np.full((1024, self.num_perm), _EMPTY, dtype=np.uint32)
+            self._row_of: Dict[int, int] = {}
+            self._ids: List[Optional[int]] = []
+            self._free: List[int] = []
+            self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def __contains__(self, doc_id: int) -> bool:
+        return doc_id in self._row_of
+
+    def _minhash(self, values: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+        """Minimum des hachages de chaque texte (mots values[offsets[i]:offsets[i + 1]])
+
+        Les mots sont hachés par blocs de HASH_CHUNK : un texte à cheval sur deux
+        blocs garde le minimum des deux, quelle que soit la taille du lot.
+        """
+        result = np.full((self.num_perm, len(offsets)), np.iinfo(np.uint64).max, dtype=np.uint64)
+        for start in range(0, len(values), HASH_CHUNK):
+            stop = min(start + HASH_CHUNK, len(values))
+            with np.errstate(over='ignore'):
+                permuted = (np.multiply.outer(self._a, values[start:stop]) + self._b[:, None]) >> _SHIFT
+            # Textes présents dans le bloc, et début de chacun dans le bloc
+            first = int(np.searchsorted(offsets, start, side='right')) - 1
+            last = int(np.searchsorted(offsets, stop, side='left'))
+            starts = np.maximum(offsets[first:last], start) - start
+            np.minimum(result[:, first:last], np.minimum.reduceat(permuted, starts, axis=1),
+                       out=result[:, first:last])
+        return result.T
+
+    def signatures(self, texts: Sequence[str]) -> np.ndarray:
+        """Calcule les signatures d'un lot de textes en une seule opération vectorisée
+
+        Un texte est représenté par ses mots et ses paires de mots consécutifs ;
+        les doublons n'ont pas besoin d'être retirés (le minimum n'en dépend pas).
+        """
+        result = np.full((len(texts), self.num_perm), _EMPTY, dtype=np.uint32)
+        hashes = [token_hashes(text) for text in texts]
+        filled = [i for i, h in enumerate(hashes) if h]
+        if not filled:
+            return result
+        lengths = np.array([len(hashes[i]) for i in filled])
+        words = np.fromiter((h for i in filled for h in hashes[i]), dtype=np.uint64, count=int(lengths.sum()))
+        offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        # Paire (mot i, mot i+1) ; le dernier mot d'un texte reprend sa propre empreinte
+        pairs = words.copy()
+        pairs[:-1] = (words[:-1] * np.uint64(1000003) + words[1:]) & np.uint64(0xFFFFFFFF)
+        ends = offsets + lengths - 1
+        pairs[ends] = words[ends]
+        result[filled] = np.minimum(self._minhash(words, offsets), self._minhash(pairs, offsets))
+        return result
+
+    def _band_keys(self, signatures: np.ndarray) -> List[List[int]]:
+        """Clé de chaque bande des signatures (une collision ne fait qu'ajouter un candidat)"""
+        bands = signatures.reshape(len(signatures), self.bands, self.rows).astype(np.uint64)
+        with np.errstate(over='ignore'):
+            return (bands * self._band_mix).sum(axis=2).tolist()
+
+    def _remove_locked(self, doc_id: int) -> None:
+        row = self._row_of.pop(doc_id, None)
+        if row is None:
+            return
+        signature = self._signatures[row:row + 1]
+        if signature[0, 0] != _EMPTY:
+            for bucket, key in zip(self._buckets, self._band_keys(signature)[0]):
+                members = bucket.get(key)
+                if members is not None:
+                    members.discard(doc_id)
+                    if not members:
+                        del bucket[key]
+        self._signatures[row] = _EMPTY
+        self._ids[row] = None
+        self._free.append(row)
+
+    def _add_locked(self, doc_id: int, signature: np.ndarray, keys: List[int]) -> None:
+        self._remove_locked(doc_id)
+        if self._free:
+            row = self._free.pop()
+            self._ids[row] = doc_id
+        else:
+            row = len(self._ids)
+            if row >= len(self._signatures):
+                grown = np.full((len(self._signatures) * 2, self.num_perm), _EMPTY, dtype=np.uint32)
+                grown[:row] = self._signatures[:row]
+                self._signatures = grown
+            self._ids.append(doc_id)
+        self._row_of[doc_id] = row
+        self._signatures[row] = signature
+        # Un texte vide est connu de l'index mais n'est similaire à rien
+        if signature[0] != _EMPTY:
+            for bucket, key in zip(self._buckets, keys):
+                bucket.setdefault(key, set()).add(doc_id)
+
+    def add_many(self, docs: Iterable[Tuple[int, str]]) -> None:
+        """Indexe (ou réindexe) des documents (id, texte), par lots"""
+        batch: List[Tuple[int, str]] = []
+        for doc in docs:
+            batch.append(doc)
+            if len(batch) >= BATCH_SIZE:
+                self._add_batch(batch)
+                batch = []
+        if batch:
+            self._add_batch(batch)
+
+    def _add_batch(self, batch: List[Tuple[int, str]]) -> None:
+        signatures = self.signatures([text for _, text in batch])
+        keys = self._band_keys(signatures)
+        with self._lock:
+            for (doc_id, _), signature, doc_keys in zip(batch, signatures, keys):
+                self._add_locked(doc_id, signature, doc_keys)
+
+    def add(self, doc_id: int, text: str) -> None:
+        self._add_batch([(doc_id, text)])
+
+    def remove(self, doc_id: int) -> None:
+        with self._lock:
+            self._remove_locked(doc_id)
+
+    def similar(self, text: str, k: int = 10, threshold: float = 0.0,
+                exclude: Iterable[int] = ()) -> List[Tuple[int, float]]:
+        """Retourne les k documents les plus proches du texte : [(id, similarité estimée)]"""
+        signatures = self.signatures([text])
+        signature = signatures[0]
+        if signature[0] == _EMPTY:
+            return []
+        with self._lock:
+            candidates = set()
+            for bucket, key in zip(self._buckets, self._band_keys(signatures)[0]):
+                candidates.update(bucket.get(key, ()))
+            candidates.difference_update(exclude)
+            if not candidates:
+                return []
+            ids = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+            rows = np.fromiter((self._row_of[doc_id] for doc_id in candidates), dtype=np.int64, count=len(candidates))
+            scores = (self._signatures[rows] == signature).mean(axis=1)
+        keep = scores >= threshold
+        ids, scores = ids[keep], scores[keep]
+        if len(ids) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            ids, scores = ids[top], scores[top]
+        order = np.lexsort((ids, -scores))
+        return [(int(ids[i]), round(float(scores[i]), 3)) for i in order]
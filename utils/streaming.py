@@ -0,0 +1,132 @@
+from typing import Dict, IO, Iterator, Union
+import codecs
+import csv
+import io
+import json
+
+CHUNK_SIZE = 64 * 1024
+MAX_ITEM_SIZE = 4 * 1024 * 1024  # taille maximale d'un élément d'un tableau JSON (caractères)
+# Une erreur de syntaxe aussi près de la fin du tampon peut venir d'un élément coupé
+# entre deux morceaux ("tr" pour true, "1." ou "\u12")
+_TRUNCATION_MARGIN = 8
+
+FORMATS = ('json', 'ndjson', 'csv')
+
+_WHITESPACE = ' \t\r\n'
+
+
+def _text_chunks(stream: IO, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Lit un flux (binaire ou texte) par morceaux décodés en UTF-8"""
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        yield decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def _text_stream(stream: IO) -> IO:
+    if isinstance(stream, io.TextIOBase):
+        return stream
+    return io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+
+def iter_json_array(stream: IO, chunk_size: int = CHUNK_SIZE, max_item_size: int = MAX_ITEM_SIZE) -> Iterator[Dict]:
+    """Parcourt les éléments d'un tableau JSON sans charger tout le document
+
+    Le tampon ne contient jamais plus que l'élément en cours de lecture et le
+    morceau suivant, quelle que soit la taille du fichier. Un élément invalide
+    lève ValueError dès sa lecture, un élément de plus de `max_item_size`
+    caractères aussi.
+    """
+    decoder = json.JSONDecoder()
+    chunks = _text_chunks(stream, chunk_size)
+    buffer = ''
+    position = 0
+    offset = 0  # position du début du tampon dans le document
+    started = False
+    for chunk in chunks:
+        offset += position
+        buffer = buffer[position:] + chunk
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in _WHITESPACE:
+                position += 1
+            if position >= len(buffer):
+                break
+            if not started:
+                if buffer[position] != '[':
+                    raise ValueError("Le document JSON doit être un tableau")
+                started = True
+                position += 1
+                continue
+            if buffer[position] == ',':
+                position += 1
+                continue
+            if buffer[position] == ']':
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as e:
+                if e.pos < len(buffer) - _TRUNCATION_MARGIN and not e.msg.startswith('Unterminated string'):
+                    raise ValueError(f"JSON invalide à la position {offset + e.pos} ({e.msg})")
+                if len(buffer) - position > max_item_size:
+                    raise ValueError(f"Élément JSON de plus de {max_item_size} caractères "
+                                     f"à la position {offset + position}")
+                # Élément incomplet : il faut lire le morceau suivant
+                break
+            if end == len(buffer) and not isinstance(item, (dict, list)):
+                # Un nombre en fin de tampon peut se poursuivre dans le morceau suivant
+                break
+            position = end
+            yield item
+    if buffer[position:].strip():
+        raise ValueError("Document JSON tronqué")
+    if started:
+        raise ValueError("Tableau JSON non terminé")
+
+
+def iter_ndjson(stream: IO) -> Iterator[Dict]:
+    """Parcourt un flux NDJSON (un objet JSON par ligne)"""
+    for number, line in enumerate(_text_stream(stream), start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Ligne {number} : JSON invalide ({e.msg})")
+
+
+def iter_csv(stream: IO, delimiter: str = ',') -> Iterator[Dict]:
+    """Parcourt un fichier CSV dont la première ligne contient les noms de colonnes"""
+    reader = csv.DictReader(_text_stream(stream), delimiter=delimiter)
+    for row in reader:
+        yield {key: (value if value != '' else None) for key, value in row.items() if key}
+
+
+def detect_format(content_type: str = '', filename: str = '') -> Union[str, None]:
+    """Déduit le format d'un flux à partir de son type MIME ou de son nom"""
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    filename = (filename or '').lower()
+    if content_type in ('application/x-ndjson', 'application/ndjson', 'application/jsonl') or filename.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    if content_type in ('text/csv', 'application/csv') or filename.endswith('.csv'):
+        return 'csv'
+    if content_type == 'application/json' or filename.endswith('.json'):
+        return 'json'
+    return None
+
+
+def iter_records(stream: IO, fmt: str) -> Iterator[Dict]:
+    """Parcourt les enregistrements d'un flux JSON, NDJSON ou CSV"""
+    if fmt == 'json':
+        return iter_json_array(stream)
+    if fmt == 'ndjson':
+        return iter_ndjson(stream)
+    if fmt == 'csv':
+        return iter_csv(stream)
+    raise ValueError(f"Format non supporté : {fmt}")
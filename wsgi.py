@@ -0,0 +1,14 @@
+"""
+Point d'entrée WSGI de l'application ITIL Management System
+
+    gunicorn wsgi:app
+    flask --app wsgi rebuild-rollups
+"""
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app import create_app
+
+app = create_app()